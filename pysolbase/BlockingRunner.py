@@ -0,0 +1,152 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import time
+
+import gevent
+from gevent import Timeout
+
+from pysolbase.ContextFilter import ContextFilter
+from pysolbase.LatencyHistogram import LatencyHistogram
+
+_monotonic_ns = time.monotonic_ns
+
+
+# noinspection PyPep8
+class BlockingRunner(object):
+    """
+    Run blocking calls (not covered by gevent monkey patching) on the gevent hub native threadpool (refer to SolBase.run_blocking).
+    - the caller greenlet waits cooperatively, other greenlets keep running
+    - caller context (refer to pysolbase.ContextFilter.ContextFilter) is propagated to the native thread
+    - queue (wait for a pool thread) and run times are recorded (refer to get_stats)
+    Threadpool size is set by SolBase.voodoo_init (threadpool_size).
+    """
+
+    # Counters & latencies (updated by caller greenlets only)
+    _count_submitted = 0
+    _count_completed = 0
+    _count_failed = 0
+    _count_timeout = 0
+    _h_wait = LatencyHistogram()
+    _h_run = LatencyHistogram()
+
+    @classmethod
+    def set_pool_size(cls, pool_size):
+        """
+        Set hub threadpool size
+        :param pool_size: Max native threads
+        :type pool_size: int
+        """
+
+        gevent.get_hub().threadpool.maxsize = pool_size
+
+    @classmethod
+    def get_pool_size(cls):
+        """
+        Get hub threadpool size
+        :return int
+        :rtype int
+        """
+
+        return gevent.get_hub().threadpool.maxsize
+
+    @classmethod
+    def _run(cls, ns_submit, d_context, fn, args, kwargs):
+        """
+        Run (native thread)
+        :return tuple (ok, result or exception, ns_submit, ns_start, ns_end)
+        :rtype tuple
+        """
+
+        ns_start = _monotonic_ns()
+        try:
+            # Context
+            for k, v in d_context.items():
+                ContextFilter.set_value(k, v)
+            try:
+                return True, fn(*args, **kwargs), ns_submit, ns_start, _monotonic_ns()
+            except Exception as e:
+                return False, e, ns_submit, ns_start, _monotonic_ns()
+        finally:
+            # Pool threads are re-used
+            ContextFilter.LOC.__dict__.clear()
+            ContextFilter.CACHE.__dict__.clear()
+
+    @classmethod
+    def run(cls, fn, args, kwargs, timeout=None):
+        """
+        Run a blocking call on the hub threadpool, wait for it cooperatively.
+        :param fn: Callable
+        :type fn: callable
+        :param args: tuple
+        :type args: tuple
+        :param kwargs: dict
+        :type kwargs: dict
+        :param timeout: Max wait in seconds (None : no timeout). On timeout, an exception is raised (the native call is not interrupted).
+        :type timeout: float,None
+        :return Callable result (exceptions are re-raised)
+        :rtype object
+        """
+
+        cls._count_submitted += 1
+        d_context = dict(ContextFilter.LOC.__dict__)
+        ar = gevent.get_hub().threadpool.spawn(cls._run, _monotonic_ns(), d_context, fn, args, kwargs)
+        try:
+            ok, r, ns_submit, ns_start, ns_end = ar.get(timeout=timeout)
+        except Timeout:
+            cls._count_timeout += 1
+            raise Exception("run_blocking timeout, fn=%s, timeout=%s" % (fn, timeout))
+
+        cls._h_wait.record_ns(ns_start - ns_submit)
+        cls._h_run.record_ns(ns_end - ns_start)
+        if ok:
+            cls._count_completed += 1
+            return r
+        cls._count_failed += 1
+        raise r
+
+    @classmethod
+    def get_stats(cls):
+        """
+        Get counters and latencies
+        :return dict
+        :rtype dict
+        """
+
+        pool = gevent.get_hub().threadpool
+        d_wait = cls._h_wait.get_stats()
+        d_run = cls._h_run.get_stats()
+        return {
+            "submitted": cls._count_submitted,
+            "completed": cls._count_completed,
+            "failed": cls._count_failed,
+            "timeout": cls._count_timeout,
+            "pool_size": pool.maxsize,
+            "pool_threads": pool.size,
+            "wait_p50_ms": d_wait["p50_ms"],
+            "wait_p99_ms": d_wait["p99_ms"],
+            "wait_max_ms": d_wait["max_ms"],
+            "run_p50_ms": d_run["p50_ms"],
+            "run_p99_ms": d_run["p99_ms"],
+            "run_max_ms": d_run["max_ms"],
+        }
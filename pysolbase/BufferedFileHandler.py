@@ -0,0 +1,203 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import logging
+import sys
+import time
+from logging.handlers import WatchedFileHandler
+
+import gevent
+from gevent import GreenletExit
+
+
+# noinspection PyPep8
+class BufferedFileHandler(WatchedFileHandler):
+    """
+    Buffered file handler.
+    Formatted records are buffered in memory and written in a single write when :
+    - buffered size reaches buffer_bytes
+    - oldest buffered record is older than flush_ms (a flusher greenlet is scheduled, age is also checked on emit)
+    - an ERROR (or above) record is emitted
+    - flush() or close() is called
+    External rotation (logrotate) is detected as WatchedFileHandler does, but at most once per check_ms (on flush).
+    """
+
+    def __init__(self, filename, encoding="utf-8", buffer_bytes=64 * 1024, flush_ms=1000, check_ms=1000):
+        """
+        Init
+        :param filename: File name
+        :type filename: str
+        :param encoding: Encoding
+        :type encoding: str
+        :param buffer_bytes: Max buffered size (chars) before flush
+        :type buffer_bytes: int
+        :param flush_ms: Max millis a record stays in buffer
+        :type flush_ms: int
+        :param check_ms: Min millis between two rotation checks
+        :type check_ms: int
+        """
+
+        WatchedFileHandler.__init__(self, filename, encoding=encoding)
+
+        self._buffer_bytes = buffer_bytes
+        self._flush_sec = flush_ms * 0.001
+        self._check_sec = check_ms * 0.001
+
+        # Buffer
+        self._buf = list()
+        self._buf_size = 0
+        self._buf_first = 0.0
+        self._flush_greenlet = None
+        self._next_check = time.monotonic() + self._check_sec
+
+        # Counters
+        self._count_record = 0
+        self._count_flush = 0
+        self._count_reopen_check = 0
+        self._flush_bytes = 0
+        self._flush_ms_total = 0.0
+        self._flush_ms_max = 0.0
+        self._flush_ms_last = 0.0
+
+    def get_stats(self):
+        """
+        Get counters
+        :return dict
+        :rtype dict
+        """
+
+        return {
+            "record": self._count_record,
+            "flush": self._count_flush,
+            "flush_bytes": self._flush_bytes,
+            "flush_ms_total": self._flush_ms_total,
+            "flush_ms_max": self._flush_ms_max,
+            "flush_ms_last": self._flush_ms_last,
+            "flush_ms_avg": self._flush_ms_total / self._count_flush if self._count_flush > 0 else 0.0,
+            "reopen_check": self._count_reopen_check,
+            "buffered": self._buf_size,
+        }
+
+    def emit(self, record):
+        """
+        Emit (buffer)
+        :param record: logging.LogRecord
+        :type record: logging.LogRecord
+        """
+
+        # noinspection PyBroadException
+        try:
+            msg = self.format(record) + self.terminator
+            now = time.monotonic()
+            if not self._buf:
+                self._buf_first = now
+            self._buf.append(msg)
+            self._buf_size += len(msg)
+            self._count_record += 1
+
+            if self._buf_size >= self._buffer_bytes or record.levelno >= logging.ERROR or now - self._buf_first >= self._flush_sec:
+                self._flush_buffer()
+            elif self._flush_greenlet is None:
+                self._flush_greenlet = gevent.spawn_later(self._flush_sec, self._flush_scheduled)
+        except GreenletExit:
+            pass
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _flush_scheduled(self):
+        """
+        Scheduled flush
+        """
+
+        self._flush_greenlet = None
+        self.acquire()
+        try:
+            self._flush_buffer()
+        except Exception as e:
+            # No logger here (we are a handler)
+            sys.stderr.write("BufferedFileHandler : flush failed, e=%s\n" % e)
+        finally:
+            self.release()
+
+    def _flush_buffer(self):
+        """
+        Write buffer (lock must be held)
+        """
+
+        if not self._buf:
+            return
+
+        ms = time.perf_counter()
+
+        # Rotation check (at most once per check_ms)
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self._check_sec
+            self._count_reopen_check += 1
+            self.reopenIfNeeded()
+
+        if self.stream is None:
+            self.stream = self._open()
+
+        buf = "".join(self._buf)
+        self._buf = list()
+        self._buf_size = 0
+        self.stream.write(buf)
+        self.stream.flush()
+
+        # Stats
+        ms = (time.perf_counter() - ms) * 1000.0
+        self._count_flush += 1
+        self._flush_bytes += len(buf)
+        self._flush_ms_total += ms
+        self._flush_ms_last = ms
+        if ms > self._flush_ms_max:
+            self._flush_ms_max = ms
+
+    def flush(self):
+        """
+        Flush
+        """
+
+        self.acquire()
+        try:
+            if self._flush_greenlet is not None:
+                self._flush_greenlet.kill(block=False)
+                self._flush_greenlet = None
+            self._flush_buffer()
+        finally:
+            self.release()
+
+    def close(self):
+        """
+        Close
+        """
+
+        # noinspection PyBroadException
+        try:
+            self.flush()
+        except Exception:
+            pass
+        WatchedFileHandler.close(self)
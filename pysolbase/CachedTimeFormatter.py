@@ -0,0 +1,108 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import time
+from logging import Formatter
+
+
+class CachedTimeFormatter(Formatter):
+    """
+    Text formatter with cached timestamp rendering (%(asctime)s).
+    The per-second date/time prefix is rendered once per second, only millis are appended per record.
+    Time modes :
+    - "default" : logging default rendering ("2024-02-29 13:34:56,789"), using converter (local time unless overridden, ie time.gmtime)
+    - "local_iso" : local time, iso 8601 with offset ("2024-02-29T13:34:56.789+01:00")
+    - "utc_iso" : utc, iso 8601 ("2024-02-29T12:34:56.789Z")
+    - "epoch_ms" : epoch millis, integer ("1709210096789")
+    A custom datefmt, if provided, is cached the same way (millis are not appended), using converter as well.
+    """
+
+    TIME_MODES = ("default", "local_iso", "utc_iso", "epoch_ms")
+
+    def __init__(self, fmt=None, datefmt=None, time_mode="default"):
+        """
+        Init
+        :param fmt: Format
+        :type fmt: str,None
+        :param datefmt: Date format (strftime), None for time_mode rendering
+        :type datefmt: str,None
+        :param time_mode: Time mode ("default", "local_iso", "utc_iso", "epoch_ms")
+        :type time_mode: str
+        """
+
+        if time_mode not in self.TIME_MODES:
+            raise Exception("Invalid time_mode=%s" % time_mode)
+
+        Formatter.__init__(self, fmt, datefmt)
+        self._time_mode = time_mode
+
+        # Cache : (second, prefix, suffix)
+        self._cache = (None, None, None)
+
+    def _render_second(self, sec, datefmt):
+        """
+        Render a second (cache miss)
+        :param sec: Epoch seconds
+        :type sec: int
+        :param datefmt: Date format or None
+        :type datefmt: str,None
+        :return tuple (prefix, suffix)
+        :rtype tuple
+        """
+
+        if datefmt:
+            return time.strftime(datefmt, self.converter(sec)), None
+        elif self._time_mode == "default":
+            return time.strftime("%Y-%m-%d %H:%M:%S", self.converter(sec)) + ",", ""
+        elif self._time_mode == "local_iso":
+            ct = time.localtime(sec)
+            z = time.strftime("%z", ct)
+            return time.strftime("%Y-%m-%dT%H:%M:%S", ct) + ".", z[0:3] + ":" + z[3:5]
+        else:
+            return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec)) + ".", "Z"
+
+    def formatTime(self, record, datefmt=None):
+        """
+        Format time (cached per second)
+        :param record: logging.LogRecord
+        :type record: logging.LogRecord
+        :param datefmt: Date format or None
+        :type datefmt: str,None
+        :return str
+        :rtype str
+        """
+
+        if self._time_mode == "epoch_ms" and not datefmt:
+            return str(int(record.created * 1000))
+
+        sec = int(record.created)
+        cache = self._cache
+        if cache[0] != sec:
+            prefix, suffix = self._render_second(sec, datefmt)
+            # Single assignment (greenlets / threads safe)
+            cache = (sec, prefix, suffix)
+            self._cache = cache
+
+        if cache[2] is None:
+            return cache[1]
+        return "%s%03d%s" % (cache[1], record.msecs, cache[2])
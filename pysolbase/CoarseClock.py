@@ -0,0 +1,203 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import os
+import time
+import weakref
+from datetime import datetime, timezone
+
+import gevent
+
+from pysolbase.NativeThread import NativeThread
+
+
+# noinspection PyPep8
+class CoarseClock(object):
+    """
+    Coarse cached clock, for hot path time stamping.
+    Current time is snapshot every resolution_ms (epoch millis, epoch seconds, naive utc datetime for each datecurrent erase mode)
+    and getters serve the snapshot without any syscall or allocation.
+    Refresh is done by :
+    - "greenlet" mode : a gevent loop timer (refreshed only if the gevent loop runs, it does not keep the loop alive)
+    - "thread" mode : a native background thread (refreshed even if the gevent loop is blocked, restarted in child processes after fork)
+    If stopped, getters compute exact values.
+    """
+
+    REFRESH_GREENLET = "greenlet"
+    REFRESH_THREAD = "thread"
+
+    # Thread mode running instances (restarted after fork)
+    _thread_instances = weakref.WeakSet()
+
+    def __init__(self, resolution_ms=10, refresh_mode=REFRESH_GREENLET):
+        """
+        Init
+        :param resolution_ms: Refresh interval in millis
+        :type resolution_ms: int
+        :param refresh_mode: Refresh mode ("greenlet" or "thread")
+        :type refresh_mode: str
+        """
+
+        if refresh_mode not in (self.REFRESH_GREENLET, self.REFRESH_THREAD):
+            raise Exception("Invalid refresh_mode=%s" % refresh_mode)
+        elif resolution_ms <= 0:
+            raise Exception("Invalid resolution_ms=%s" % resolution_ms)
+
+        self._resolution_sec = resolution_ms * 0.001
+        self._refresh_mode = refresh_mode
+        self._running = False
+        self._timer = None
+        self._thread = None
+
+        # Snapshot : (ms, sec, dt erase 0, dt erase 1, dt erase 2)
+        self._snap = None
+        self._count_refresh = 0
+        self.refresh()
+
+    def refresh(self):
+        """
+        Refresh snapshot
+        """
+
+        sec = time.time()
+        dt = datetime.fromtimestamp(sec, timezone.utc).replace(tzinfo=None)
+        # Single assignment : readers always get a consistent snapshot
+        self._snap = (sec * 1000.0, sec, dt, dt.replace(microsecond=dt.microsecond // 1000 * 1000), dt.replace(microsecond=0))
+        self._count_refresh += 1
+
+    def is_running(self):
+        """
+        Return True if running
+        :return bool
+        :rtype bool
+        """
+
+        return self._running
+
+    def start(self):
+        """
+        Start refresh
+        """
+
+        if self._running:
+            return
+
+        self.refresh()
+        self._running = True
+        if self._refresh_mode == self.REFRESH_GREENLET:
+            self._timer = gevent.get_hub().loop.timer(self._resolution_sec, self._resolution_sec, ref=False)
+            self._timer.start(self.refresh)
+        else:
+            self._thread = NativeThread(self.refresh, self._resolution_sec, "CoarseClock")
+            self._thread.start()
+            CoarseClock._thread_instances.add(self)
+
+    @classmethod
+    def _on_fork(cls):
+        """
+        After fork (child) : native threads are gone, restart refresh threads
+        """
+
+        for c in list(cls._thread_instances):
+            if c._running:
+                c.refresh()
+                c._thread.reset_after_fork()
+                c._thread.start()
+
+    def stop(self):
+        """
+        Stop refresh
+        """
+
+        if not self._running:
+            return
+
+        self._running = False
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer.close()
+            self._timer = None
+        if self._thread is not None:
+            CoarseClock._thread_instances.discard(self)
+            self._thread.stop()
+            self._thread = None
+
+    def get_stats(self):
+        """
+        Get counters
+        :return dict
+        :rtype dict
+        """
+
+        return {
+            "running": self._running,
+            "refresh_mode": self._refresh_mode,
+            "resolution_ms": self._resolution_sec * 1000.0,
+            "refresh": self._count_refresh,
+        }
+
+    # ===============================
+    # GETTERS
+    # ===============================
+
+    def mscurrent(self):
+        """
+        Return current millis since epoch (coarse)
+        :return float
+        :rtype float
+        """
+
+        if not self._running:
+            return time.time() * 1000.0
+        return self._snap[0]
+
+    def securrent(self):
+        """
+        Return current seconds since epoch (coarse)
+        :return float
+        :rtype float
+        """
+
+        if not self._running:
+            return time.time()
+        return self._snap[1]
+
+    def datecurrent(self, erase_mode=0):
+        """
+        Return current date (UTC, coarse)
+        :param erase_mode: Erase mode (0=nothing, 1=remove microseconds but keep millis, 2=remove millis completely)
+        :type erase_mode: int
+        :return datetime.datetime (naive)
+        :rtype datetime.datetime
+        """
+
+        if not 0 <= erase_mode <= 2:
+            raise Exception("Invalid erase mode=%s" % erase_mode)
+        elif not self._running:
+            self.refresh()
+        return self._snap[2 + erase_mode]
+
+
+# Refresh threads do not survive fork
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=CoarseClock._on_fork)
@@ -0,0 +1,372 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import glob
+import gzip
+import lzma
+import os
+import shutil
+import sys
+import time
+import weakref
+from collections import deque
+from logging.handlers import BaseRotatingHandler
+
+import gevent
+from gevent import GreenletExit
+
+from pysolbase.NativeThread import NativeThread
+
+
+# noinspection PyPep8
+class CompressedRotatingFileHandler(BaseRotatingHandler):
+    """
+    Size and time based rotating file handler.
+    - rollover occurs when file size reaches max_bytes or when an interval_sec boundary (utc aligned) is crossed
+    - on emitting path, rollover is only a rename (toward "file.YYYYmmdd-HHMMSS") and a re-open
+    - compression (gz, xz) and retention pruning (backup_count) of rotated files are done by a background native thread
+      (started on first rollover, restarted on demand in child processes after fork)
+    """
+
+    # Instances having a started worker (reset after fork)
+    _worker_instances = weakref.WeakSet()
+
+    COMPRESS_NONE = None
+    COMPRESS_GZ = "gz"
+    COMPRESS_XZ = "xz"
+
+    def __init__(self, filename, encoding="utf-8", max_bytes=100 * 1024 * 1024, interval_sec=86400, backup_count=7, compress=COMPRESS_GZ):
+        """
+        Init
+        :param filename: File name
+        :type filename: str
+        :param encoding: Encoding
+        :type encoding: str
+        :param max_bytes: Max file size (0 to disable)
+        :type max_bytes: int
+        :param interval_sec: Rollover interval in seconds, aligned on utc epoch (0 to disable)
+        :type interval_sec: int
+        :param backup_count: Rotated files to keep (0 : keep all)
+        :type backup_count: int
+        :param compress: Compression of rotated files (None, "gz", "xz")
+        :type compress: str,None
+        """
+
+        if compress not in (self.COMPRESS_NONE, self.COMPRESS_GZ, self.COMPRESS_XZ):
+            raise Exception("Invalid compress=%s" % compress)
+
+        BaseRotatingHandler.__init__(self, filename, "a", encoding=encoding)
+
+        self._max_bytes = max_bytes
+        self._interval_sec = interval_sec
+        self._backup_count = backup_count
+        self._compress = compress
+
+        # Current size & next time rollover
+        self._size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        self._rollover_at = self._compute_rollover_at(time.time())
+
+        # Worker
+        self._worker_queue = deque()
+        self._worker_running = False
+        self._worker_stop = False
+        self._worker_wake = NativeThread.allocate_locked()
+        self._worker_done = None
+
+        # Counters
+        self._count_rollover = 0
+        self._count_compressed = 0
+        self._count_pruned = 0
+        self._count_worker_error = 0
+
+    def _compute_rollover_at(self, now):
+        """
+        Compute next time rollover (epoch seconds)
+        :param now: Current epoch seconds
+        :type now: float
+        :return float
+        :rtype float
+        """
+
+        if self._interval_sec <= 0:
+            return float("inf")
+        return (int(now) // self._interval_sec + 1) * self._interval_sec
+
+    def get_stats(self):
+        """
+        Get counters
+        :return dict
+        :rtype dict
+        """
+
+        return {
+            "rollover": self._count_rollover,
+            "compressed": self._count_compressed,
+            "pruned": self._count_pruned,
+            "worker_error": self._count_worker_error,
+            "worker_pending": len(self._worker_queue),
+            "size": self._size,
+        }
+
+    # ===============================
+    # EMITTING PATH
+    # ===============================
+
+    def emit(self, record):
+        """
+        Emit
+        :param record: logging.LogRecord
+        :type record: logging.LogRecord
+        """
+
+        # noinspection PyBroadException
+        try:
+            msg = self.format(record) + self.terminator
+            # Encoded size (ascii fast path)
+            msg_len = len(msg) if msg.isascii() else len(msg.encode(self.encoding or "utf-8", "replace"))
+            if (0 < self._max_bytes <= self._size + msg_len and self._size > 0) or record.created >= self._rollover_at:
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self.stream.flush()
+            self._size += msg_len
+        except GreenletExit:
+            pass
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def shouldRollover(self, record):
+        """
+        Not used (emit handles it, formatting only once)
+        """
+
+        return False
+
+    def doRollover(self):
+        """
+        Rollover : rename current file, re-open, and submit rotated file to the worker
+        """
+
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        now = time.time()
+        self._rollover_at = self._compute_rollover_at(now)
+        if not os.path.exists(self.baseFilename):
+            self._size = 0
+            return
+
+        # Target name (utc), unique
+        dest = self.baseFilename + time.strftime(".%Y%m%d-%H%M%S", time.gmtime(now))
+        if os.path.exists(dest) or os.path.exists(self._get_compressed_name(dest)):
+            idx = 1
+            while os.path.exists("%s.%d" % (dest, idx)) or os.path.exists(self._get_compressed_name("%s.%d" % (dest, idx))):
+                idx += 1
+            dest = "%s.%d" % (dest, idx)
+
+        # O(1)
+        os.rename(self.baseFilename, dest)
+        self.stream = self._open()
+        self._size = 0
+        self._count_rollover += 1
+
+        # Background
+        self._worker_submit(dest)
+
+    def _get_compressed_name(self, file_name):
+        """
+        Get compressed file name
+        :param file_name: str
+        :type file_name: str
+        :return str
+        :rtype str
+        """
+
+        if self._compress:
+            return file_name + "." + self._compress
+        return file_name
+
+    # ===============================
+    # WORKER
+    # ===============================
+
+    def _worker_submit(self, file_name):
+        """
+        Submit a rotated file to the worker (started on demand)
+        :param file_name: Rotated file name
+        :type file_name: str
+        """
+
+        self._worker_queue.append(file_name)
+        if not self._worker_running:
+            self._worker_running = True
+            self._worker_done = NativeThread.allocate_locked()
+            NativeThread.start_new_thread(self._worker_loop)
+            CompressedRotatingFileHandler._worker_instances.add(self)
+        else:
+            try:
+                self._worker_wake.release()
+            except RuntimeError:
+                pass
+
+    @classmethod
+    def _on_fork(cls):
+        """
+        After fork (child) : worker threads are gone and locks may be held, reset workers (restarted on next rollover).
+        Files submitted in the parent are discarded (the parent worker processes them).
+        """
+
+        for h in list(cls._worker_instances):
+            h._worker_queue.clear()
+            h._worker_running = False
+            h._worker_stop = False
+            h._worker_wake = NativeThread.allocate_locked()
+            h._worker_done = None
+        cls._worker_instances = weakref.WeakSet()
+
+    def _worker_loop(self):
+        """
+        Worker loop (native thread)
+        """
+
+        try:
+            while True:
+                while self._worker_queue:
+                    file_name = self._worker_queue[0]
+                    # noinspection PyBroadException
+                    try:
+                        self._compress_file(file_name)
+                        self._prune()
+                    except Exception as e:
+                        self._count_worker_error += 1
+                        sys.stderr.write("CompressedRotatingFileHandler : worker failure, file_name=%s, e=%s\n" % (file_name, e))
+                    self._worker_queue.popleft()
+                if self._worker_stop:
+                    break
+                self._worker_wake.acquire(True, 1.0)
+        finally:
+            self._worker_done.release()
+
+    def _compress_file(self, file_name):
+        """
+        Compress a rotated file (atomic : a temporary file is renamed once complete)
+        :param file_name: Rotated file name
+        :type file_name: str
+        """
+
+        if not self._compress:
+            return
+        elif not os.path.exists(file_name):
+            # Already pruned
+            return
+
+        target = self._get_compressed_name(file_name)
+        tmp = target + ".tmp"
+        if self._compress == self.COMPRESS_GZ:
+            f_out = gzip.open(tmp, "wb")
+        else:
+            f_out = lzma.open(tmp, "wb")
+        try:
+            with open(file_name, "rb") as f_in:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        finally:
+            f_out.close()
+        os.rename(tmp, target)
+        os.remove(file_name)
+        self._count_compressed += 1
+
+    def _prune(self):
+        """
+        Remove oldest rotated files above backup_count
+        """
+
+        if self._backup_count <= 0:
+            return
+
+        # Rotated files only (".YYYYmmdd-HHMMSS" suffix)
+        ar = list()
+        for f in glob.glob(glob.escape(self.baseFilename) + ".[0-9]*"):
+            if f.endswith(".tmp"):
+                continue
+            ar.append(f)
+
+        # Oldest first
+        ar.sort(key=self._get_rotated_key)
+        for f in ar[0:max(0, len(ar) - self._backup_count)]:
+            os.remove(f)
+            self._count_pruned += 1
+
+    def _get_rotated_key(self, file_name):
+        """
+        Get rotated file sort key, from its name ("file.YYYYmmdd-HHMMSS[.idx][.gz|.xz]")
+        :param file_name: Rotated file name
+        :type file_name: str
+        :return tuple (str, int)
+        :rtype tuple
+        """
+
+        ar = file_name[len(self.baseFilename) + 1:].split(".")
+        if len(ar) > 1 and ar[1].isdigit():
+            return ar[0], int(ar[1])
+        return ar[0], 0
+
+    def wait_worker(self, timeout_ms=30000):
+        """
+        Wait for the worker to process all submitted files (cooperative, for unittest and shutdown)
+        :param timeout_ms: Max wait
+        :type timeout_ms: int
+        :return bool (True : idle)
+        :rtype bool
+        """
+
+        ms = time.monotonic() + timeout_ms * 0.001
+        while self._worker_queue and time.monotonic() < ms:
+            gevent.sleep(0.01)
+        return len(self._worker_queue) == 0
+
+    def close(self, timeout_ms=2000):
+        """
+        Close : wait (cooperatively) for pending compressions, up to timeout_ms (the worker completes them in background above)
+        :param timeout_ms: Max wait
+        :type timeout_ms: int
+        """
+
+        if self._worker_running and not self._worker_stop:
+            self._worker_stop = True
+            try:
+                self._worker_wake.release()
+            except RuntimeError:
+                pass
+            ms = time.monotonic() + timeout_ms * 0.001
+            while not self._worker_done.acquire(False) and time.monotonic() < ms:
+                gevent.sleep(0.01)
+        BaseRotatingHandler.close(self)
+
+
+# Worker threads do not survive fork
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=CompressedRotatingFileHandler._on_fork)
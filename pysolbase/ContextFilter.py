@@ -37,6 +37,10 @@ class ContextFilter(Filter):
     # CAUTION : We must target local here as global (otherwise it's a variable local to functions)
     LOC = local()
 
+    # Rendering cache (per thread/greenlet), invalidated by set_value
+    # CAUTION : a mutable value updated in place (without set_value) will not be re-rendered
+    CACHE = local()
+
     @classmethod
     def set_value(cls, k, v):
         """
@@ -50,26 +54,65 @@ class ContextFilter(Filter):
         Assert.check(Exception, k is not None, "Need k, got None")
         Assert.check(Exception, len(k) > 0, "Need k, got empty")
 
+        # Invalidate cache only if value changes
+        d = cls.LOC.__dict__
+        if k in d and d[k] is v:
+            return
+
         setattr(cls.LOC, k, v)
+        cls.CACHE.__dict__.clear()
+
+    @classmethod
+    def get_kfilter(cls):
+        """
+        Get current context rendering, formatted as " key0:value0 keyN:valueN " (sorted by key), cached per thread/greenlet.
+        :return: str
+        :rtype str
+        """
+
+        s = cls.CACHE.__dict__.get("kfilter")
+        if s is None:
+            d = cls.LOC.__dict__
+            if d:
+                s = u" " + u" ".join([u"%s:%s" % (k, d[k]) for k in sorted(d)]) + u" "
+            else:
+                s = u" "
+            cls.CACHE.kfilter = s
+        return s
+
+    @classmethod
+    def get_kdict(cls):
+        """
+        Get current context as a dict, cached per thread/greenlet.
+        CAUTION : returned dict is shared, it must not be modified.
+        :return: dict
+        :rtype dict
+        """
+
+        d = cls.CACHE.__dict__.get("kdict")
+        if d is None:
+            d = dict(cls.LOC.__dict__)
+            cls.CACHE.kdict = d
+        return d
 
     def filter(self, record):
         """
         Record filter.
         This will push thread context (using LOC) toward logger item "kfilter", as an OrderedDict, formatted as "key0:value0 keyN:valueN"
+        The context is also pushed, as a dict, toward logger item "kdict" (used by structured formatters).
+        The rendering is done once per record (filter is added to several handlers) and cached per thread/greenlet context.
         :param record: logging.LogRecord
         :type record: logging.LogRecord
         :return: bool
         :rtype bool
         """
 
-        # Prepare
-        s = u""
-        for k in sorted(self.LOC.__dict__.keys()):
-            v = self.LOC.__dict__[k]
-            s += u" %s:%s" % (k, v)
-        s += u" "
+        # Already rendered for this record (another handler)
+        if "kfilter" in record.__dict__:
+            return True
 
         # Push to record in a single shot
-        setattr(record, "kfilter", s)
+        record.kfilter = self.get_kfilter()
+        record.kdict = self.get_kdict()
 
         return True
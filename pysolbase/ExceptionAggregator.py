@@ -0,0 +1,193 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import logging
+import sys
+import time
+import zlib
+
+from pysolbase.SolBase import SolBase
+
+aggregatorlogger = logging.getLogger("exagg")
+
+
+class ExceptionAggregator(object):
+    """
+    Exception aggregator.
+    - exceptions are fingerprinted by class and traceback (code, lineno) frames
+    - first occurrence of a fingerprint within window_ms is logged in full (extostr, fast mode)
+    - further occurrences are only counted, and a "N occurrences of fingerprint X" summary is logged every summary_interval_ms (logger "exagg")
+    - counts are exposed by get_counts / get_stats
+    Each aggregator owns a periodic summary task on the shared timer wheel (unref'd, refer to SolBase.get_timer_wheel) :
+    an error burst followed by silence is still summarized. Call close when discarding an aggregator (the task references it).
+    """
+
+    def __init__(self, window_ms=60000, summary_interval_ms=60000, max_fingerprints=10000, max_level=30, max_path_level=5):
+        """
+        Init
+        :param window_ms: Window in millis : a fingerprint is logged in full at most once per window
+        :type window_ms: int
+        :param summary_interval_ms: Summary interval in millis (0 to disable)
+        :type summary_interval_ms: int
+        :param max_fingerprints: Max fingerprints tracked (a summary is logged and all fingerprints are reset above)
+        :type max_fingerprints: int
+        :param max_level: extostr max_level
+        :type max_level: int
+        :param max_path_level: extostr max_path_level
+        :type max_path_level: int
+        """
+
+        self._window_sec = window_ms * 0.001
+        self._max_fingerprints = max_fingerprints
+        self._max_level = max_level
+        self._max_path_level = max_path_level
+
+        # Key => [fingerprint, class name, message (last full log), window start, total count, suppressed since last summary]
+        self._d_fp = dict()
+
+        # Counters
+        self._count_reported = 0
+        self._count_logged = 0
+        self._count_suppressed = 0
+
+        # Summary
+        self._summary_task = None
+        if summary_interval_ms > 0:
+            self._summary_task = SolBase.get_timer_wheel().schedule_periodic(summary_interval_ms, self.log_summary, ref=False)
+
+    @classmethod
+    def _get_key(cls, e):
+        """
+        Get exception key : (class, (code, lineno)...)
+        :param e: Exception
+        :type e: BaseException
+        :return tuple
+        :rtype tuple
+        """
+
+        ar = [e.__class__]
+        cur_tb = e.__traceback__
+        while cur_tb:
+            ar.append(cur_tb.tb_frame.f_code)
+            ar.append(cur_tb.tb_lineno)
+            cur_tb = cur_tb.tb_next
+        return tuple(ar)
+
+    @classmethod
+    def _get_fingerprint(cls, key):
+        """
+        Get a stable (across processes) fingerprint for a key
+        :param key: tuple
+        :type key: tuple
+        :return str
+        :rtype str
+        """
+
+        ar = [key[0].__module__ + "." + key[0].__name__]
+        for i in range(1, len(key), 2):
+            ar.append("%s#%s@%s" % (key[i].co_name, key[i].co_filename, key[i + 1]))
+        return "%08x" % zlib.crc32("|".join(ar).encode("utf-8"))
+
+    def report(self, e, msg="Exception", log=None):
+        """
+        Report an exception (to be called from the except block, otherwise the full log line does not carry the call stack)
+        :param e: Exception
+        :type e: BaseException
+        :param msg: Message prefix for the full log line
+        :type msg: str
+        :param log: Logger for the full log line (default : "exagg")
+        :type log: logging.Logger,None
+        :return Fingerprint
+        :rtype str
+        """
+
+        now = time.monotonic()
+        self._count_reported += 1
+        key = self._get_key(e)
+        entry = self._d_fp.get(key)
+        if entry is None:
+            if len(self._d_fp) >= self._max_fingerprints:
+                self.log_summary()
+                self._d_fp.clear()
+            entry = [self._get_fingerprint(key), e.__class__.__name__, None, None, 0, 0]
+            self._d_fp[key] = entry
+        entry[4] += 1
+
+        # First in window : full
+        if entry[3] is None or now - entry[3] >= self._window_sec:
+            entry[3] = now
+            ex_buf = SolBase.extostr(e, self._max_level, self._max_path_level, fast=True) if sys.exc_info()[1] is e else str(e)
+            entry[2] = str(e)
+            self._count_logged += 1
+            (log or aggregatorlogger).error("%s, fp=%s, ex=%s", msg, entry[0], ex_buf)
+        else:
+            entry[5] += 1
+            self._count_suppressed += 1
+
+        return entry[0]
+
+    def log_summary(self):
+        """
+        Log a summary line per fingerprint having suppressed occurrences (since previous summary), and reset them
+        """
+
+        for entry in list(self._d_fp.values()):
+            if entry[5] > 0:
+                n = entry[5]
+                entry[5] = 0
+                aggregatorlogger.warning("%s occurrences of fingerprint %s, cls=%s, last=%s, total=%s", n, entry[0], entry[1], entry[2], entry[4])
+
+    def close(self):
+        """
+        Stop the summary timer
+        """
+
+        if self._summary_task is not None:
+            self._summary_task.cancel()
+            self._summary_task = None
+
+    def get_counts(self):
+        """
+        Get counts per fingerprint
+        :return dict fingerprint => dict (cls, count, suppressed)
+        :rtype dict
+        """
+
+        d = dict()
+        for entry in list(self._d_fp.values()):
+            d[entry[0]] = {"cls": entry[1], "count": entry[4], "suppressed": entry[5]}
+        return d
+
+    def get_stats(self):
+        """
+        Get counters
+        :return dict
+        :rtype dict
+        """
+
+        return {
+            "reported": self._count_reported,
+            "logged": self._count_logged,
+            "suppressed": self._count_suppressed,
+            "fingerprints": len(self._d_fp),
+        }
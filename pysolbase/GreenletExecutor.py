@@ -0,0 +1,341 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import logging
+import time
+
+import gevent
+from gevent import GreenletExit
+from gevent.event import AsyncResult
+from gevent.queue import Queue, Full
+
+from pysolbase.LatencyHistogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+_monotonic_ns = time.monotonic_ns
+
+
+# noinspection PyPep8
+class GreenletExecutor(object):
+    """
+    Bounded greenlet executor (refer to SolBase.greenlet_executor).
+    - at most max_concurrency tasks run at once (worker greenlets are spawned on demand, up to max_concurrency)
+    - pending tasks are held in a bounded queue (max_queue), submit blocks ("block") or raises ("reject") when it is full
+    - map / imap / imap_unordered submit lazily (backpressure applies), results are ordered or in completion order
+    - counters (active, queued, completed, failed, rejected) and latency stats (queue wait, execution)
+    """
+
+    OVERFLOW_BLOCK = "block"
+    OVERFLOW_REJECT = "reject"
+
+    def __init__(self, max_concurrency=64, max_queue=1024, overflow=OVERFLOW_BLOCK, name="executor"):
+        """
+        Init
+        :param max_concurrency: Max concurrent tasks
+        :type max_concurrency: int
+        :param max_queue: Max pending tasks
+        :type max_queue: int
+        :param overflow: Overflow policy ("block", "reject")
+        :type overflow: str
+        :param name: Name (logs)
+        :type name: str
+        """
+
+        if overflow not in (self.OVERFLOW_BLOCK, self.OVERFLOW_REJECT):
+            raise Exception("Invalid overflow=%s" % overflow)
+        elif max_concurrency <= 0 or max_queue <= 0:
+            raise Exception("Invalid max_concurrency=%s, max_queue=%s" % (max_concurrency, max_queue))
+
+        self._max_concurrency = max_concurrency
+        self._overflow = overflow
+        self._name = name
+        self._queue = Queue(maxsize=max_queue)
+        self._workers = list()
+        self._idle = 0
+        self._is_running = True
+
+        # Counters
+        self._count_submitted = 0
+        self._count_completed = 0
+        self._count_failed = 0
+        self._count_rejected = 0
+        self._active = 0
+        self._active_max = 0
+
+        # Latencies
+        self._h_wait = LatencyHistogram()
+        self._h_exec = LatencyHistogram()
+
+    # ===============================
+    # SUBMIT
+    # ===============================
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Submit a task
+        :param fn: Callable
+        :type fn: callable
+        :param args: Args
+        :param kwargs: Keyword args
+        :return gevent.event.AsyncResult (result or exception)
+        :rtype gevent.event.AsyncResult
+        """
+
+        return self._submit(fn, args, kwargs, self._overflow == self.OVERFLOW_BLOCK)
+
+    def _submit(self, fn, args, kwargs, block):
+        """
+        Submit a task
+        :param fn: Callable
+        :type fn: callable
+        :param args: tuple
+        :type args: tuple
+        :param kwargs: dict
+        :type kwargs: dict
+        :param block: If True, block if queue is full, raise otherwise
+        :type block: bool
+        :return gevent.event.AsyncResult
+        :rtype gevent.event.AsyncResult
+        """
+
+        if not self._is_running:
+            raise Exception("Executor is shutdown, name=%s" % self._name)
+
+        # Spawn a worker if pending tasks exceed idle workers
+        if self._queue.qsize() >= self._idle and len(self._workers) < self._max_concurrency:
+            self._spawn_worker()
+
+        ar = AsyncResult()
+        task = (fn, args, kwargs, ar, _monotonic_ns())
+        if block:
+            self._queue.put(task)
+        else:
+            try:
+                self._queue.put_nowait(task)
+            except Full:
+                self._count_rejected += 1
+                raise Exception("Executor queue full, name=%s, max_queue=%s" % (self._name, self._queue.maxsize))
+        self._count_submitted += 1
+        return ar
+
+    def _spawn_worker(self):
+        """
+        Spawn a worker
+        """
+
+        self._idle += 1
+        self._workers.append(gevent.spawn(self._worker_loop))
+
+    def _worker_loop(self):
+        """
+        Worker loop
+        """
+
+        try:
+            while True:
+                task = self._queue.get()
+                if task is None:
+                    break
+                fn, args, kwargs, ar, ns = task
+
+                self._idle -= 1
+                self._active += 1
+                if self._active > self._active_max:
+                    self._active_max = self._active
+                ns_start = _monotonic_ns()
+                self._h_wait.record_ns(ns_start - ns)
+                try:
+                    ar.set(fn(*args, **kwargs))
+                    self._count_completed += 1
+                except GreenletExit as e:
+                    # Worker killed : release the waiter, then exit
+                    ar.set_exception(e)
+                    self._count_failed += 1
+                    raise
+                except BaseException as e:
+                    # Including gevent.Timeout
+                    ar.set_exception(e)
+                    self._count_failed += 1
+                finally:
+                    self._h_exec.record_ns(_monotonic_ns() - ns_start)
+                    self._active -= 1
+                    self._idle += 1
+        finally:
+            # Prune
+            self._idle -= 1
+            try:
+                self._workers.remove(gevent.getcurrent())
+            except ValueError:
+                pass
+
+            # Respawn if pending tasks exceed idle workers (killed worker)
+            if self._is_running and self._queue.qsize() > self._idle and len(self._workers) < self._max_concurrency:
+                self._spawn_worker()
+
+    # ===============================
+    # MAP
+    # ===============================
+
+    def map(self, fn, iterable, ordered=True, timeout=None):
+        """
+        Map (block until all results are available). The first task exception is raised.
+        :param fn: Callable (one argument)
+        :type fn: callable
+        :param iterable: Arguments
+        :type iterable: iterable
+        :param ordered: If True, results are in arguments order, completion order otherwise
+        :type ordered: bool
+        :param timeout: Max wait in seconds per result (None : no timeout)
+        :type timeout: float,None
+        :return list
+        :rtype list
+        """
+
+        return list(self.imap(fn, iterable, ordered, timeout))
+
+    def imap_unordered(self, fn, iterable, timeout=None):
+        """
+        Map, results yielded in completion order (refer to imap)
+        :param fn: Callable (one argument)
+        :type fn: callable
+        :param iterable: Arguments
+        :type iterable: iterable
+        :param timeout: Max wait in seconds per result (None : no timeout)
+        :type timeout: float,None
+        :return generator
+        :rtype generator
+        """
+
+        return self.imap(fn, iterable, False, timeout)
+
+    def imap(self, fn, iterable, ordered=True, timeout=None):
+        """
+        Map, results yielded as they are available.
+        Arguments are submitted by a feeder greenlet (blocking on a full queue, whatever the overflow policy).
+        A task exception is raised when its result is yielded.
+        :param fn: Callable (one argument)
+        :type fn: callable
+        :param iterable: Arguments
+        :type iterable: iterable
+        :param ordered: If True, results are yielded in arguments order, in completion order otherwise
+        :type ordered: bool
+        :param timeout: Max wait in seconds per result (None : no timeout)
+        :type timeout: float,None
+        :return generator
+        :rtype generator
+        """
+
+        # Completions : (idx, AsyncResult), None as end marker (with submitted count)
+        q_done = Queue()
+        d_count = {"submitted": None}
+
+        def _feed():
+            idx = 0
+            try:
+                for v in iterable:
+                    ar = self._submit(fn, (v,), {}, True)
+                    ar.rawlink(lambda a, i=idx: q_done.put((i, a)))
+                    idx += 1
+            finally:
+                d_count["submitted"] = idx
+                q_done.put(None)
+
+        feeder = gevent.spawn(_feed)
+        try:
+            received = 0
+            next_idx = 0
+            d_pending = dict()
+            while d_count["submitted"] is None or received < d_count["submitted"]:
+                item = q_done.get(timeout=timeout)
+                if item is None:
+                    # Feeder exception (iterable or shutdown)
+                    if feeder.exception:
+                        raise feeder.exception
+                    continue
+                received += 1
+                if not ordered:
+                    yield item[1].get()
+                else:
+                    d_pending[item[0]] = item[1]
+                    while next_idx in d_pending:
+                        yield d_pending.pop(next_idx).get()
+                        next_idx += 1
+
+            # Feeder exception (iterable), if all submitted results were received before its end marker
+            feeder.join()
+            if feeder.exception:
+                raise feeder.exception
+        finally:
+            feeder.kill(block=False)
+
+    # ===============================
+    # STATS & SHUTDOWN
+    # ===============================
+
+    def get_stats(self):
+        """
+        Get counters and latencies
+        :return dict
+        :rtype dict
+        """
+
+        d_wait = self._h_wait.get_stats()
+        d_exec = self._h_exec.get_stats()
+        return {
+            "submitted": self._count_submitted,
+            "completed": self._count_completed,
+            "failed": self._count_failed,
+            "rejected": self._count_rejected,
+            "active": self._active,
+            "active_max": self._active_max,
+            "queued": self._queue.qsize(),
+            "workers": len(self._workers),
+            "wait_p50_ms": d_wait["p50_ms"],
+            "wait_p99_ms": d_wait["p99_ms"],
+            "wait_max_ms": d_wait["max_ms"],
+            "exec_p50_ms": d_exec["p50_ms"],
+            "exec_p99_ms": d_exec["p99_ms"],
+            "exec_max_ms": d_exec["max_ms"],
+        }
+
+    def shutdown(self, wait=True, timeout=None):
+        """
+        Shutdown : new submits are refused, pending tasks are processed
+        :param wait: If True, wait for workers completion
+        :type wait: bool
+        :param timeout: Max wait in seconds (None : no timeout)
+        :type timeout: float,None
+        """
+
+        if not self._is_running:
+            return
+        self._is_running = False
+
+        # One end marker per worker (queued after pending tasks)
+        workers = list(self._workers)
+        for _ in workers:
+            self._queue.put(None)
+        if wait:
+            gevent.joinall(workers, timeout=timeout)
+        logger.debug("Executor shutdown, name=%s, stats=%s", self._name, self.get_stats())
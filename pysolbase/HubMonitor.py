@@ -0,0 +1,222 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import logging
+import os
+import sys
+import time
+import weakref
+
+import gevent
+
+from pysolbase.LatencyHistogram import LatencyHistogram
+from pysolbase.NativeThread import NativeThread
+from pysolbase.SolBase import SolBase
+
+monitorlogger = logging.getLogger("hubmonitor")
+
+_monotonic_ns = time.monotonic_ns
+
+
+# noinspection PyPep8
+class HubMonitor(object):
+    """
+    Gevent hub monitor (refer to SolBase.voodoo_init, hub_monitor).
+    - a hub loop timer ticks every tick_ms, the delay between expected and actual ticks (loop lag) is recorded in a histogram
+    - a native thread checks ticks every block_ms / 2 : if the hub did not tick for block_ms, the stack of the code running
+      in the hub thread (the offending greenlet) is captured, extostr style
+    - once the hub resumes, a single "Hub blocked" line is logged (logger "hubmonitor") with the blocked duration and the captured stack,
+      from a spawned greenlet (handlers may yield, which is forbidden in the loop timer callback)
+    No greenlet tracing is involved (the running stack is read using sys._current_frames).
+    The native thread is restarted in child processes after fork (pre-fork workers keep their monitoring).
+    """
+
+    # Running instances (thread restarted after fork)
+    _instances = weakref.WeakSet()
+
+    def __init__(self, block_ms=100, tick_ms=50, max_level=30, max_path_level=5):
+        """
+        Init
+        :param block_ms: Blocking threshold in millis
+        :type block_ms: int
+        :param tick_ms: Loop lag measurement interval in millis
+        :type tick_ms: int
+        :param max_level: extostr max_level
+        :type max_level: int
+        :param max_path_level: extostr max_path_level
+        :type max_path_level: int
+        """
+
+        if block_ms <= 0 or tick_ms <= 0:
+            raise Exception("Invalid block_ms=%s, tick_ms=%s" % (block_ms, tick_ms))
+
+        self._block_ns = int(block_ms * 1000000)
+        self._tick_ns = int(tick_ms * 1000000)
+        self._check_sec = max(block_ms * 0.5, 5.0) * 0.001
+        self._max_level = max_level
+        self._max_path_level = max_path_level
+
+        self._running = False
+        self._hub_ident = None
+        self._timer = None
+        self._thread = NativeThread(self._check, self._check_sec, "HubMonitor")
+
+        # Last tick (monotonic nanos), written by the hub, read by the thread
+        self._last_tick = 0
+
+        # Captured stack (thread => hub) : (tick at capture, stack)
+        self._pending = None
+
+        # Counters
+        self._h_lag = LatencyHistogram()
+        self._count_blocked = 0
+        self._blocked_ms_max = 0.0
+        self._last_blocked_stack = None
+
+    def start(self):
+        """
+        Start (to be called from the hub thread)
+        """
+
+        if self._running:
+            return
+
+        self._running = True
+        self._hub_ident = NativeThread.get_ident()
+        self._last_tick = _monotonic_ns()
+        self._timer = gevent.get_hub().loop.timer(self._tick_ns / 1000000000.0, self._tick_ns / 1000000000.0, ref=False)
+        self._timer.start(self._on_tick)
+        self._thread.start()
+        HubMonitor._instances.add(self)
+
+    def stop(self):
+        """
+        Stop
+        """
+
+        if not self._running:
+            return
+
+        self._running = False
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer.close()
+            self._timer = None
+        HubMonitor._instances.discard(self)
+        self._thread.stop()
+
+    @classmethod
+    def _on_fork(cls):
+        """
+        After fork (child) : the check thread is gone, restart it (the forking thread is the child hub thread)
+        """
+
+        for m in list(cls._instances):
+            if m._running:
+                m._thread.reset_after_fork()
+                m._hub_ident = NativeThread.get_ident()
+                m._last_tick = _monotonic_ns()
+                m._pending = None
+                m._thread.start()
+
+    def _on_tick(self):
+        """
+        Hub tick (loop timer callback)
+        """
+
+        now = _monotonic_ns()
+        last = self._last_tick
+        self._last_tick = now
+        lag = now - last - self._tick_ns
+        self._h_lag.record_ns(lag if lag > 0 else 0)
+
+        # Blocked (captured by the thread) : log now that the hub is back
+        pending = self._pending
+        if pending is not None and pending[0] == last:
+            self._pending = None
+            ms = (now - last) / 1000000.0
+            self._count_blocked += 1
+            if ms > self._blocked_ms_max:
+                self._blocked_ms_max = ms
+            self._last_blocked_stack = pending[1]
+            gevent.spawn(monitorlogger.warning, "Hub blocked, ms=%.1f, cs=[%s]", ms, pending[1])
+
+    def _check(self):
+        """
+        Check (native thread, every check interval)
+        """
+
+        last = self._last_tick
+        if _monotonic_ns() - last < self._block_ns:
+            return
+        pending = self._pending
+        if pending is not None and pending[0] == last:
+            # Already captured for this episode
+            return
+        frame = sys._current_frames().get(self._hub_ident)
+        try:
+            self._pending = (last, SolBase.frametostr(frame, self._max_level, self._max_path_level))
+        finally:
+            del frame
+
+    def is_running(self):
+        """
+        Return True if running
+        :return bool
+        :rtype bool
+        """
+
+        return self._running
+
+    def get_histogram(self):
+        """
+        Get loop lag histogram
+        :return LatencyHistogram
+        :rtype LatencyHistogram
+        """
+
+        return self._h_lag
+
+    def get_stats(self):
+        """
+        Get counters
+        :return dict
+        :rtype dict
+        """
+
+        d = self._h_lag.get_stats()
+        return {
+            "blocked": self._count_blocked,
+            "blocked_ms_max": self._blocked_ms_max,
+            "blocked_last_cs": self._last_blocked_stack,
+            "lag_count": d["count"],
+            "lag_p50_ms": d["p50_ms"],
+            "lag_p99_ms": d["p99_ms"],
+            "lag_p999_ms": d["p999_ms"],
+            "lag_max_ms": d["max_ms"],
+        }
+
+
+# Check threads do not survive fork
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=HubMonitor._on_fork)
@@ -0,0 +1,95 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import json
+from logging import Formatter
+
+
+class JsonFormatter(Formatter):
+    """
+    Json formatter : one json object per record, on a single line.
+    Fields :
+    - ts : epoch millis (int)
+    - level, logger, msg
+    - module, func, line (unless disabled)
+    - thread, thread_name, process, process_name (unless disabled)
+    - exc : formatted exception (if any), stack : stack info (if any)
+    - context keys (refer to pysolbase.ContextFilter.ContextFilter, "kdict" record item) are pushed as top-level fields (record fields win on collision)
+    Values which are not json serializable are rendered using str.
+    """
+
+    def __init__(self, with_caller=True, with_thread=True):
+        """
+        Init
+        :param with_caller: If True, caller fields (module, func, line) are emitted
+        :type with_caller: bool
+        :param with_thread: If True, thread & process fields are emitted
+        :type with_thread: bool
+        """
+
+        Formatter.__init__(self)
+        self._with_caller = with_caller
+        self._with_thread = with_thread
+
+        # Compact encoder (c accelerated, no indent, no circular check)
+        self._encode = json.JSONEncoder(ensure_ascii=False, check_circular=False, separators=(",", ":"), default=str).encode
+
+    def format(self, record):
+        """
+        Format
+        :param record: logging.LogRecord
+        :type record: logging.LogRecord
+        :return str
+        :rtype str
+        """
+
+        # Context first (record fields win)
+        kdict = record.__dict__.get("kdict")
+        if kdict:
+            d = dict(kdict)
+        else:
+            d = dict()
+
+        d["ts"] = int(record.created * 1000)
+        d["level"] = record.levelname
+        d["logger"] = record.name
+        if self._with_caller:
+            d["module"] = record.module
+            d["func"] = record.funcName
+            d["line"] = record.lineno
+        d["msg"] = record.getMessage()
+        if self._with_thread:
+            d["thread"] = record.thread
+            d["thread_name"] = record.threadName
+            d["process"] = record.process
+            d["process_name"] = record.processName
+
+        # Exception
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            d["exc"] = record.exc_text
+        if record.stack_info:
+            d["stack"] = self.formatStack(record.stack_info)
+
+        return self._encode(d)
@@ -0,0 +1,406 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import base64
+import math
+import struct
+import time
+import zlib
+from array import array
+
+_monotonic_ns = time.monotonic_ns
+
+
+# noinspection PyPep8
+class LatencyHistogram(object):
+    """
+    Latency histogram, log-linear buckets (HDR-style), values recorded as nanos.
+    - values below 2^precision_bits are recorded exactly
+    - above, each power of two range is split in 2^(precision_bits-1) linear buckets (relative error below 1 / 2^(precision_bits-1))
+    - array backed : memory is bounded by max_ms and precision_bits (a few kilobytes by default)
+    - record is O(1), percentile queries walk the bucket array
+    - values above max_ms are clamped (and counted as "clamped")
+    Histograms with the same settings can be merged (across greenlets, or across forked processes using to_bytes / from_bytes, to_text / from_text).
+    Not thread safe (greenlets are fine) : use one instance per native thread and merge them.
+    """
+
+    _MAGIC = b"SLH1"
+    # magic, precision_bits, max_ns, count, clamped, sum_ns, min_ns, max_ns, non empty buckets
+    _HEADER = struct.Struct(">4sBQQQQQQI")
+    _BUCKET = struct.Struct(">IQ")
+
+    def __init__(self, max_ms=3600000, precision_bits=7):
+        """
+        Init
+        :param max_ms: Highest trackable value in millis
+        :type max_ms: int
+        :param precision_bits: Precision bits (7 : 1.6% max relative error, 10 : 0.2%)
+        :type precision_bits: int
+        """
+
+        if not 2 <= precision_bits <= 16:
+            raise Exception("Invalid precision_bits=%s" % precision_bits)
+        elif max_ms <= 0:
+            raise Exception("Invalid max_ms=%s" % max_ms)
+
+        self._precision_bits = precision_bits
+        self._sub_count = 1 << precision_bits
+        self._sub_half = self._sub_count >> 1
+        self._max_value = int(round(max_ms * 1000000))
+        self._counts = array("q", bytes(8 * (self._get_index(self._max_value) + 1)))
+
+        self._count = 0
+        self._clamped = 0
+        self._sum = 0
+        self._min = self._max_value
+        self._max = 0
+
+    def _get_index(self, v):
+        """
+        Get bucket index for a value
+        :param v: Value (nanos, >= 0)
+        :type v: int
+        :return int
+        :rtype int
+        """
+
+        if v < self._sub_count:
+            return v
+        # sub_count + (shift - 1) * sub_half + (v >> shift) - sub_half, with sub_count = 2 * sub_half
+        shift = v.bit_length() - self._precision_bits
+        return shift * self._sub_half + (v >> shift)
+
+    def _get_bucket_range(self, idx):
+        """
+        Get bucket value range
+        :param idx: Bucket index
+        :type idx: int
+        :return tuple (lowest value, width)
+        :rtype tuple
+        """
+
+        if idx < self._sub_count:
+            return idx, 1
+        k = idx - self._sub_count
+        shift = k // self._sub_half + 1
+        return (k % self._sub_half + self._sub_half) << shift, 1 << shift
+
+    # ===============================
+    # RECORD
+    # ===============================
+
+    def record_ns(self, ns, count=1):
+        """
+        Record a value in nanos
+        :param ns: Nanos
+        :type ns: int
+        :param count: Occurrence count
+        :type count: int
+        """
+
+        # Hot path : index computation is inlined (refer to _get_index)
+        if ns.__class__ is not int:
+            ns = int(ns)
+        if ns < self._sub_count:
+            if ns < 0:
+                ns = 0
+            self._counts[ns] += count
+        else:
+            if ns > self._max_value:
+                ns = self._max_value
+                self._clamped += count
+            shift = ns.bit_length() - self._precision_bits
+            self._counts[shift * self._sub_half + (ns >> shift)] += count
+
+        # Min is initialized to max_value
+        if ns < self._min:
+            self._min = ns
+        if ns > self._max:
+            self._max = ns
+        self._count += count
+        self._sum += ns * count
+
+    def record_ms(self, ms, count=1):
+        """
+        Record a value in millis (refer to SolBase.msdiff)
+        :param ms: Millis
+        :type ms: float,int
+        :param count: Occurrence count
+        :type count: int
+        """
+
+        self.record_ns(ms * 1000000.0, count)
+
+    def record_since(self, ns_start):
+        """
+        Record elapsed nanos since a monotonic start (refer to SolBase.nscurrent)
+        :param ns_start: Start nanos
+        :type ns_start: int
+        :return Recorded nanos
+        :rtype int
+        """
+
+        ns = _monotonic_ns() - ns_start
+        self.record_ns(ns)
+        return ns
+
+    def reset(self):
+        """
+        Reset
+        """
+
+        self._counts = array("q", bytes(8 * len(self._counts)))
+        self._count = 0
+        self._clamped = 0
+        self._sum = 0
+        self._min = self._max_value
+        self._max = 0
+
+    # ===============================
+    # QUERIES
+    # ===============================
+
+    def get_count(self):
+        """
+        Get recorded value count
+        :return int
+        :rtype int
+        """
+
+        return self._count
+
+    def get_min_ms(self):
+        """
+        Get min (exact)
+        :return float
+        :rtype float
+        """
+
+        if self._count == 0:
+            return 0.0
+        return self._min / 1000000.0
+
+    def get_max_ms(self):
+        """
+        Get max (exact)
+        :return float
+        :rtype float
+        """
+
+        return self._max / 1000000.0
+
+    def get_mean_ms(self):
+        """
+        Get mean (exact)
+        :return float
+        :rtype float
+        """
+
+        if self._count == 0:
+            return 0.0
+        return self._sum / self._count / 1000000.0
+
+    def get_percentile_ms(self, percentile):
+        """
+        Get a percentile (bucket middle value, bounded by min and max, exact for lowest and highest ranks)
+        :param percentile: Percentile (0 to 100)
+        :type percentile: float
+        :return float
+        :rtype float
+        """
+
+        return self.get_percentiles_ms((percentile,))[percentile]
+
+    def get_percentiles_ms(self, percentiles=(50.0, 90.0, 99.0, 99.9)):
+        """
+        Get percentiles (single walk)
+        :param percentiles: Percentiles (0 to 100)
+        :type percentiles: tuple,list
+        :return dict percentile => millis
+        :rtype dict
+        """
+
+        d = dict()
+        if self._count == 0:
+            for p in percentiles:
+                d[p] = 0.0
+            return d
+
+        # Targets (rank, 1 based), ascending
+        ar = sorted((max(1, min(self._count, math.ceil(self._count * p / 100.0))), p) for p in percentiles)
+        pos = 0
+        total = 0
+        for idx, c in enumerate(self._counts):
+            if c == 0:
+                continue
+            total += c
+            while pos < len(ar) and ar[pos][0] <= total:
+                if ar[pos][0] == 1:
+                    v = self._min
+                elif ar[pos][0] == self._count:
+                    v = self._max
+                else:
+                    lo, width = self._get_bucket_range(idx)
+                    v = min(max(lo + (width >> 1), self._min), self._max)
+                d[ar[pos][1]] = v / 1000000.0
+                pos += 1
+            if pos == len(ar):
+                break
+        return d
+
+    def get_stats(self):
+        """
+        Get summary
+        :return dict
+        :rtype dict
+        """
+
+        d = self.get_percentiles_ms()
+        return {
+            "count": self._count,
+            "clamped": self._clamped,
+            "min_ms": self.get_min_ms(),
+            "max_ms": self.get_max_ms(),
+            "mean_ms": self.get_mean_ms(),
+            "p50_ms": d[50.0],
+            "p90_ms": d[90.0],
+            "p99_ms": d[99.0],
+            "p999_ms": d[99.9],
+        }
+
+    # ===============================
+    # MERGE & SERIALIZATION
+    # ===============================
+
+    def _check_compatible(self, precision_bits, max_value):
+        """
+        Check settings
+        :param precision_bits: int
+        :type precision_bits: int
+        :param max_value: int
+        :type max_value: int
+        """
+
+        if precision_bits != self._precision_bits or max_value != self._max_value:
+            raise Exception("Incompatible histogram, precision_bits=%s/%s, max_value=%s/%s" % (precision_bits, self._precision_bits, max_value, self._max_value))
+
+    def _merge_summary(self, count, clamped, sum_ns, min_ns, max_ns):
+        """
+        Merge summary values
+        """
+
+        if count == 0:
+            return
+        if self._count == 0:
+            self._min = min_ns
+            self._max = max_ns
+        else:
+            self._min = min(self._min, min_ns)
+            self._max = max(self._max, max_ns)
+        self._count += count
+        self._clamped += clamped
+        self._sum += sum_ns
+
+    def merge(self, other):
+        """
+        Merge another histogram (same settings required) into this one
+        :param other: LatencyHistogram
+        :type other: LatencyHistogram
+        :return self
+        :rtype LatencyHistogram
+        """
+
+        self._check_compatible(other._precision_bits, other._max_value)
+        counts = self._counts
+        for idx, c in enumerate(other._counts):
+            if c:
+                counts[idx] += c
+        self._merge_summary(other._count, other._clamped, other._sum, other._min, other._max)
+        return self
+
+    def to_bytes(self):
+        """
+        Serialize (binary, non empty buckets only)
+        :return bytes
+        :rtype bytes
+        """
+
+        ar = [self._BUCKET.pack(idx, c) for idx, c in enumerate(self._counts) if c]
+        return self._HEADER.pack(self._MAGIC, self._precision_bits, self._max_value, self._count, self._clamped, self._sum, self._min, self._max, len(ar)) + b"".join(ar)
+
+    def merge_bytes(self, buf):
+        """
+        Merge a serialized histogram (same settings required) into this one
+        :param buf: bytes (refer to to_bytes)
+        :type buf: bytes
+        :return self
+        :rtype LatencyHistogram
+        """
+
+        magic, precision_bits, max_value, count, clamped, sum_ns, min_ns, max_ns, n = self._HEADER.unpack_from(buf, 0)
+        if magic != self._MAGIC:
+            raise Exception("Invalid magic=%s" % magic)
+        self._check_compatible(precision_bits, max_value)
+
+        counts = self._counts
+        for idx, c in self._BUCKET.iter_unpack(buf[self._HEADER.size:self._HEADER.size + n * self._BUCKET.size]):
+            counts[idx] += c
+        self._merge_summary(count, clamped, sum_ns, min_ns, max_ns)
+        return self
+
+    @classmethod
+    def from_bytes(cls, buf):
+        """
+        Deserialize
+        :param buf: bytes (refer to to_bytes)
+        :type buf: bytes
+        :return LatencyHistogram
+        :rtype LatencyHistogram
+        """
+
+        magic, precision_bits, max_value = cls._HEADER.unpack_from(buf, 0)[0:3]
+        if magic != cls._MAGIC:
+            raise Exception("Invalid magic=%s" % magic)
+        h = cls(max_ms=max_value / 1000000.0, precision_bits=precision_bits)
+        return h.merge_bytes(buf)
+
+    def to_text(self):
+        """
+        Serialize (compressed binary, base64, ascii)
+        :return str
+        :rtype str
+        """
+
+        return base64.b64encode(zlib.compress(self.to_bytes())).decode("ascii")
+
+    @classmethod
+    def from_text(cls, buf):
+        """
+        Deserialize
+        :param buf: str (refer to to_text)
+        :type buf: str
+        :return LatencyHistogram
+        :rtype LatencyHistogram
+        """
+
+        return cls.from_bytes(zlib.decompress(base64.b64decode(buf)))
@@ -0,0 +1,167 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import sys
+
+from gevent.monkey import get_original
+
+# Native primitives (not monkey patched)
+_native_start_new_thread = get_original("_thread", "start_new_thread")
+_native_allocate_lock = get_original("_thread", "allocate_lock")
+_native_get_ident = get_original("_thread", "get_ident")
+
+
+class NativeThread(object):
+    """
+    Native thread helpers (not monkey patched, usable after gevent patching).
+    Native threads run outside the gevent hub : they must not schedule greenlets, and they do not survive fork.
+    - classmethods : native primitives (locks, thread start, ident)
+    - instances : a native thread calling fn every interval_sec, sleeping on a stop lock (stop interrupts the sleep).
+      After fork, the owner calls reset_after_fork in the child (the thread is gone), then start again if needed.
+    """
+
+    def __init__(self, fn, interval_sec, name):
+        """
+        Init
+        :param fn: Callable, called every interval_sec (an exception ends the thread)
+        :type fn: callable
+        :param interval_sec: Interval in seconds
+        :type interval_sec: float
+        :param name: Name (stderr logs)
+        :type name: str
+        """
+
+        self._fn = fn
+        self._interval_sec = interval_sec
+        self._name = name
+        self._stop_lock = None
+        self._done_lock = None
+
+    def is_started(self):
+        """
+        Return True if started
+        :return bool
+        :rtype bool
+        """
+
+        return self._stop_lock is not None
+
+    def start(self):
+        """
+        Start the thread (if not started)
+        """
+
+        if self._stop_lock is not None:
+            return
+        self._stop_lock = self.allocate_locked()
+        self._done_lock = self.allocate_locked()
+        _native_start_new_thread(self._loop, (self._stop_lock, self._done_lock))
+
+    def stop(self, timeout_sec=5.0):
+        """
+        Stop the thread and wait for its exit
+        :param timeout_sec: Max wait in seconds
+        :type timeout_sec: float
+        :return bool (True : exited)
+        :rtype bool
+        """
+
+        if self._stop_lock is None:
+            return True
+        self._stop_lock.release()
+        b = self._done_lock.acquire(True, timeout_sec)
+        self._stop_lock = None
+        self._done_lock = None
+        return b
+
+    def reset_after_fork(self):
+        """
+        After fork (child) : the thread is gone, forget it (without waiting)
+        """
+
+        self._stop_lock = None
+        self._done_lock = None
+
+    def _loop(self, stop_lock, done_lock):
+        """
+        Thread loop
+        :param stop_lock: Lock released to stop
+        :type stop_lock: _thread.lock
+        :param done_lock: Lock released on exit
+        :type done_lock: _thread.lock
+        """
+
+        try:
+            # Wait on stop lock (acts as an interruptible sleep)
+            while not stop_lock.acquire(True, self._interval_sec):
+                self._fn()
+        except Exception as e:
+            sys.stderr.write("%s : thread failure, e=%s\n" % (self._name, e))
+        finally:
+            done_lock.release()
+
+    @classmethod
+    def allocate_lock(cls):
+        """
+        Allocate a native lock
+        :return _thread.lock
+        :rtype _thread.lock
+        """
+
+        return _native_allocate_lock()
+
+    @classmethod
+    def allocate_locked(cls):
+        """
+        Allocate a native lock, already acquired (released later to signal)
+        :return _thread.lock
+        :rtype _thread.lock
+        """
+
+        lock = _native_allocate_lock()
+        lock.acquire()
+        return lock
+
+    @classmethod
+    def start_new_thread(cls, fn, args=()):
+        """
+        Start a native thread
+        :param fn: Callable
+        :type fn: callable
+        :param args: Args
+        :type args: tuple
+        :return Thread ident
+        :rtype int
+        """
+
+        return _native_start_new_thread(fn, args)
+
+    @classmethod
+    def get_ident(cls):
+        """
+        Get current native thread ident
+        :return int
+        :rtype int
+        """
+
+        return _native_get_ident()
@@ -22,6 +22,8 @@
 # ===============================================================================
 """
 import logging
+import math
+import os
 import platform
 import tempfile
 
@@ -176,3 +178,33 @@ class PlatformTools(object):
             return tempfile.gettempdir()
         else:
             return "/tmp"
+
+    @classmethod
+    def get_cpu_count(cls):
+        """
+        Get effective cpu count (process affinity, bounded by cgroup cpu quota if any)
+        :return int
+        :rtype int
+        """
+
+        # Affinity
+        try:
+            n = len(os.sched_getaffinity(0))
+        except AttributeError:
+            n = os.cpu_count() or 1
+
+        # Cgroup quota (v2, then v1)
+        for quota_file, period_file in (("/sys/fs/cgroup/cpu.max", None), ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us")):
+            try:
+                with open(quota_file) as f:
+                    ar = f.read().split()
+                if period_file:
+                    with open(period_file) as f:
+                        ar.append(f.read().strip())
+                if ar[0] == "max" or int(ar[0]) <= 0:
+                    continue
+                n = min(n, max(1, int(math.ceil(int(ar[0]) / float(ar[1])))))
+                break
+            except (OSError, ValueError, IndexError):
+                continue
+        return max(1, n)
@@ -0,0 +1,411 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import logging
+import os
+import signal
+import sys
+
+import gevent
+from gevent import GreenletExit
+from gevent.event import Event
+
+from pysolbase.PlatformTools import PlatformTools
+from pysolbase.SolBase import SolBase
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8
+class PreForkManager(object):
+    """
+    Pre-fork worker manager (master side), refer to SolBase.prefork_manager.
+    - forks worker_count workers (default : effective cpu count, refer to PlatformTools.get_cpu_count), each running target(worker_idx)
+    - workers : SolBase.set_master_process(False), optional cpu pinning (round robin over the master affinity), then post fork hooks, then target
+    - dead workers are respawned, with an exponential backoff for workers dying fast (reset once a worker lived respawn_backoff_max_ms)
+    - master signals : stop_signals stop the workers (SIGTERM, then SIGKILL after stop_timeout_ms), forward_signals are forwarded to all workers
+    - workers get default signal dispositions : the target installs its own handlers if required (SIGTERM terminates it otherwise)
+    A worker exits with code 0 when target returns, 1 on exception.
+    Fork as soon as possible : greenlets running in the master are forked with it.
+    """
+
+    def __init__(self, target, worker_count=None, cpu_affinity=False, respawn_backoff_ms=100, respawn_backoff_max_ms=30000, stop_timeout_ms=10000,
+                 stop_signals=(signal.SIGTERM, signal.SIGINT), forward_signals=(signal.SIGHUP, signal.SIGUSR1, signal.SIGUSR2), tick_ms=100):
+        """
+        Init
+        :param target: Worker callable, target(worker_idx)
+        :type target: callable
+        :param worker_count: Worker count (None : effective cpu count)
+        :type worker_count: int,None
+        :param cpu_affinity: If True, pin each worker on a cpu (if supported)
+        :type cpu_affinity: bool
+        :param respawn_backoff_ms: Initial respawn delay (doubled on each consecutive fast death)
+        :type respawn_backoff_ms: int
+        :param respawn_backoff_max_ms: Max respawn delay
+        :type respawn_backoff_max_ms: int
+        :param stop_timeout_ms: Stop : delay between SIGTERM and SIGKILL
+        :type stop_timeout_ms: int
+        :param stop_signals: Master signals stopping the workers (and the manager)
+        :type stop_signals: tuple
+        :param forward_signals: Master signals forwarded to workers
+        :type forward_signals: tuple
+        :param tick_ms: Supervision interval in millis
+        :type tick_ms: int
+        """
+
+        if worker_count is None:
+            worker_count = PlatformTools.get_cpu_count()
+        if worker_count <= 0:
+            raise Exception("Invalid worker_count=%s" % worker_count)
+
+        self._target = target
+        self._worker_count = worker_count
+        self._cpu_affinity = cpu_affinity and hasattr(os, "sched_setaffinity")
+        self._respawn_backoff_ms = respawn_backoff_ms
+        self._respawn_backoff_max_ms = respawn_backoff_max_ms
+        self._stop_timeout_ms = stop_timeout_ms
+        self._stop_signals = stop_signals
+        self._forward_signals = forward_signals
+        self._tick_ms = tick_ms
+        self._post_fork_hooks = list()
+
+        # Workers (by index)
+        self._pids = [None] * worker_count
+        self._started_ns = [0] * worker_count
+        self._failures = [0] * worker_count
+        self._respawn_at_ns = [0] * worker_count
+        self._cpus = list()
+
+        self._is_running = False
+        self._greenlet = None
+        self._signal_handles = list()
+        self._stopped = Event()
+
+        # Counters
+        self._count_spawned = 0
+        self._count_exited = 0
+        self._count_killed = 0
+        self._count_signal_forwarded = 0
+        self._count_fork_error = 0
+
+    def add_post_fork_hook(self, fn):
+        """
+        Register a hook, called in workers after fork, before target, as fn(worker_idx)
+        :param fn: Callable
+        :type fn: callable
+        """
+
+        self._post_fork_hooks.append(fn)
+
+    # ===============================
+    # MASTER
+    # ===============================
+
+    def start(self):
+        """
+        Fork workers, install signal handlers and start the supervisor greenlet
+        """
+
+        if self._is_running:
+            return
+
+        self._is_running = True
+        self._stopped.clear()
+        SolBase.set_master_process(True)
+        if self._cpu_affinity:
+            self._cpus = sorted(os.sched_getaffinity(0))
+
+        for sig in self._stop_signals:
+            self._signal_handles.append(gevent.signal_handler(sig, self._on_stop_signal, sig))
+        for sig in self._forward_signals:
+            self._signal_handles.append(gevent.signal_handler(sig, self.signal_workers, sig))
+
+        for idx in range(0, self._worker_count):
+            self._spawn(idx)
+        self._greenlet = gevent.spawn(self._supervise)
+        logger.info("Started, worker_count=%s, pids=%s", self._worker_count, self._pids)
+
+    def join(self, timeout_ms=None):
+        """
+        Wait for the manager to be stopped (stop, or stop signal)
+        :param timeout_ms: Max wait (None : infinite)
+        :type timeout_ms: int,None
+        :return bool (True : stopped)
+        :rtype bool
+        """
+
+        return self._stopped.wait(None if timeout_ms is None else timeout_ms * 0.001)
+
+    def run(self):
+        """
+        Start and wait until stopped
+        """
+
+        self.start()
+        self.join()
+
+    def stop(self):
+        """
+        Stop : SIGTERM workers, wait up to stop_timeout_ms, then SIGKILL remaining ones
+        """
+
+        if not self._is_running:
+            return
+
+        # No more respawn
+        self._is_running = False
+        if self._greenlet and self._greenlet is not gevent.getcurrent():
+            self._greenlet.kill()
+        self._greenlet = None
+        for h in self._signal_handles:
+            h.cancel()
+        self._signal_handles = list()
+
+        # Term
+        for pid in self._pids:
+            if pid:
+                self._kill(pid, signal.SIGTERM)
+        ns = SolBase.nscurrent()
+        while any(self._pids) and SolBase.ns_to_ms(SolBase.nsdiff(ns)) < self._stop_timeout_ms:
+            self._reap()
+            if any(self._pids):
+                SolBase.sleep(min(self._tick_ms, 20))
+
+        # Kill
+        for idx, pid in enumerate(self._pids):
+            if pid:
+                logger.warning("Worker not stopped, killing, idx=%s, pid=%s", idx, pid)
+                self._kill(pid, signal.SIGKILL)
+                self._count_killed += 1
+                try:
+                    os.waitpid(pid, 0)
+                except ChildProcessError:
+                    pass
+                self._pids[idx] = None
+                self._count_exited += 1
+
+        logger.info("Stopped, stats=%s", self.get_stats())
+        self._stopped.set()
+
+    def signal_workers(self, sig):
+        """
+        Send a signal to all workers
+        :param sig: Signal number
+        :type sig: int
+        """
+
+        for pid in self._pids:
+            if pid:
+                self._kill(pid, sig)
+                self._count_signal_forwarded += 1
+
+    def get_worker_pids(self):
+        """
+        Get alive worker pids (by index, None if dead)
+        :return list
+        :rtype list
+        """
+
+        return list(self._pids)
+
+    def is_running(self):
+        """
+        Return True if running
+        :return bool
+        :rtype bool
+        """
+
+        return self._is_running
+
+    def get_stats(self):
+        """
+        Get counters
+        :return dict
+        :rtype dict
+        """
+
+        return {
+            "workers": self._worker_count,
+            "alive": sum(1 for pid in self._pids if pid),
+            "spawned": self._count_spawned,
+            "exited": self._count_exited,
+            "killed": self._count_killed,
+            "signal_forwarded": self._count_signal_forwarded,
+            "fork_error": self._count_fork_error,
+        }
+
+    def _on_stop_signal(self, sig):
+        """
+        Stop signal
+        :param sig: Signal number
+        :type sig: int
+        """
+
+        logger.info("Got signal=%s, stopping", sig)
+        gevent.spawn(self.stop)
+
+    def _kill(self, pid, sig):
+        """
+        Send a signal to a worker
+        :param pid: Pid
+        :type pid: int
+        :param sig: Signal number
+        :type sig: int
+        """
+
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _supervise(self):
+        """
+        Supervisor greenlet : reap dead workers and respawn them
+        """
+
+        while self._is_running:
+            try:
+                self._reap()
+                for idx, pid in enumerate(self._pids):
+                    if pid is None and self._is_running and SolBase.nscurrent() >= self._respawn_at_ns[idx]:
+                        self._spawn(idx)
+                SolBase.sleep(self._tick_ms)
+            except GreenletExit:
+                break
+            except Exception as e:
+                logger.warning("Supervisor failure, ex=%s", SolBase.extostr(e))
+                SolBase.sleep(self._tick_ms)
+
+    def _reap(self):
+        """
+        Reap dead workers (non blocking) and compute their respawn time
+        """
+
+        for idx, pid in enumerate(self._pids):
+            if pid is None:
+                continue
+            try:
+                rpid, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                rpid, status = pid, 0
+            if rpid == 0:
+                continue
+
+            # Dead
+            self._pids[idx] = None
+            self._count_exited += 1
+            if not self._is_running:
+                continue
+
+            # Backoff (fast death only)
+            uptime_ms = SolBase.ns_to_ms(SolBase.nsdiff(self._started_ns[idx]))
+            if uptime_ms >= self._respawn_backoff_max_ms:
+                self._failures[idx] = 0
+            else:
+                self._failures[idx] += 1
+            delay_ms = 0
+            if self._failures[idx] > 0:
+                delay_ms = min(self._respawn_backoff_max_ms, self._respawn_backoff_ms * (2 ** (self._failures[idx] - 1)))
+            self._respawn_at_ns[idx] = SolBase.nscurrent() + delay_ms * 1000000
+            logger.warning("Worker died, idx=%s, pid=%s, status=%s, uptime_ms=%.0f, respawn_ms=%s", idx, pid, status, uptime_ms, delay_ms)
+
+    def _spawn(self, idx):
+        """
+        Fork a worker
+        :param idx: Worker index
+        :type idx: int
+        """
+
+        try:
+            pid = os.fork()
+        except OSError as e:
+            self._count_fork_error += 1
+            self._respawn_at_ns[idx] = SolBase.nscurrent() + self._respawn_backoff_ms * 1000000
+            logger.warning("Fork failed, idx=%s, ex=%s", idx, SolBase.extostr(e))
+            return
+
+        if pid == 0:
+            # Worker, never returns
+            self._run_worker(idx)
+
+        self._pids[idx] = pid
+        self._started_ns[idx] = SolBase.nscurrent()
+        self._count_spawned += 1
+
+    # ===============================
+    # WORKER
+    # ===============================
+
+    def _run_worker(self, idx):
+        """
+        Worker side (never returns)
+        :param idx: Worker index
+        :type idx: int
+        """
+
+        code = 0
+        try:
+            SolBase.set_master_process(False)
+
+            # Master stuff
+            self._is_running = False
+            for h in self._signal_handles:
+                h.cancel()
+            self._signal_handles = list()
+            for sig in self._stop_signals + self._forward_signals:
+                signal.signal(sig, signal.SIG_DFL)
+
+            # Affinity
+            if self._cpu_affinity and self._cpus:
+                os.sched_setaffinity(0, (self._cpus[idx % len(self._cpus)],))
+
+            # Hooks, then target
+            for fn in self._post_fork_hooks:
+                fn(idx)
+            self._target(idx)
+        except SystemExit as e:
+            # Same exit code as the interpreter (None : 0, int : itself, other : printed, 1)
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                code = 1
+                sys.stderr.write("%s\n" % (e.code,))
+        except BaseException as e:
+            code = 1
+            sys.stderr.write("PreForkManager : worker failure, idx=%s, pid=%s, ex=%s\n" % (idx, os.getpid(), SolBase.extostr(e)))
+        finally:
+            # Flush and close logging handlers (os._exit skips atexit), then std streams
+            # noinspection PyBroadException
+            try:
+                logging.shutdown()
+            except Exception:
+                pass
+            # noinspection PyBroadException
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            except Exception:
+                pass
+            os._exit(code)
@@ -0,0 +1,397 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import logging
+import os
+import sys
+import weakref
+from collections import deque
+from logging import Handler
+
+import gevent
+from gevent import GreenletExit
+from gevent.event import Event
+
+from pysolbase.NativeThread import NativeThread
+
+# Exception rendering (prepare)
+_formatter = logging.Formatter()
+
+
+# noinspection PyPep8
+class QueuedHandler(Handler):
+    """
+    Queued handler.
+    emit only push the record into a bounded in-memory queue.
+    A dedicated drainer (a greenlet or a native thread) pops records and forward them to the target handlers.
+
+    Overflow policies (when the queue is full) :
+    - "block" : caller cooperatively waits (gevent.sleep) until a slot is available
+    - "drop_oldest" : oldest queued record is discarded
+    - "drop_new" : incoming record is discarded
+
+    Drain modes :
+    - "greenlet" : drainer is a greenlet (safe with gevent sockets, but blocking disk writes still hit the hub)
+    - "thread" : drainer is a native thread (target handlers must be usable from another thread, without relying on the gevent hub :
+    handlers scheduling greenlets, ie pysolbase.BufferedFileHandler.BufferedFileHandler and pysolbase.SysLogger.SysLogger in batch or spill modes, are rejected).
+    The drainer thread is restarted in child processes after fork.
+
+    Filters that need the caller context (ie pysolbase.ContextFilter.ContextFilter) must be added to this handler,
+    they are then evaluated on the caller side, before enqueue.
+    """
+
+    OVERFLOW_BLOCK = "block"
+    OVERFLOW_DROP_OLDEST = "drop_oldest"
+    OVERFLOW_DROP_NEW = "drop_new"
+
+    DRAIN_GREENLET = "greenlet"
+    DRAIN_THREAD = "thread"
+
+    # Thread mode instances (restarted after fork)
+    _thread_instances = weakref.WeakSet()
+
+    def __init__(self, handlers, queue_size=10000, overflow=OVERFLOW_DROP_NEW, drain_mode=DRAIN_GREENLET, drain_wait_ms=250):
+        """
+        Init
+        :param handlers: Target handlers
+        :type handlers: list
+        :param queue_size: Max records in queue
+        :type queue_size: int
+        :param overflow: Overflow policy ("block", "drop_oldest", "drop_new")
+        :type overflow: str
+        :param drain_mode: Drain mode ("greenlet", "thread")
+        :type drain_mode: str
+        :param drain_wait_ms: Max wait in millis of the drainer when idle
+        :type drain_wait_ms: int
+        """
+
+        # Check
+        if overflow not in (self.OVERFLOW_BLOCK, self.OVERFLOW_DROP_OLDEST, self.OVERFLOW_DROP_NEW):
+            raise Exception("Invalid overflow=%s" % overflow)
+        elif drain_mode not in (self.DRAIN_GREENLET, self.DRAIN_THREAD):
+            raise Exception("Invalid drain_mode=%s" % drain_mode)
+        elif queue_size <= 0:
+            raise Exception("Invalid queue_size=%s" % queue_size)
+        elif drain_mode == self.DRAIN_THREAD:
+            for h in handlers:
+                self._check_thread_target(h)
+
+        # Base call
+        Handler.__init__(self)
+
+        # Store
+        self._handlers = list(handlers)
+        self._queue_size = queue_size
+        self._overflow = overflow
+        self._drain_mode = drain_mode
+        self._drain_wait_sec = drain_wait_ms * 0.001
+
+        # Queue (drop_oldest relies on deque maxlen, which discard at left atomically)
+        if overflow == self.OVERFLOW_DROP_OLDEST:
+            self._queue = deque(maxlen=queue_size)
+        else:
+            self._queue = deque()
+
+        # Counters
+        self._count_enqueued = 0
+        self._count_dropped = 0
+        self._count_emitted = 0
+        self._count_error = 0
+        self._depth_max = 0
+
+        # Drainer
+        self._is_running = True
+        self._greenlet = None
+        self._event = None
+        self._wake_lock = None
+        self._done_lock = None
+        if drain_mode == self.DRAIN_GREENLET:
+            self._event = Event()
+            self._greenlet = gevent.spawn(self._drain_loop)
+        else:
+            self._start_thread()
+            QueuedHandler._thread_instances.add(self)
+
+    @classmethod
+    def _check_thread_target(cls, h):
+        """
+        Check a target handler can be used by the drainer thread (it must not schedule greenlets)
+        :param h: logging.Handler
+        :type h: logging.Handler
+        """
+
+        from pysolbase.BufferedFileHandler import BufferedFileHandler
+        from pysolbase.SysLogger import SysLogger
+
+        if isinstance(h, BufferedFileHandler) or (isinstance(h, SysLogger) and (h._batch_max_records > 0 or h._spool is not None)):
+            raise Exception("Handler not usable in thread drain mode (requires the gevent hub), h=%s" % h)
+
+    def _start_thread(self):
+        """
+        Start the drainer thread (thread mode)
+        """
+
+        # Binary semaphore : locked => nothing to signal
+        self._wake_lock = NativeThread.allocate_locked()
+        # Released by the drainer when it exits
+        self._done_lock = NativeThread.allocate_locked()
+        NativeThread.start_new_thread(self._drain_thread)
+
+    @classmethod
+    def _on_fork(cls):
+        """
+        After fork (child) : native threads are gone and locks may be held, re-create them and restart drainers.
+        Records queued by the parent are discarded (the parent drains them).
+        """
+
+        for h in list(cls._thread_instances):
+            if h._is_running:
+                h._queue.clear()
+                h._start_thread()
+
+    # ===============================
+    # PRODUCER SIDE
+    # ===============================
+
+    @classmethod
+    def prepare(cls, record):
+        """
+        Prepare a record for enqueue : merge args into message and render exception, so the record
+        does not hold references toward caller objects / frames.
+        :param record: logging.LogRecord
+        :type record: logging.LogRecord
+        :return logging.LogRecord
+        :rtype logging.LogRecord
+        """
+
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def handle(self, record):
+        """
+        Handle (we do not need the handler lock here, deque is thread safe)
+        :param record: logging.LogRecord
+        :type record: logging.LogRecord
+        :return bool
+        :rtype bool
+        """
+
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record):
+        """
+        Emit (enqueue)
+        :param record: logging.LogRecord
+        :type record: logging.LogRecord
+        """
+
+        # noinspection PyBroadException
+        try:
+            if not self._is_running:
+                self._count_dropped += 1
+                return
+
+            q = self._queue
+            if len(q) >= self._queue_size:
+                if self._overflow == self.OVERFLOW_DROP_NEW:
+                    self._count_dropped += 1
+                    return
+                elif self._overflow == self.OVERFLOW_DROP_OLDEST:
+                    # deque maxlen will discard the oldest one
+                    self._count_dropped += 1
+                else:
+                    while len(q) >= self._queue_size and self._is_running:
+                        self._signal()
+                        gevent.sleep(0.001)
+
+            q.append(self.prepare(record))
+            self._count_enqueued += 1
+
+            # Depth
+            depth = len(q)
+            if depth > self._depth_max:
+                self._depth_max = depth
+
+            # Wake up drainer
+            self._signal()
+        except GreenletExit:
+            pass
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _signal(self):
+        """
+        Wake up drainer
+        """
+
+        if self._event is not None:
+            if not self._event.is_set():
+                self._event.set()
+        else:
+            try:
+                self._wake_lock.release()
+            except RuntimeError:
+                # Already signaled
+                pass
+
+    # ===============================
+    # DRAINER SIDE
+    # ===============================
+
+    def _drain(self):
+        """
+        Drain everything currently queued toward target handlers
+        """
+
+        q = self._queue
+        while q:
+            try:
+                record = q.popleft()
+            except IndexError:
+                break
+            for h in self._handlers:
+                if record.levelno >= h.level:
+                    # noinspection PyBroadException
+                    try:
+                        h.handle(record)
+                    except Exception:
+                        self._count_error += 1
+            self._count_emitted += 1
+
+    def _drain_loop(self):
+        """
+        Drainer loop (greenlet mode)
+        """
+
+        try:
+            while self._is_running:
+                self._event.clear()
+                self._drain()
+                self._event.wait(self._drain_wait_sec)
+        except GreenletExit:
+            pass
+        finally:
+            self._drain()
+
+    def _drain_thread(self):
+        """
+        Drainer loop (thread mode)
+        """
+
+        try:
+            while self._is_running:
+                self._drain()
+                self._wake_lock.acquire(True, self._drain_wait_sec)
+            self._drain()
+        except Exception as e:
+            sys.stderr.write("QueuedHandler : drainer failure, e=%s\n" % e)
+        finally:
+            self._done_lock.release()
+
+    # ===============================
+    # MISC
+    # ===============================
+
+    def get_handlers(self):
+        """
+        Get target handlers
+        :return list
+        :rtype list
+        """
+
+        return list(self._handlers)
+
+    def get_stats(self):
+        """
+        Get counters
+        :return dict
+        :rtype dict
+        """
+
+        return {
+            "enqueued": self._count_enqueued,
+            "dropped": self._count_dropped,
+            "emitted": self._count_emitted,
+            "error": self._count_error,
+            "depth": len(self._queue),
+            "depth_max": self._depth_max,
+            "queue_size": self._queue_size,
+        }
+
+    def flush(self):
+        """
+        Flush : wait (cooperatively) for the queue to be drained, then flush target handlers
+        """
+
+        while self._queue and self._is_running:
+            self._signal()
+            gevent.sleep(0.001)
+        for h in self._handlers:
+            # noinspection PyBroadException
+            try:
+                h.flush()
+            except Exception:
+                pass
+
+    def close(self):
+        """
+        Close : stop the drainer (pending records are drained), then close target handlers
+        """
+
+        if self._is_running:
+            self._is_running = False
+            if self._greenlet is not None:
+                self._event.set()
+                self._greenlet.join(timeout=5.0)
+                self._greenlet = None
+            else:
+                self._signal()
+                if self._done_lock.acquire(True, 5.0):
+                    self._done_lock.release()
+
+            # Late records (if any)
+            self._drain()
+
+            for h in self._handlers:
+                # noinspection PyBroadException
+                try:
+                    h.close()
+                except Exception:
+                    pass
+
+        Handler.close(self)
+
+
+# Drainer threads do not survive fork
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=QueuedHandler._on_fork)
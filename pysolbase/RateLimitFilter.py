@@ -0,0 +1,169 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import logging
+import random
+import time
+from logging import Filter
+
+from pysolbase.SolBase import SolBase
+
+summarylogger = logging.getLogger("ratelimit")
+
+
+class RateLimitFilter(Filter):
+    """
+    Rate limit filter, per call site (logger name, pathname, lineno).
+    - token bucket per call site (rate_per_sec tokens per second, up to burst tokens)
+    - optional probabilistic sampling for low levels (levelno <= sample_max_level)
+    - suppressed records are counted and a "suppressed N records" summary is logged every summary_interval_ms (logger "ratelimit")
+    The summary task runs on the shared timer wheel (unref'd, refer to SolBase.get_timer_wheel) : suppressed records of a burst are reported even if nothing is logged afterwards.
+    The task is cancelled by close (called on logging reset, refer to SolBase._reset_logging) and restarted by start (called when the filter is registered).
+
+    The decision is taken once per record : the filter can be added to several handlers (refer to SolBase._register_filter).
+    """
+
+    def __init__(self, rate_per_sec=10.0, burst=50, sample_rate=1.0, sample_max_level=logging.INFO, summary_interval_ms=60000, max_sites=10000):
+        """
+        Init
+        :param rate_per_sec: Tokens per second, per call site
+        :type rate_per_sec: float
+        :param burst: Max tokens, per call site
+        :type burst: int
+        :param sample_rate: Sampling rate (1.0 : no sampling, 0.1 : 10% of records kept) for records with levelno <= sample_max_level
+        :type sample_rate: float
+        :param sample_max_level: Max level for sampling
+        :type sample_max_level: int
+        :param summary_interval_ms: Summary interval in millis (0 to disable)
+        :type summary_interval_ms: int
+        :param max_sites: Max call sites tracked (all buckets are reset above)
+        :type max_sites: int
+        """
+
+        Filter.__init__(self)
+
+        self._rate_per_sec = float(rate_per_sec)
+        self._burst = float(burst)
+        self._sample_rate = sample_rate
+        self._sample_max_level = sample_max_level if sample_rate < 1.0 else -1
+        self._max_sites = max_sites
+
+        # Call site => [tokens, last refill, suppressed since last summary]
+        self._d_site = dict()
+
+        # Counters
+        self._count_passed = 0
+        self._count_suppressed = 0
+
+        # Summary
+        self._summary_interval_ms = summary_interval_ms
+        self._summary_task = None
+        self.start()
+
+    def start(self):
+        """
+        Start the summary task (if enabled and not started)
+        """
+
+        if self._summary_task is None and self._summary_interval_ms > 0:
+            self._summary_task = SolBase.get_timer_wheel().schedule_periodic(self._summary_interval_ms, self.log_summary, ref=False)
+
+    def close(self):
+        """
+        Stop the summary task
+        """
+
+        if self._summary_task is not None:
+            self._summary_task.cancel()
+            self._summary_task = None
+
+    def get_stats(self):
+        """
+        Get counters
+        :return dict
+        :rtype dict
+        """
+
+        return {
+            "passed": self._count_passed,
+            "suppressed": self._count_suppressed,
+            "sites": len(self._d_site),
+        }
+
+    def filter(self, record):
+        """
+        Filter
+        :param record: logging.LogRecord
+        :type record: logging.LogRecord
+        :return bool
+        :rtype bool
+        """
+
+        # Already decided (another handler, or our own summary)
+        b = record.__dict__.get("rlimit")
+        if b is not None:
+            return b
+
+        now = time.monotonic()
+        key = (record.name, record.pathname, record.lineno)
+        site = self._d_site.get(key)
+        if site is None:
+            if len(self._d_site) >= self._max_sites:
+                self._d_site.clear()
+            site = [self._burst, now, 0]
+            self._d_site[key] = site
+
+        # Sampling
+        if record.levelno <= self._sample_max_level and random.random() >= self._sample_rate:
+            b = False
+        else:
+            # Bucket
+            tokens = site[0] + (now - site[1]) * self._rate_per_sec
+            if tokens > self._burst:
+                tokens = self._burst
+            site[1] = now
+            if tokens < 1.0:
+                site[0] = tokens
+                b = False
+            else:
+                site[0] = tokens - 1.0
+                b = True
+
+        if b:
+            self._count_passed += 1
+        else:
+            self._count_suppressed += 1
+            site[2] += 1
+        record.rlimit = b
+        return b
+
+    def log_summary(self):
+        """
+        Log a summary line per call site having suppressed records (since previous summary), and reset them
+        """
+
+        for key, site in list(self._d_site.items()):
+            if site[2] > 0:
+                n = site[2]
+                site[2] = 0
+                summarylogger.warning("Suppressed %s records, logger=%s, site=%s@%s", n, key[0], key[1], key[2], extra={"rlimit": True})
@@ -25,6 +25,7 @@ import ast
 import logging
 import os
 import platform
+import socket
 import sys
 import time
 import traceback
@@ -34,12 +35,18 @@ from threading import Lock
 
 import gevent
 import pytz
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 
 from gevent import monkey, config
 from yaml import load, SafeLoader
 
+from pysolbase.BlockingRunner import BlockingRunner
+from pysolbase.CachedTimeFormatter import CachedTimeFormatter
+from pysolbase.CoarseClock import CoarseClock
 from pysolbase.ContextFilter import ContextFilter
+from pysolbase.Stopwatch import Stopwatch
+from pysolbase.Timed import Timed
+from pysolbase.TzCache import TzCache
 
 logger = logging.getLogger(__name__)
 lifecyclelogger = logging.getLogger("lifecycle")
@@ -64,10 +71,27 @@ class SolBase(object):
     # Logging stuff
     _logging_initialized = False
     _logging_lock = Lock()
+    _logging_profile = "default"
+    # Logging module settings overridden by the "lean" profile (restored by "default")
+    _logging_profile_saved = None
 
     # Fork stuff
     _master_process = True
 
+    # Coarse clock (opt-in)
+    _coarse_clock = None
+
+    # Hub monitor (opt-in)
+    _hub_monitor = None
+
+    # Shared timer wheel
+    _timer_wheel = None
+
+    # Extostr fast mode (frame rendering cache : (code, lineno, max_path_level) => str)
+    _extostr_fast = False
+    _extostr_cache = dict()
+    EXTOSTR_CACHE_MAX = 10000
+
     # ===============================
     # DATE & MS
     # ===============================
@@ -94,6 +118,7 @@ class SolBase(object):
     def msdiff(cls, ms_start, ms_end=None):
         """
         Get difference in millis between current millis and provided millis.
+        This is wall clock based (affected by clock steps), use nscurrent / nsdiff or Stopwatch for durations.
         :param ms_start: Start millis
         :type ms_start: float
         :param ms_end: End millis (will use current if not provided)
@@ -107,6 +132,79 @@ class SolBase(object):
 
         return ms_end - ms_start
 
+    @classmethod
+    def nscurrent(cls):
+        """
+        Return current monotonic nanos (not related to epoch, not affected by wall clock steps, for durations only)
+        :return int
+        :rtype int
+        """
+        return time.monotonic_ns()
+
+    @classmethod
+    def nsdiff(cls, ns_start, ns_end=None):
+        """
+        Get difference in nanos between current monotonic nanos and provided monotonic nanos.
+        :param ns_start: Start nanos (refer to nscurrent)
+        :type ns_start: int
+        :param ns_end: End nanos (will use current if not provided)
+        :type ns_end: int
+        :return int
+        :rtype int
+        """
+
+        if ns_end is None:
+            ns_end = time.monotonic_ns()
+
+        return ns_end - ns_start
+
+    @classmethod
+    def ns_to_ms(cls, ns):
+        """
+        Convert nanos to millis
+        :param ns: Nanos
+        :type ns: int
+        :return float
+        :rtype float
+        """
+        return ns / 1000000.0
+
+    @classmethod
+    def stopwatch(cls, start=True):
+        """
+        Get a monotonic stopwatch (refer to pysolbase.Stopwatch.Stopwatch)
+        :param start: If True, start now
+        :type start: bool
+        :return pysolbase.Stopwatch.Stopwatch
+        :rtype pysolbase.Stopwatch.Stopwatch
+        """
+        return Stopwatch(start)
+
+    @classmethod
+    def timed(cls, name, slow_ms=None):
+        """
+        Get a timing decorator / context manager (refer to pysolbase.Timed.Timed).
+        Calls are recorded into a per name latency histogram, calls above slow_ms log a single line (with context keys),
+        and aggregated summaries are logged periodically (refer to timed_set_summary_interval_ms).
+        Usage : "@SolBase.timed("db.get", slow_ms=50)" or "with SolBase.timed("db.get", slow_ms=50):"
+        :param name: Aggregate name
+        :type name: str
+        :param slow_ms: Slow call threshold in millis (None : no slow call logs)
+        :type slow_ms: int,float,None
+        :return pysolbase.Timed.Timed
+        :rtype pysolbase.Timed.Timed
+        """
+        return Timed(name, slow_ms)
+
+    @classmethod
+    def timed_set_summary_interval_ms(cls, summary_interval_ms=60000):
+        """
+        Set timed summary interval (refer to timed)
+        :param summary_interval_ms: Summary interval in millis (0 : disabled)
+        :type summary_interval_ms: int
+        """
+        Timed.set_summary_interval_ms(summary_interval_ms)
+
     @classmethod
     def datecurrent(cls, erase_mode=0):
         """
@@ -127,6 +225,82 @@ class SolBase(object):
         else:
             raise Exception("Invalid erase mode=%s" % erase_mode)
 
+    # ===============================
+    # COARSE CLOCK
+    # ===============================
+
+    @classmethod
+    def coarse_clock_start(cls, resolution_ms=10, refresh_mode="greenlet"):
+        """
+        Start the coarse clock (refer to pysolbase.CoarseClock.CoarseClock), used by coarse_mscurrent, coarse_securrent, coarse_datecurrent.
+        If already started, it is restarted with provided settings.
+        :param resolution_ms: Refresh interval in millis
+        :type resolution_ms: int
+        :param refresh_mode: Refresh mode ("greenlet" : gevent loop timer, "thread" : native background thread)
+        :type refresh_mode: str
+        :return pysolbase.CoarseClock.CoarseClock
+        :rtype pysolbase.CoarseClock.CoarseClock
+        """
+
+        c = CoarseClock(resolution_ms, refresh_mode)
+        c.start()
+        old = cls._coarse_clock
+        cls._coarse_clock = c
+        if old:
+            old.stop()
+        return c
+
+    @classmethod
+    def coarse_clock_stop(cls):
+        """
+        Stop the coarse clock (coarse getters then return exact values)
+        """
+
+        c = cls._coarse_clock
+        cls._coarse_clock = None
+        if c:
+            c.stop()
+
+    @classmethod
+    def coarse_mscurrent(cls):
+        """
+        Return current millis since epoch, from the coarse clock if started (exact otherwise)
+        :return float
+        :rtype float
+        """
+
+        c = cls._coarse_clock
+        if c is None:
+            return time.time() * 1000.0
+        return c.mscurrent()
+
+    @classmethod
+    def coarse_securrent(cls):
+        """
+        Return current seconds since epoch, from the coarse clock if started (exact otherwise)
+        :return float
+        :rtype float
+        """
+
+        c = cls._coarse_clock
+        if c is None:
+            return time.time()
+        return c.securrent()
+
+    @classmethod
+    def coarse_datecurrent(cls, erase_mode=0):
+        """
+        Return current date (UTC), from the coarse clock if started (exact otherwise)
+        :param erase_mode: Erase mode (0=nothing, 1=remove microseconds but keep millis, 2=remove millis completely)
+        :return datetime.datetime (naive)
+        :rtype datetime.datetime
+        """
+
+        c = cls._coarse_clock
+        if c is None:
+            return cls.datecurrent(erase_mode)
+        return c.datecurrent(erase_mode)
+
     @classmethod
     def datediff(cls, dt_start, dt_end=None):
         """
@@ -152,12 +326,15 @@ class SolBase(object):
     # ==========================================
 
     DT_EPOCH = datetime.fromtimestamp(0, timezone.utc).replace(tzinfo=None) # Naive
+    DT_EPOCH_AWARE = datetime.fromtimestamp(0, timezone.utc)
+    _TD_MS = timedelta(milliseconds=1)
+    _TD_SEC = timedelta(seconds=1)
 
     @classmethod
     def dt_to_epoch(cls, dt):
         """
         Convert a datetime (UTC required) to a unix time since epoch, as seconds, as integer.
-        Note that millis precision is lost.
+        Note that millis precision is lost (truncated toward zero : before 1970, it differs from dts_to_epoch, which floors).
         :param dt: datetime
         :type dt: datetime
         :return int
@@ -207,11 +384,16 @@ class SolBase(object):
         """
 
         # If naive, add utc
-        if cls.dt_is_naive(dt):
+        tz = dt.tzinfo
+        if not tz:
+            return dt.replace(tzinfo=pytz.utc)
+        elif tz is pytz.utc:
+            return dt
+        elif tz is timezone.utc:
             return dt.replace(tzinfo=pytz.utc)
         else:
             # Not naive, go utc, keep aware
-            return dt.astimezone(pytz.utc)
+            return (dt.replace(tzinfo=None) - dt.utcoffset()).replace(tzinfo=pytz.utc)
 
     @classmethod
     def dt_ensure_utc_naive(cls, dt):
@@ -223,8 +405,213 @@ class SolBase(object):
         :rtype datetime.datetime
         """
 
-        dt = cls.dt_ensure_utc_aware(dt)
-        return dt.replace(tzinfo=None)
+        if not dt.tzinfo:
+            return dt
+        return dt.replace(tzinfo=None) - dt.utcoffset()
+
+    @classmethod
+    def dt_to_epoch_ms(cls, dt):
+        """
+        Convert a datetime (UTC required, naive or aware) to a unix time since epoch, as millis, as integer.
+        :param dt: datetime
+        :type dt: datetime
+        :return int
+        :rtype int
+        """
+
+        if dt.tzinfo:
+            return (dt - cls.DT_EPOCH_AWARE) // cls._TD_MS
+        return (dt - cls.DT_EPOCH) // cls._TD_MS
+
+    @classmethod
+    def epoch_ms_to_dt(cls, epoch_ms):
+        """
+        Convert an epoch in millis (float or int) to datetime (UTC)
+        :param epoch_ms: float,int
+        :type epoch_ms: float,int
+        :return datetime (naive)
+        :rtype datetime
+        """
+
+        return cls.DT_EPOCH + timedelta(milliseconds=epoch_ms)
+
+    # ==========================================
+    # TIME ZONES
+    # ==========================================
+
+    @classmethod
+    def dt_to_tz(cls, dt, tz_name):
+        """
+        Convert a datetime to a time zone (refer to pysolbase.TzCache.TzCache, zones and utc offsets are cached).
+        Returned datetime carries a fixed offset tzinfo (%z, %Z render as usual).
+        :param dt: datetime (naive : utc assumed, or aware)
+        :type dt: datetime.datetime
+        :param tz_name: Zone name (ie "Europe/Paris")
+        :type tz_name: str
+        :return datetime.datetime (aware)
+        :rtype datetime.datetime
+        """
+
+        return TzCache.to_tz(dt, tz_name)
+
+    @classmethod
+    def dts_to_tz(cls, dts, tz_name):
+        """
+        Batch dt_to_tz
+        :param dts: iterable of datetime (naive : utc assumed, or aware)
+        :type dts: list,tuple
+        :param tz_name: Zone name (ie "Europe/Paris")
+        :type tz_name: str
+        :return list of datetime.datetime (aware)
+        :rtype list
+        """
+
+        return TzCache.to_tz_bulk(dts, tz_name)
+
+    @classmethod
+    def dt_tz_to_utc_naive(cls, dt, tz_name):
+        """
+        Convert a time zone local naive datetime to utc naive (ambiguous local times resolve to the first occurrence)
+        :param dt: datetime (naive, local to tz_name)
+        :type dt: datetime.datetime
+        :param tz_name: Zone name (ie "Europe/Paris")
+        :type tz_name: str
+        :return datetime.datetime (naive)
+        :rtype datetime.datetime
+        """
+
+        return TzCache.from_tz(dt, tz_name)
+
+    # ==========================================
+    # DATE BATCH
+    # ==========================================
+
+    # Batch helpers accept any iterable (list, tuple, array.array...) and return a list.
+    # If a numpy array is provided (numpy not imported by us, it is optional), numpy vectorized arithmetic is used
+    # and a numpy array is returned :
+    # - datetimes are expected as numpy datetime64 (naive utc)
+    # - epochs are expected as numpy numeric arrays
+    # Datetime to epoch conversions floor (toward the past, including before 1970), whatever the input
+    # (unlike dt_to_epoch, which truncates toward zero, kept for compatibility).
+
+    @classmethod
+    def _get_numpy_array(cls, values):
+        """
+        Return numpy module if values is a numpy array, None otherwise (numpy is never imported here)
+        :param values: iterable
+        :type values: object
+        :return module,None
+        :rtype module,None
+        """
+
+        np = sys.modules.get("numpy")
+        if np is not None and isinstance(values, np.ndarray):
+            return np
+        return None
+
+    @classmethod
+    def dts_to_epoch(cls, dts):
+        """
+        Batch dt_to_epoch (seconds, int). Aware datetimes are supported.
+        :param dts: iterable of datetime, or numpy datetime64 array
+        :type dts: list,tuple,numpy.ndarray
+        :return list of int (numpy int64 array for numpy input)
+        :rtype list,numpy.ndarray
+        """
+
+        np = cls._get_numpy_array(dts)
+        if np is not None:
+            return dts.astype("datetime64[s]").astype(np.int64)
+
+        ep = cls.DT_EPOCH
+        ep_aware = cls.DT_EPOCH_AWARE
+        td_sec = cls._TD_SEC
+        return [(dt - (ep_aware if dt.tzinfo else ep)) // td_sec for dt in dts]
+
+    @classmethod
+    def dts_to_epoch_ms(cls, dts):
+        """
+        Batch dt_to_epoch_ms (millis, int). Aware datetimes are supported.
+        :param dts: iterable of datetime, or numpy datetime64 array
+        :type dts: list,tuple,numpy.ndarray
+        :return list of int (numpy int64 array for numpy input)
+        :rtype list,numpy.ndarray
+        """
+
+        np = cls._get_numpy_array(dts)
+        if np is not None:
+            return dts.astype("datetime64[ms]").astype(np.int64)
+
+        ep = cls.DT_EPOCH
+        ep_aware = cls.DT_EPOCH_AWARE
+        td_ms = cls._TD_MS
+        return [(dt - (ep_aware if dt.tzinfo else ep)) // td_ms for dt in dts]
+
+    @classmethod
+    def epochs_to_dt(cls, epochs):
+        """
+        Batch epoch_to_dt (seconds, float or int)
+        :param epochs: iterable of float,int, or numpy numeric array
+        :type epochs: list,tuple,array.array,numpy.ndarray
+        :return list of naive datetime (numpy datetime64[us] array for numpy input)
+        :rtype list,numpy.ndarray
+        """
+
+        np = cls._get_numpy_array(epochs)
+        if np is not None:
+            if epochs.dtype.kind in "iu":
+                return (epochs.astype(np.int64) * 1000000).astype("datetime64[us]")
+            return np.rint(epochs * 1000000.0).astype(np.int64).astype("datetime64[us]")
+
+        ep = cls.DT_EPOCH
+        return [ep + timedelta(seconds=e) for e in epochs]
+
+    @classmethod
+    def epochs_ms_to_dt(cls, epochs_ms):
+        """
+        Batch epoch_ms_to_dt (millis, float or int)
+        :param epochs_ms: iterable of float,int, or numpy numeric array
+        :type epochs_ms: list,tuple,array.array,numpy.ndarray
+        :return list of naive datetime (numpy datetime64[us] array for numpy input)
+        :rtype list,numpy.ndarray
+        """
+
+        np = cls._get_numpy_array(epochs_ms)
+        if np is not None:
+            if epochs_ms.dtype.kind in "iu":
+                return (epochs_ms.astype(np.int64) * 1000).astype("datetime64[us]")
+            return np.rint(epochs_ms * 1000.0).astype(np.int64).astype("datetime64[us]")
+
+        ep = cls.DT_EPOCH
+        return [ep + timedelta(milliseconds=e) for e in epochs_ms]
+
+    @classmethod
+    def dts_ensure_utc_aware(cls, dts):
+        """
+        Batch dt_ensure_utc_aware
+        :param dts: iterable of datetime
+        :type dts: list,tuple
+        :return list of aware datetime
+        :rtype list
+        """
+
+        f = cls.dt_ensure_utc_aware
+        return [f(dt) for dt in dts]
+
+    @classmethod
+    def dts_ensure_utc_naive(cls, dts):
+        """
+        Batch dt_ensure_utc_naive. Numpy datetime64 arrays are naive utc already and are returned as is.
+        :param dts: iterable of datetime, or numpy datetime64 array
+        :type dts: list,tuple,numpy.ndarray
+        :return list of naive datetime (same numpy array for numpy input)
+        :rtype list,numpy.ndarray
+        """
+
+        if cls._get_numpy_array(dts) is not None:
+            return dts
+
+        return [dt.replace(tzinfo=None) - dt.utcoffset() if dt.tzinfo else dt for dt in dts]
 
     # ===============================
     # COMPO NAME (FOR RSYSLOG)
@@ -285,7 +672,7 @@ class SolBase(object):
     # ===============================
 
     @classmethod
-    def extostr(cls, e, max_level=30, max_path_level=5):
+    def extostr(cls, e, max_level=30, max_path_level=5, fast=None):
         """
         Format an exception.
         :param e: Any exception instance.
@@ -294,10 +681,16 @@ class SolBase(object):
         :type max_level: int
         :param max_path_level: Maximum path level (default 5)
         :type max_path_level: int
+        :param fast: If True, use fast mode (same output, frames walked directly, no source lines lookup, cached frame rendering). If None, use set_extostr_fast setting.
+        :type fast: bool,None
         :return The exception readable string
         :rtype str
         """
 
+        # Fast mode
+        if fast or (fast is None and cls._extostr_fast):
+            return cls._extostr_fast_impl(e, max_level, max_path_level)
+
         # Go
         list_frame = None
         try:
@@ -385,6 +778,247 @@ class SolBase(object):
             if list_frame:
                 del list_frame
 
+    @classmethod
+    def set_extostr_fast(cls, b):
+        """
+        Set extostr default mode
+        :param b: If True, extostr uses fast mode by default
+        :type b: bool
+        """
+
+        cls._extostr_fast = b
+
+    @classmethod
+    def _extostr_fast_impl(cls, e, max_level, max_path_level):
+        """
+        Format an exception, fast mode (refer to extostr)
+        :param e: Any exception instance.
+        :type e: BaseException
+        :param max_level: Maximum call stack level
+        :type max_level: int
+        :param max_path_level: Maximum path level
+        :type max_path_level: int
+        :return The exception readable string
+        :rtype str
+        """
+
+        # To string
+        try:
+            ex_buf = str(e)
+        except UnicodeEncodeError:
+            ex_buf = repr(str(e))
+        ar = ["e.cls:[", e.__class__.__name__, "], e.bytes:[", ex_buf, "], e.cs=["]
+
+        # Traceback : (code, lineno), innermost first
+        ar_frame = list()
+        cur_tb = sys.exc_info()[2]
+        last_tb = None
+        while cur_tb:
+            ar_frame.append((cur_tb.tb_frame.f_code, cur_tb.tb_lineno))
+            last_tb = cur_tb
+            cur_tb = cur_tb.tb_next
+        ar_frame.reverse()
+
+        # Callers of the outermost traceback frame
+        if last_tb and len(ar_frame) < max_level:
+            cur_frame = last_tb.tb_frame
+            for _ in range(0, len(ar_frame)):
+                cur_frame = cur_frame.f_back if cur_frame else None
+            while cur_frame and len(ar_frame) < max_level:
+                ar_frame.append((cur_frame.f_code, cur_frame.f_lineno))
+                cur_frame = cur_frame.f_back
+
+        # Render
+        cls._extostr_render_frames(ar, ar_frame, max_level, max_path_level)
+        ar.append("]")
+        return "".join(ar)
+
+    @classmethod
+    def _extostr_render_frames(cls, ar, ar_frame, max_level, max_path_level):
+        """
+        Render frames as extostr does ("in:method#path@line ", "..." if max_level is reached), cached per (code, lineno, max_path_level)
+        :param ar: Output list (fragments are appended)
+        :type ar: list
+        :param ar_frame: list of (code, lineno)
+        :type ar_frame: list
+        :param max_level: Maximum call stack level
+        :type max_level: int
+        :param max_path_level: Maximum path level
+        :type max_path_level: int
+        """
+
+        d = cls._extostr_cache
+        for co, lineno in ar_frame[0:max_level]:
+            key = (co, lineno, max_path_level)
+            buf = d.get(key)
+            if buf is None:
+                cur_file = co.co_filename
+                ar_token = cur_file.rsplit(os.sep, max_path_level)
+                if len(ar_token) > max_path_level:
+                    ar_token.pop(0)
+                    cur_file = "..." + os.sep.join(ar_token)
+                buf = "in:{0}#{1}@{2} ".format(co.co_name, cur_file, lineno)
+                if len(d) >= cls.EXTOSTR_CACHE_MAX:
+                    d.clear()
+                d[key] = buf
+            ar.append(buf)
+        if len(ar_frame) >= max_level:
+            ar.append("...")
+
+    @classmethod
+    def frametostr(cls, frame, max_level=30, max_path_level=5):
+        """
+        Format a call stack, from a frame (innermost) toward its callers, extostr style ("in:method#path@line ...")
+        :param frame: Frame
+        :type frame: frame
+        :param max_level: Maximum call stack level (default 30)
+        :type max_level: int
+        :param max_path_level: Maximum path level (default 5)
+        :type max_path_level: int
+        :return str
+        :rtype str
+        """
+
+        ar_frame = list()
+        while frame and len(ar_frame) < max_level:
+            ar_frame.append((frame.f_code, frame.f_lineno))
+            frame = frame.f_back
+        ar = list()
+        cls._extostr_render_frames(ar, ar_frame, max_level, max_path_level)
+        return "".join(ar)
+
+    # ===============================
+    # BLOCKING CALLS
+    # ===============================
+
+    @classmethod
+    def run_blocking(cls, fn, *args, timeout=None, **kwargs):
+        """
+        Run a blocking call (not covered by gevent monkey patching) on the gevent hub native threadpool, waiting for it cooperatively.
+        Current context (refer to context_set) is propagated to the native thread.
+        Refer to pysolbase.BlockingRunner.BlockingRunner.
+        :param fn: Callable
+        :type fn: callable
+        :param args: Args
+        :param timeout: Max wait in seconds (None : no timeout). On timeout, an exception is raised (the native call is not interrupted).
+        :type timeout: float,None
+        :param kwargs: Keyword args
+        :return Callable result (exceptions are re-raised)
+        :rtype object
+        """
+
+        return BlockingRunner.run(fn, args, kwargs, timeout)
+
+    @classmethod
+    def run_blocking_set_pool_size(cls, pool_size):
+        """
+        Set run_blocking native threadpool size (gevent hub threadpool)
+        :param pool_size: Max native threads
+        :type pool_size: int
+        """
+
+        BlockingRunner.set_pool_size(pool_size)
+
+    @classmethod
+    def run_blocking_get_stats(cls):
+        """
+        Get run_blocking counters and latencies (queue wait, run)
+        :return dict
+        :rtype dict
+        """
+
+        return BlockingRunner.get_stats()
+
+    # ===============================
+    # HUB MONITOR
+    # ===============================
+
+    @classmethod
+    def hub_monitor_start(cls, block_ms=100, tick_ms=50):
+        """
+        Start the hub monitor (refer to pysolbase.HubMonitor.HubMonitor), from the hub thread.
+        It logs the stack of code blocking the hub for more than block_ms (logger "hubmonitor") and records loop lag every tick_ms.
+        If already started, it is restarted with provided settings.
+        :param block_ms: Blocking threshold in millis
+        :type block_ms: int
+        :param tick_ms: Loop lag measurement interval in millis
+        :type tick_ms: int
+        :return pysolbase.HubMonitor.HubMonitor
+        :rtype pysolbase.HubMonitor.HubMonitor
+        """
+
+        from pysolbase.HubMonitor import HubMonitor
+
+        cls.hub_monitor_stop()
+        m = HubMonitor(block_ms, tick_ms)
+        m.start()
+        cls._hub_monitor = m
+        return m
+
+    @classmethod
+    def hub_monitor_stop(cls):
+        """
+        Stop the hub monitor
+        """
+
+        m = cls._hub_monitor
+        cls._hub_monitor = None
+        if m:
+            m.stop()
+
+    @classmethod
+    def get_hub_monitor(cls):
+        """
+        Get the hub monitor
+        :return pysolbase.HubMonitor.HubMonitor,None
+        :rtype pysolbase.HubMonitor.HubMonitor,None
+        """
+
+        return cls._hub_monitor
+
+    # ===============================
+    # EXECUTOR
+    # ===============================
+
+    @classmethod
+    def greenlet_executor(cls, max_concurrency=64, max_queue=1024, overflow="block", name="executor"):
+        """
+        Get a bounded greenlet executor (refer to pysolbase.GreenletExecutor.GreenletExecutor)
+        :param max_concurrency: Max concurrent tasks
+        :type max_concurrency: int
+        :param max_queue: Max pending tasks
+        :type max_queue: int
+        :param overflow: Submit policy when queue is full ("block", "reject" : raise)
+        :type overflow: str
+        :param name: Name (logs)
+        :type name: str
+        :return pysolbase.GreenletExecutor.GreenletExecutor
+        :rtype pysolbase.GreenletExecutor.GreenletExecutor
+        """
+
+        from pysolbase.GreenletExecutor import GreenletExecutor
+
+        return GreenletExecutor(max_concurrency, max_queue, overflow, name)
+
+    # ===============================
+    # TIMER WHEEL
+    # ===============================
+
+    @classmethod
+    def get_timer_wheel(cls):
+        """
+        Get the shared timer wheel (refer to pysolbase.TimerWheel.TimerWheel), created on first call (10 ms tick).
+        Use it instead of spawn_later / loop timers when running lots of timers (per connection timeouts, periodic tasks).
+        :return pysolbase.TimerWheel.TimerWheel
+        :rtype pysolbase.TimerWheel.TimerWheel
+        """
+
+        if cls._timer_wheel is None:
+            from pysolbase.TimerWheel import TimerWheel
+
+            cls._timer_wheel = TimerWheel()
+        return cls._timer_wheel
+
     # ===============================
     # VOODOO INIT
     # ===============================
@@ -399,7 +1033,7 @@ class SolBase(object):
         cls._voodoo_initialized = False
 
     @classmethod
-    def voodoo_init(cls, aggressive=True, init_logging=True):
+    def voodoo_init(cls, aggressive=True, init_logging=True, threadpool_size=None, hub_monitor=False, hub_monitor_block_ms=100, hub_monitor_tick_ms=50):
         """
         Global initialization, to call asap.
         Apply gevent stuff & default logging configuration.
@@ -407,6 +1041,14 @@ class SolBase(object):
         :type aggressive: bool
         :param init_logging: If True, logging_init is called.
         :type init_logging: bool
+        :param threadpool_size: If set, gevent hub native threadpool size (used by run_blocking). Applied on first call only (refer to run_blocking_set_pool_size).
+        :type threadpool_size: int,None
+        :param hub_monitor: If True, start the hub monitor (refer to hub_monitor_start). Applied on first call only.
+        :type hub_monitor: bool
+        :param hub_monitor_block_ms: Hub monitor : blocking threshold in millis
+        :type hub_monitor_block_ms: int
+        :param hub_monitor_tick_ms: Hub monitor : loop lag measurement interval in millis
+        :type hub_monitor_tick_ms: int
         :return Nothing.
         """
 
@@ -431,6 +1073,16 @@ class SolBase(object):
                 # We disable this
                 config.track_greenlet_tree = False
 
+                # Native threadpool
+                if threadpool_size:
+                    lifecyclelogger.debug("Voodoo : threadpool : size=%s", threadpool_size)
+                    BlockingRunner.set_pool_size(threadpool_size)
+
+                # Hub monitor
+                if hub_monitor:
+                    lifecyclelogger.debug("Voodoo : hub monitor : block_ms=%s, tick_ms=%s", hub_monitor_block_ms, hub_monitor_tick_ms)
+                    cls.hub_monitor_start(hub_monitor_block_ms, hub_monitor_tick_ms)
+
                 # Initialize log level to INFO
                 if init_logging:
                     lifecyclelogger.debug("Voodoo : logging : entering")
@@ -459,7 +1111,29 @@ class SolBase(object):
                      log_to_syslog_facility=SysLogHandler.LOG_LOCAL0,
                      log_to_console=True,
                      log_to_file_mode="watched_file",
-                     context_filter=None):
+                     context_filter=None,
+                     log_queued=False,
+                     log_queued_size=10000,
+                     log_queued_overflow="drop_new",
+                     log_queued_drain="greenlet",
+                     log_to_syslog_format="legacy",
+                     log_to_syslog_address="/dev/log",
+                     log_to_syslog_socktype=socket.SOCK_DGRAM,
+                     log_to_syslog_batch_records=0,
+                     log_to_syslog_batch_ms=50,
+                     log_to_syslog_spool_file=None,
+                     log_to_syslog_spool_max_bytes=64 * 1024 * 1024,
+                     log_format="text",
+                     log_rate_limit_filter=None,
+                     log_profile="default",
+                     log_to_file_buffer_bytes=64 * 1024,
+                     log_to_file_flush_ms=1000,
+                     log_to_file_check_ms=1000,
+                     log_to_file_max_bytes=100 * 1024 * 1024,
+                     log_to_file_interval_sec=86400,
+                     log_to_file_backup_count=7,
+                     log_to_file_compress="gz",
+                     log_time_mode="default"):
         """
         Initialize logging sub system with default settings (console, pre-formatted output)
         :param log_to_console: if True to console
@@ -474,11 +1148,55 @@ class SolBase(object):
         :type log_to_syslog: bool
         :param log_to_syslog_facility: Syslog facility.
         :type log_to_syslog_facility: int
-        :param log_to_file_mode: str "watched_file" for WatchedFileHandler, "time_file" for TimedRotatingFileHandler (or time_file_seconds for unittest)
+        :param log_to_file_mode: str "watched_file" for WatchedFileHandler, "time_file" for TimedRotatingFileHandler (or time_file_seconds for unittest), "buffered_file" for pysolbase.BufferedFileHandler.BufferedFileHandler, "size_file" for pysolbase.CompressedRotatingFileHandler.CompressedRotatingFileHandler
         :type log_to_file_mode: str
         :param log_callback: Callback for unittest
         :param context_filter: Context filter. If None, pysolbase.ContextFilter.ContextFilter is used. If used instance has an attr "filter", it is added to all handlers and "%(kfilter)s" will be populated by all thread context key/values, using filter method call. Refer to our ContextFilter default implementation for details.
         :type context_filter: None,object
+        :param log_queued: If True, handlers are moved behind a pysolbase.QueuedHandler.QueuedHandler (caller only enqueue records, a drainer forwards them to handlers)
+        :type log_queued: bool
+        :param log_queued_size: Queued mode : max records in queue
+        :type log_queued_size: int
+        :param log_queued_overflow: Queued mode : overflow policy ("block", "drop_oldest", "drop_new")
+        :type log_queued_overflow: str
+        :param log_queued_drain: Queued mode : drain mode ("greenlet", "thread")
+        :type log_queued_drain: str
+        :param log_to_syslog_format: Syslog framing format ("legacy", "rfc5424")
+        :type log_to_syslog_format: str
+        :param log_to_syslog_address: Syslog address, tuple ('ip', port) or string (unix socket path)
+        :type log_to_syslog_address: str,tuple
+        :param log_to_syslog_socktype: Syslog socket type (SOCK_DGRAM, or SOCK_STREAM for rfc6587 octet-counting over a persistent connection)
+        :type log_to_syslog_socktype: socket.SocketKind
+        :param log_to_syslog_batch_records: Syslog datagram batching : if > 0, records are batched (up to this count) and sent off the emitting path
+        :type log_to_syslog_batch_records: int
+        :param log_to_syslog_batch_ms: Syslog datagram batching : max millis a record can wait in batch
+        :type log_to_syslog_batch_ms: int
+        :param log_to_syslog_spool_file: Syslog spill mode : if set, records are spooled to this file while syslog is unreachable, then replayed
+        :type log_to_syslog_spool_file: str,None
+        :param log_to_syslog_spool_max_bytes: Syslog spill mode : max spool file size
+        :type log_to_syslog_spool_max_bytes: int
+        :param log_format: "text" (pipe separated, default) or "json" (one json object per record, context keys as top-level fields, epoch millis timestamps), refer to pysolbase.JsonFormatter.JsonFormatter
+        :type log_format: str
+        :param log_rate_limit_filter: Rate limit filter (refer to pysolbase.RateLimitFilter.RateLimitFilter). If set, it is added to all handlers, ahead of the context filter.
+        :type log_rate_limit_filter: None,pysolbase.RateLimitFilter.RateLimitFilter
+        :param log_profile: "default", or "lean" (no caller lookup, no thread/process collection, slim format "asctime | levelname | name | message |kfilter"). Refer to logging_profile_bench.
+        :type log_profile: str
+        :param log_to_file_buffer_bytes: "buffered_file" mode : max buffered size before flush
+        :type log_to_file_buffer_bytes: int
+        :param log_to_file_flush_ms: "buffered_file" mode : max millis a record stays in buffer
+        :type log_to_file_flush_ms: int
+        :param log_to_file_check_ms: "buffered_file" mode : min millis between two rotation checks
+        :type log_to_file_check_ms: int
+        :param log_to_file_max_bytes: "size_file" mode : max file size before rollover
+        :type log_to_file_max_bytes: int
+        :param log_to_file_interval_sec: "size_file" mode : rollover interval in seconds, utc aligned (0 to disable)
+        :type log_to_file_interval_sec: int
+        :param log_to_file_backup_count: "size_file" mode : rotated files to keep
+        :type log_to_file_backup_count: int
+        :param log_to_file_compress: "size_file" mode : rotated files compression (None, "gz", "xz")
+        :type log_to_file_compress: str,None
+        :param log_time_mode: "text" format : timestamp rendering, cached per second ("default" : local "2024-02-29 13:34:56,789", "local_iso", "utc_iso", "epoch_ms"), refer to pysolbase.CachedTimeFormatter.CachedTimeFormatter
+        :type log_time_mode: str
         :return Nothing.
         """
 
@@ -492,6 +1210,9 @@ class SolBase(object):
             # Reset
             cls._reset_logging(log_level=log_level)
 
+            # Profile
+            cls._logging_apply_profile(log_profile)
+
             # Default
             logging.basicConfig(level=log_level)
 
@@ -501,20 +1222,36 @@ class SolBase(object):
             else:
                 c_filter = ContextFilter()
 
-            # Format begin
-            s_f = "%(asctime)s | %(levelname)s | %(module)s@%(funcName)s@%(lineno)d | %(message)s "
+            if log_format == "json":
+                # Formatter (context keys are pushed by the filter as "kdict")
+                from pysolbase.JsonFormatter import JsonFormatter
 
-            # Browse
-            if hasattr(c_filter, "filter"):
-                # Push generic field
-                # We expect it to be formatted like our pysolbase.ContextFilter.ContextFilter#filter method.
-                s_f += "|%(kfilter)s"
+                f = JsonFormatter(with_caller=log_profile != "lean", with_thread=log_profile != "lean")
+            else:
+                if log_format != "text":
+                    logger.warning("Invalid log_format=%s, fallback text", log_format)
 
-            # Format end
-            s_f += "| %(thread)d:%(threadName)s | %(process)d:%(processName)s"
+                # Format begin
+                if log_profile == "lean":
+                    s_f = "%(asctime)s | %(levelname)s | %(name)s | %(message)s "
+                else:
+                    s_f = "%(asctime)s | %(levelname)s | %(module)s@%(funcName)s@%(lineno)d | %(message)s "
 
-            # Formatter
-            f = logging.Formatter(s_f)
+                # Browse
+                if hasattr(c_filter, "filter"):
+                    # Push generic field
+                    # We expect it to be formatted like our pysolbase.ContextFilter.ContextFilter#filter method.
+                    s_f += "|%(kfilter)s"
+
+                # Format end
+                if log_profile != "lean":
+                    s_f += "| %(thread)d:%(threadName)s | %(process)d:%(processName)s"
+
+                # Formatter
+                if log_time_mode not in CachedTimeFormatter.TIME_MODES:
+                    logger.warning("Invalid log_time_mode=%s, fallback default", log_time_mode)
+                    log_time_mode = "default"
+                f = CachedTimeFormatter(s_f, time_mode=log_time_mode)
 
             # Console handler
             c = None
@@ -540,6 +1277,19 @@ class SolBase(object):
                     cf = TimedRotatingFileHandler(log_to_file, encoding="utf-8", utc=True, when="S", interval=1, backupCount=7)
                     cf.setLevel(logging.getLevelName(log_level))
                     cf.setFormatter(f)
+                elif log_to_file_mode == "buffered_file":
+                    from pysolbase.BufferedFileHandler import BufferedFileHandler
+
+                    cf = BufferedFileHandler(log_to_file, encoding="utf-8", buffer_bytes=log_to_file_buffer_bytes, flush_ms=log_to_file_flush_ms, check_ms=log_to_file_check_ms)
+                    cf.setLevel(logging.getLevelName(log_level))
+                    cf.setFormatter(f)
+                elif log_to_file_mode == "size_file":
+                    from pysolbase.CompressedRotatingFileHandler import CompressedRotatingFileHandler
+
+                    cf = CompressedRotatingFileHandler(log_to_file, encoding="utf-8", max_bytes=log_to_file_max_bytes, interval_sec=log_to_file_interval_sec,
+                                                       backup_count=log_to_file_backup_count, compress=log_to_file_compress)
+                    cf.setLevel(logging.getLevelName(log_level))
+                    cf.setFormatter(f)
                 else:
                     logger.warning("Invalid log_to_file_mode=%s", log_to_file_mode)
 
@@ -549,7 +1299,10 @@ class SolBase(object):
                 try:
                     from pysolbase.SysLogger import SysLogger
 
-                    syslog = SysLogger(log_callback=log_callback, facility=log_to_syslog_facility)
+                    syslog = SysLogger(address=log_to_syslog_address, socktype=log_to_syslog_socktype,
+                                       log_callback=log_callback, facility=log_to_syslog_facility, frame_format=log_to_syslog_format,
+                                       batch_max_records=log_to_syslog_batch_records, batch_max_ms=log_to_syslog_batch_ms,
+                                       spool_file=log_to_syslog_spool_file, spool_max_bytes=log_to_syslog_spool_max_bytes)
                     syslog.setLevel(logging.getLevelName(log_level))
                     syslog.setFormatter(f)
                 except Exception as e:
@@ -561,22 +1314,107 @@ class SolBase(object):
             root = logging.getLogger()
             root.setLevel(logging.getLevelName(log_level))
             root.handlers = []
+            ar_handler = list()
             if log_to_console:
-                c.addFilter(c_filter)
-                root.addHandler(c)
+                ar_handler.append(c)
             if log_to_file and cf:
-                cf.addFilter(c_filter)
-                root.addHandler(cf)
+                ar_handler.append(cf)
             if log_to_syslog and syslog:
-                syslog.addFilter(c_filter)
-                root.addHandler(syslog)
+                ar_handler.append(syslog)
+
+            if log_queued:
+                # Context filter must be evaluated on caller side (context is greenlet local), so it goes on the queue
+                from pysolbase.QueuedHandler import QueuedHandler
+
+                q = QueuedHandler(ar_handler, queue_size=log_queued_size, overflow=log_queued_overflow, drain_mode=log_queued_drain)
+                q.setLevel(logging.getLevelName(log_level))
+                if log_rate_limit_filter:
+                    log_rate_limit_filter.start()
+                    q.addFilter(log_rate_limit_filter)
+                q.addFilter(c_filter)
+                root.addHandler(q)
+            else:
+                if log_rate_limit_filter:
+                    log_rate_limit_filter.start()
+                for h in ar_handler:
+                    if log_rate_limit_filter:
+                        h.addFilter(log_rate_limit_filter)
+                    h.addFilter(c_filter)
+                    root.addHandler(h)
 
             # Done
             cls._logging_initialized = True
             if force_reset:
-                lifecyclelogger.info("Logging : initialized from memory, log_level=%s, force_reset=%s", log_level, force_reset)
+                lifecyclelogger.info("Logging : initialized from memory, log_level=%s, force_reset=%s, log_queued=%s, log_format=%s, log_profile=%s", log_level, force_reset, log_queued, log_format, log_profile)
             else:
-                lifecyclelogger.debug("Logging : initialized from memory, log_level=%s, force_reset=%s", log_level, force_reset)
+                lifecyclelogger.debug("Logging : initialized from memory, log_level=%s, force_reset=%s, log_queued=%s, log_format=%s, log_profile=%s", log_level, force_reset, log_queued, log_format, log_profile)
+
+    @classmethod
+    def _logging_apply_profile(cls, log_profile):
+        """
+        Apply logging profile (process wide).
+        "lean" saves the logging module settings it overrides, "default" only restores them (settings done by the application are kept).
+        :param log_profile: "default" or "lean"
+        :type log_profile: str
+        """
+
+        if log_profile == "lean":
+            from pysolbase.LeanLogRecord import LeanLogRecord
+
+            # Save
+            if cls._logging_profile_saved is None:
+                cls._logging_profile_saved = (logging._srcfile, logging.logThreads, logging.logProcesses, logging.logMultiprocessing, logging.getLogRecordFactory())
+
+            # No caller lookup (stack walk), no thread / process collection
+            logging._srcfile = None
+            logging.logThreads = False
+            logging.logProcesses = False
+            logging.logMultiprocessing = False
+            logging.setLogRecordFactory(LeanLogRecord)
+        else:
+            if log_profile != "default":
+                logger.warning("Invalid log_profile=%s, fallback default", log_profile)
+                log_profile = "default"
+
+            # Restore (if lean was applied)
+            if cls._logging_profile_saved is not None:
+                logging._srcfile, logging.logThreads, logging.logProcesses, logging.logMultiprocessing, factory = cls._logging_profile_saved
+                logging.setLogRecordFactory(factory)
+                cls._logging_profile_saved = None
+
+        cls._logging_profile = log_profile
+
+    @classmethod
+    def logging_profile_bench(cls, count=20000):
+        """
+        Measure the per record cost (record creation, caller lookup, thread/process collection) of "default" and "lean" profiles.
+        Handlers & formatting are not included (they depend on the configuration).
+        Current profile is restored.
+        :param count: Records per profile
+        :type count: int
+        :return dict : "default_ns", "lean_ns" (per record), "saved_ns" (per record), "saved_pct"
+        :rtype dict
+        """
+
+        # Unmanaged logger (not registered, not propagated)
+        lo = logging.Logger("pysolbase.bench", logging.DEBUG)
+        lo.addHandler(logging.NullHandler())
+
+        cur_profile = cls._logging_profile
+        d = dict()
+        try:
+            for profile in ["default", "lean"]:
+                cls._logging_apply_profile(profile)
+                ns = time.perf_counter()
+                for i in range(0, count):
+                    lo.info("bench %s", i)
+                d[profile + "_ns"] = int((time.perf_counter() - ns) * 1000000000.0 / count)
+        finally:
+            cls._logging_apply_profile(cur_profile)
+
+        d["saved_ns"] = d["default_ns"] - d["lean_ns"]
+        d["saved_pct"] = round(100.0 * d["saved_ns"] / d["default_ns"], 1) if d["default_ns"] > 0 else 0.0
+        return d
 
     @classmethod
     def _register_filter(cls, c_filter):
@@ -613,11 +1451,7 @@ class SolBase(object):
         root = logging.getLogger()
         root.setLevel(logging.getLevelName(log_level))
         for h in root.handlers:
-            # noinspection PyBroadException
-            try:
-                h.close()
-            except:
-                pass
+            cls._close_handler(h)
         root.handlers = []
 
         # Browse all loggers and set
@@ -625,15 +1459,30 @@ class SolBase(object):
             cur_logger = logging.getLogger(name)
             cur_logger.setLevel(logging.getLevelName(log_level))
             for h in cur_logger.handlers:
-                # noinspection PyBroadException
-                try:
-                    h.close()
-                except:
-                    pass
+                cls._close_handler(h)
             cur_logger.handlers = []
 
     @classmethod
-    def logging_initfromfile(cls, config_file_name, force_reset=False, context_filter=None):
+    def _close_handler(cls, h):
+        """
+        Close a handler, and its rate limit filters (their summary task is cancelled)
+        :param h: logging.Handler
+        :type h: logging.Handler
+        """
+
+        from pysolbase.RateLimitFilter import RateLimitFilter
+
+        # noinspection PyBroadException
+        try:
+            for f in h.filters:
+                if isinstance(f, RateLimitFilter):
+                    f.close()
+            h.close()
+        except:
+            pass
+
+    @classmethod
+    def logging_initfromfile(cls, config_file_name, force_reset=False, context_filter=None, rate_limit_filter=None):
         """
         Initialize logging system from a configuration file, with optional reset.
         :param config_file_name: Configuration file name
@@ -642,6 +1491,8 @@ class SolBase(object):
         :type force_reset: bool
         :param context_filter: Context filter. If None, pysolbase.ContextFilter.ContextFilter is used. If used instance has an attr "filter", it is added to all handlers and "%(kfilter)s" will be populated by all thread context key/values, using filter method call. Refer to our ContextFilter default implementation for details.
         :type context_filter: None,object
+        :param rate_limit_filter: Rate limit filter (refer to pysolbase.RateLimitFilter.RateLimitFilter). If set, it is registered across the whole logging, ahead of the context filter.
+        :type rate_limit_filter: None,pysolbase.RateLimitFilter.RateLimitFilter
         :return Nothing.
         """
 
@@ -662,13 +1513,19 @@ class SolBase(object):
                 # Reset
                 cls._reset_logging(log_level="INFO")
 
+                # Configuration files may rely on caller / thread / process fields
+                cls._logging_apply_profile("default")
+
                 # Load
                 logger.debug("Logging : yaml config_file_name=%s", config_file_name)
                 with open(config_file_name, 'r') as f:
                     d = load(f, Loader=SafeLoader)
                     dictConfig(d)
 
-                # Register filter
+                # Register filters
+                if rate_limit_filter:
+                    rate_limit_filter.start()
+                    cls._register_filter(rate_limit_filter)
                 if c_filter:
                     cls._register_filter(c_filter)
 
@@ -719,6 +1576,31 @@ class SolBase(object):
         logger.debug("Switching _masterProcess to %s", b)
         cls._master_process = b
 
+    @classmethod
+    def prefork_manager(cls, target, worker_count=None, cpu_affinity=False, respawn_backoff_ms=100, respawn_backoff_max_ms=30000, stop_timeout_ms=10000):
+        """
+        Get a pre-fork worker manager (refer to pysolbase.PreForkManager.PreForkManager).
+        Each worker runs target(worker_idx), with get_master_process() returning False.
+        :param target: Worker callable, target(worker_idx)
+        :type target: callable
+        :param worker_count: Worker count (None : effective cpu count)
+        :type worker_count: int,None
+        :param cpu_affinity: If True, pin each worker on a cpu (if supported)
+        :type cpu_affinity: bool
+        :param respawn_backoff_ms: Initial respawn delay (doubled on each consecutive fast death)
+        :type respawn_backoff_ms: int
+        :param respawn_backoff_max_ms: Max respawn delay
+        :type respawn_backoff_max_ms: int
+        :param stop_timeout_ms: Stop : delay between SIGTERM and SIGKILL
+        :type stop_timeout_ms: int
+        :return pysolbase.PreForkManager.PreForkManager
+        :rtype pysolbase.PreForkManager.PreForkManager
+        """
+
+        from pysolbase.PreForkManager import PreForkManager
+
+        return PreForkManager(target, worker_count, cpu_affinity, respawn_backoff_ms, respawn_backoff_max_ms, stop_timeout_ms)
+
     # ===============================
     # BINARY STUFF
     # ===============================
@@ -0,0 +1,215 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import os
+import shutil
+import struct
+import sys
+
+
+class SpoolFile(object):
+    """
+    Append-only spool file of binary records, used to spill records while a sink is unreachable.
+    Each record is stored as a 4 bytes big-endian length followed by the record bytes.
+    Records are read back in bounded chunks : peek reads from the current read offset, consume advances it once records are delivered.
+    The file is truncated once fully consumed, and compacted (unread tail moved to the head) when the consumed head exceeds half of max_bytes.
+    A file left by a previous process is re-used (its records are kept, consumed ones are dropped on close, but replayed again after a crash).
+    CAUTION : a spool file must not be shared across processes.
+    """
+
+    HEADER = struct.Struct(">I")
+
+    def __init__(self, file_name, max_bytes=64 * 1024 * 1024):
+        """
+        Init
+        :param file_name: Spool file name
+        :type file_name: str
+        :param max_bytes: Max spool file size, records are dropped above
+        :type max_bytes: int
+        """
+
+        self._file_name = file_name
+        self._max_bytes = max_bytes
+
+        # Counters
+        self._count_append = 0
+        self._count_dropped = 0
+        self._count_compact = 0
+
+        # Open (append, binary)
+        self._fd = open(file_name, "ab")
+        self._size = self._fd.tell()
+
+        # Read offset (consumed bytes)
+        self._offset = 0
+
+    def get_size(self):
+        """
+        Get current spool size in bytes (not consumed)
+        :return int
+        :rtype int
+        """
+
+        return self._size - self._offset
+
+    def get_stats(self):
+        """
+        Get counters
+        :return dict
+        :rtype dict
+        """
+
+        return {
+            "append": self._count_append,
+            "dropped": self._count_dropped,
+            "compact": self._count_compact,
+            "size": self._size - self._offset,
+        }
+
+    def append(self, buf):
+        """
+        Append a record
+        :param buf: Record
+        :type buf: bytes
+        :return True if spooled, False if dropped (max size reached)
+        :rtype bool
+        """
+
+        size = self.HEADER.size + len(buf)
+        if self._size + size > self._max_bytes:
+            self._count_dropped += 1
+            return False
+
+        self._fd.write(self.HEADER.pack(len(buf)) + buf)
+        self._fd.flush()
+        self._size += size
+        self._count_append += 1
+        return True
+
+    def peek(self, max_bytes=256 * 1024, max_records=0):
+        """
+        Read records from the read offset, without consuming them (at least one record is returned if the spool is not empty)
+        :param max_bytes: Max bytes to read
+        :type max_bytes: int
+        :param max_records: Max records to read (0 : no limit)
+        :type max_records: int
+        :return list of bytes
+        :rtype list
+        """
+
+        ar = list()
+        if self._offset >= self._size:
+            return ar
+
+        h_size = self.HEADER.size
+        total = 0
+        with open(self._file_name, "rb") as f:
+            f.seek(self._offset)
+            while self._offset + total < self._size:
+                h = f.read(h_size)
+                if len(h) < h_size:
+                    break
+                size = self.HEADER.unpack(h)[0]
+                buf = f.read(size)
+                if len(buf) < size:
+                    break
+                ar.append(buf)
+                total += h_size + size
+                if total >= max_bytes or 0 < max_records <= len(ar):
+                    return ar
+
+        if self._offset + total < self._size and not ar:
+            # Partial record at head (crash while writing), skip the remaining (we are used by log handlers : no logger here)
+            sys.stderr.write("SpoolFile : partial record skipped, file_name=%s\n" % self._file_name)
+            self._truncate()
+        return ar
+
+    def consume(self, ar):
+        """
+        Consume records returned by peek (all of them, or a head part)
+        :param ar: Delivered records
+        :type ar: list
+        """
+
+        self._offset += sum(self.HEADER.size + len(buf) for buf in ar)
+        if self._offset >= self._size:
+            self._truncate()
+        elif self._offset >= self._max_bytes // 2:
+            self._compact()
+
+    def pop_all(self):
+        """
+        Read all records and truncate the spool
+        :return list of bytes
+        :rtype list
+        """
+
+        ar = self.peek(max_bytes=self._size)
+        self.consume(ar)
+        return ar
+
+    def _truncate(self):
+        """
+        Truncate (everything consumed)
+        """
+
+        self._fd.truncate(0)
+        self._size = 0
+        self._offset = 0
+
+    def _compact(self):
+        """
+        Move the unread tail to the file head (temporary file renamed)
+        """
+
+        tmp = self._file_name + ".tmp"
+        with open(self._file_name, "rb") as f_in:
+            f_in.seek(self._offset)
+            with open(tmp, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        self._fd.close()
+        os.rename(tmp, self._file_name)
+        self._fd = open(self._file_name, "ab")
+        self._size = self._fd.tell()
+        self._offset = 0
+        self._count_compact += 1
+
+    def close(self):
+        """
+        Close (records not consumed are kept on disk)
+        """
+
+        if self._fd:
+            if self._offset > 0:
+                self._compact()
+            self._fd.close()
+            self._fd = None
+
+    def remove(self):
+        """
+        Close and remove the spool file
+        """
+
+        self.close()
+        if os.path.exists(self._file_name):
+            os.remove(self._file_name)
@@ -0,0 +1,157 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import time
+
+_monotonic_ns = time.monotonic_ns
+
+
+class Stopwatch(object):
+    """
+    Monotonic stopwatch, nanosecond based (integer timestamps, not affected by wall clock steps).
+    - start : (re)start
+    - lap : ns since previous lap (or start), starts a new lap
+    - split : ns since start (does not start a new lap)
+    - stop : freeze elapsed time
+    - elapsed_ns, elapsed_ms : elapsed time (up to now if running, up to stop otherwise)
+    Until started, stop, lap, split and elapsed return 0.
+    Can be used as a context manager (stopped on exit).
+    """
+
+    __slots__ = ("_ns_start", "_ns_lap", "_ns_stop")
+
+    def __init__(self, start=True):
+        """
+        Init
+        :param start: If True, start now
+        :type start: bool
+        """
+
+        self._ns_start = 0
+        self._ns_lap = 0
+        self._ns_stop = 0
+        if start:
+            self.start()
+
+    def start(self):
+        """
+        Start (or restart)
+        :return self
+        :rtype Stopwatch
+        """
+
+        self._ns_start = self._ns_lap = _monotonic_ns()
+        self._ns_stop = 0
+        return self
+
+    def stop(self):
+        """
+        Stop
+        :return elapsed nanos
+        :rtype int
+        """
+
+        if self._ns_start == 0:
+            return 0
+        elif self._ns_stop == 0:
+            self._ns_stop = _monotonic_ns()
+        return self._ns_stop - self._ns_start
+
+    def is_running(self):
+        """
+        Return True if running
+        :return bool
+        :rtype bool
+        """
+
+        return self._ns_start != 0 and self._ns_stop == 0
+
+    def lap(self):
+        """
+        Get nanos since previous lap (or start) and start a new lap
+        :return int
+        :rtype int
+        """
+
+        if self._ns_start == 0:
+            return 0
+        ns = self._ns_stop or _monotonic_ns()
+        v = ns - self._ns_lap
+        self._ns_lap = ns
+        return v
+
+    def split(self):
+        """
+        Get nanos since start (same as elapsed_ns)
+        :return int
+        :rtype int
+        """
+
+        return self.elapsed_ns()
+
+    def elapsed_ns(self):
+        """
+        Get elapsed nanos
+        :return int
+        :rtype int
+        """
+
+        if self._ns_start == 0:
+            return 0
+        return (self._ns_stop or _monotonic_ns()) - self._ns_start
+
+    def elapsed_ms(self):
+        """
+        Get elapsed millis
+        :return float
+        :rtype float
+        """
+
+        if self._ns_start == 0:
+            return 0.0
+        return ((self._ns_stop or _monotonic_ns()) - self._ns_start) / 1000000.0
+
+    def __enter__(self):
+        """
+        Enter (start)
+        :return self
+        :rtype Stopwatch
+        """
+
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Exit (stop)
+        """
+
+        self.stop()
+
+    def __repr__(self):
+        """
+        Repr
+        :return str
+        :rtype str
+        """
+
+        return "Stopwatch(running=%s, elapsed_ms=%.3f)" % (self.is_running(), self.elapsed_ms())
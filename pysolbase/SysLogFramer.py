@@ -0,0 +1,169 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import os
+import time
+from logging.handlers import SysLogHandler
+
+from pysolbase.SolBase import SolBase
+
+
+class SysLogFramer(object):
+    """
+    Syslog framing.
+    Headers (machine name, component name, pid) and priorities are encoded once and re-used for all records.
+    Headers are rebuilt when the component name changes (SolBase.set_compo_name) or after a fork.
+
+    Formats :
+    - "legacy" : <PRI>compo: machine | compo | message\\0 (trailing \\0 is omitted if nul_terminated is False)
+    - "rfc5424" : <PRI>1 TIMESTAMP machine compo pid - - message
+    """
+
+    FORMAT_LEGACY = "legacy"
+    FORMAT_RFC5424 = "rfc5424"
+
+    # Bumped after fork (pid changes)
+    _generation = 0
+
+    def __init__(self, facility=SysLogHandler.LOG_LOCAL1, frame_format=FORMAT_LEGACY, nul_terminated=True):
+        """
+        Init
+        :param facility: Syslog facility
+        :type facility: int
+        :param frame_format: Format ("legacy", "rfc5424")
+        :type frame_format: str
+        :param nul_terminated: Legacy format only : if True, append a trailing \\0
+        :type nul_terminated: bool
+        """
+
+        if frame_format not in (self.FORMAT_LEGACY, self.FORMAT_RFC5424):
+            raise Exception("Invalid frame_format=%s" % frame_format)
+
+        self._facility = facility
+        self._frame_format = frame_format
+        self._trailer = b"\000" if nul_terminated else b""
+
+        # Priorities, per level name
+        self._d_priority = dict()
+
+        # Headers
+        self._compo_name = None
+        self._generation_cur = -1
+        self._machine_name = SolBase.get_machine_name()
+        self._header = None
+
+        # Rfc5424 timestamp cache (per second)
+        self._ts_sec = None
+        self._ts_prefix = None
+
+    @classmethod
+    def _on_fork(cls):
+        """
+        After fork (child)
+        """
+
+        cls._generation += 1
+
+    def get_frame_format(self):
+        """
+        Get frame format
+        :return str
+        :rtype str
+        """
+
+        return self._frame_format
+
+    def get_priority(self, levelname):
+        """
+        Get encoded priority for a level name ie b"<134>"
+        :param levelname: str
+        :type levelname: str
+        :return bytes
+        :rtype bytes
+        """
+
+        pri = self._d_priority.get(levelname)
+        if pri is None:
+            i = (self._facility << 3) | SysLogHandler.priority_names[SysLogHandler.priority_map.get(levelname, "warning")]
+            pri = ("<%d>" % i).encode("utf-8")
+            self._d_priority[levelname] = pri
+        return pri
+
+    def get_header(self):
+        """
+        Get encoded header (rebuilt if component name changed or after fork)
+        :return bytes
+        :rtype bytes
+        """
+
+        cn = SolBase.get_compo_name()
+        if self._header is None or cn is not self._compo_name or self._generation_cur != SysLogFramer._generation:
+            self._compo_name = cn
+            self._generation_cur = SysLogFramer._generation
+            if self._frame_format == self.FORMAT_LEGACY:
+                s = u"{1}: {0} | {1} | ".format(self._machine_name, cn)
+            else:
+                # Rfc5424 : HOSTNAME APP-NAME PROCID MSGID STRUCTURED-DATA (no spaces allowed in fields)
+                s = u" {0} {1} {2} - - ".format(self._machine_name.replace(" ", "_") or "-", cn.replace(" ", "_") or "-", os.getpid())
+            self._header = s.encode("utf-8")
+        return self._header
+
+    def _get_timestamp(self, created):
+        """
+        Get rfc5424 timestamp (bytes), utc, millis precision
+        :param created: float
+        :type created: float
+        :return bytes
+        :rtype bytes
+        """
+
+        sec = int(created)
+        if sec != self._ts_sec:
+            self._ts_prefix = time.strftime("1 %Y-%m-%dT%H:%M:%S", time.gmtime(sec)).encode("ascii")
+            self._ts_sec = sec
+        return b"%s.%03dZ" % (self._ts_prefix, int((created - sec) * 1000))
+
+    def frame(self, levelname, msg, created=None):
+        """
+        Frame a formatted message
+        :param levelname: Level name
+        :type levelname: str
+        :param msg: Formatted message
+        :type msg: str
+        :param created: Record creation time (epoch seconds), rfc5424 only (current time if None)
+        :type created: float,None
+        :return bytes
+        :rtype bytes
+        """
+
+        if self._frame_format == self.FORMAT_LEGACY:
+            return b"".join((self.get_priority(levelname), self.get_header(), msg.encode("utf-8"), self._trailer))
+        else:
+            if created is None:
+                created = time.time()
+            return b"".join((self.get_priority(levelname), self._get_timestamp(created), self.get_header(), msg.encode("utf-8")))
+
+
+# Pid changes after fork
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=SysLogFramer._on_fork)
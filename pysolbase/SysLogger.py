@@ -22,22 +22,53 @@
 # ===============================================================================
 """
 
+import logging
+import os
+import sys
+import weakref
 from logging.handlers import SysLogHandler
 import socket
 
+import gevent
 from gevent import GreenletExit
+from gevent.event import Event
 
 from pysolbase.SolBase import SolBase
+from pysolbase.SysLogFramer import SysLogFramer
 
 
 # noinspection PyPep8
 class SysLogger(SysLogHandler):
     """
     Sys log handler (will format and emit logs toward rsyslog)
+
+    Datagram mode (default, socktype=SOCK_DGRAM) : one datagram per record.
+    If batch_max_records > 0, datagrams are collected (up to batch_max_records or batch_max_ms) and sent by
+    a flusher greenlet, in a tight loop, off the emitting path. A full batch wakes up the flusher immediately (on next context switch)
+    instead of waiting for batch_max_ms. An ERROR (and above) record sends the batch inline (not lost on crash or os._exit).
+
+    Stream mode (socktype=SOCK_STREAM, tcp or unix stream) :
+    - records are framed using rfc6587 octet-counting ("LEN MSG")
+    - one persistent connection per process (the inherited connection is closed in child processes after fork, and re-opened on demand)
+    - connect and send are bounded by stream_timeout_ms
+    - reconnect using a capped exponential backoff (records are kept in a bounded pending buffer meanwhile, dropped above and counted)
+    - emit only appends to the pending buffer, a sender greenlet (woken up by an event) connects and sends : logging greenlets never wait for the sink
+    - records pushed while a send is in progress are coalesced and sent in a single sendall
+
+    Spill mode (spool_file set, both datagram and stream modes) :
+    - while the sink is unreachable, records are appended to a local spool file (refer to pysolbase.SpoolFile.SpoolFile)
+    - the sink is probed using the reconnect backoff schedule (no reconnect attempt per record), with the oldest spooled record (datagram) or a connect (stream)
+    - once the sink is back, spooled records are replayed in bounded chunks by a replay greenlet, before newer records (which are spooled meanwhile)
     """
 
+    # Stream mode instances (inherited connection closed after fork)
+    _stream_instances = weakref.WeakSet()
+
     def __init__(self, address="/dev/log", facility=SysLogHandler.LOG_LOCAL1, socktype=socket.SOCK_DGRAM,
-                 log_callback=None):
+                 log_callback=None, frame_format=SysLogFramer.FORMAT_LEGACY,
+                 reconnect_min_ms=100, reconnect_max_ms=30000, stream_max_pending_bytes=4 * 1024 * 1024,
+                 batch_max_records=0, batch_max_ms=50,
+                 spool_file=None, spool_max_bytes=64 * 1024 * 1024, stream_timeout_ms=5000):
         """
         Init
         :param address: tuple ('ip', port) or string "target"
@@ -47,6 +78,24 @@ class SysLogger(SysLogHandler):
         :param socktype: Type of socket
         :type socktype: socket.SocketKind
         :param log_callback: Callback for unit test
+        :param frame_format: Framing format ("legacy" or "rfc5424"), refer to pysolbase.SysLogFramer.SysLogFramer
+        :type frame_format: str
+        :param reconnect_min_ms: Initial reconnect backoff in millis (stream mode, spill mode probes)
+        :type reconnect_min_ms: int
+        :param reconnect_max_ms: Max reconnect backoff in millis (stream mode, spill mode probes)
+        :type reconnect_max_ms: int
+        :param stream_max_pending_bytes: Stream mode : max pending bytes (not yet sent), newer records are spooled (spill mode) or dropped above
+        :type stream_max_pending_bytes: int
+        :param batch_max_records: Datagram mode : if > 0, enable batching, with up to batch_max_records per batch
+        :type batch_max_records: int
+        :param batch_max_ms: Datagram mode : max millis a record can wait in batch
+        :type batch_max_ms: int
+        :param spool_file: If set, enable spill mode, using this spool file name (must not be shared across processes)
+        :type spool_file: str,None
+        :param spool_max_bytes: Spill mode : max spool file size, records are dropped above
+        :type spool_max_bytes: int
+        :param stream_timeout_ms: Stream mode : connect and send timeout in millis
+        :type stream_timeout_ms: int
         """
 
         # To avoid some warnings
@@ -56,9 +105,62 @@ class SysLogger(SysLogHandler):
         # Store
         self._log_callback = log_callback
         self.socktype = socktype
+        self._stream = (socktype == socket.SOCK_STREAM)
+
+        # Counters
+        self._count_sent = 0
+        self._count_dropped = 0
+        self._count_connect = 0
+        self._count_connect_failed = 0
+        self._count_send_failed = 0
+        self._count_replayed = 0
 
         # Base call
-        SysLogHandler.__init__(self, address, facility)
+        if self._stream:
+            # We handle the connection by ourselves
+            logging.Handler.__init__(self)
+            self.facility = facility
+            self.unixsocket = isinstance(address, str)
+        else:
+            SysLogHandler.__init__(self, address, facility)
+
+        # Framer (pre-encoded headers & priorities)
+        self._framer = SysLogFramer(facility=facility, frame_format=frame_format, nul_terminated=not self._stream)
+
+        # Reconnect backoff
+        self._reconnect_min_ms = reconnect_min_ms
+        self._reconnect_max_ms = reconnect_max_ms
+        self._backoff_ms = 0
+        self._next_connect_ms = 0.0
+
+        # Stream stuff
+        self._stream_max_pending_bytes = stream_max_pending_bytes
+        self._stream_pid = None
+        self._stream_pending = list()
+        self._stream_pending_bytes = 0
+        self._stream_sending = False
+        self._stream_timeout_sec = stream_timeout_ms * 0.001
+        self._stream_event = Event()
+        self._stream_greenlet = None
+        if self._stream:
+            SysLogger._stream_instances.add(self)
+
+        # Batch stuff
+        self._batch_max_records = 0 if self._stream else batch_max_records
+        self._batch_max_ms = batch_max_ms
+        self._batch = list()
+        self._batch_greenlet = None
+        self._batch_urgent = False
+
+        # Spill stuff (a spool left by a previous run is replayed asap)
+        self._spool = None
+        self._sink_down = False
+        self._replay_greenlet = None
+        if spool_file:
+            from pysolbase.SpoolFile import SpoolFile
+
+            self._spool = SpoolFile(spool_file, max_bytes=spool_max_bytes)
+            self._sink_down = self._spool.get_size() > 0
 
     def notify_log(self, msg):
         """
@@ -73,6 +175,50 @@ class SysLogger(SysLogHandler):
         except:
             pass
 
+    def get_stats(self):
+        """
+        Get counters
+        :return dict
+        :rtype dict
+        """
+
+        d = {
+            "sent": self._count_sent,
+            "dropped": self._count_dropped,
+            "connect": self._count_connect,
+            "connect_failed": self._count_connect_failed,
+            "send_failed": self._count_send_failed,
+            "pending_bytes": self._stream_pending_bytes,
+            "replayed": self._count_replayed,
+            "spooled": 0,
+            "spool_dropped": 0,
+            "spool_bytes": 0,
+        }
+        if self._spool:
+            d_spool = self._spool.get_stats()
+            d["spooled"] = d_spool["append"]
+            d["spool_dropped"] = d_spool["dropped"]
+            d["spool_bytes"] = d_spool["size"]
+        return d
+
+    def handle(self, record):
+        """
+        Handle.
+        In stream and batch modes, the handler lock is not taken : records must be able to accumulate while a send is in progress.
+        :param record: logging.LogRecord
+        :type record: logging.LogRecord
+        :return bool
+        :rtype bool
+        """
+
+        if not self._stream and self._batch_max_records <= 0:
+            return SysLogHandler.handle(self, record)
+
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+
     def emit(self, record):
         """
         Emit a record.
@@ -83,44 +229,443 @@ class SysLogger(SysLogHandler):
         # Write
         # noinspection PyBroadException
         try:
-            # Format
-            msg = self.format(record) + '\000'
-
-            # Get component name
-            cn = SolBase.get_compo_name()
-
-            # We append the machine+component name at the beginning
-            msg = u"{0} | {1} | {2}".format(SolBase.get_machine_name(), cn, msg)
-            msg = msg.encode('utf-8')
-
-            # Add priority + facility (int)
-            priority = '<%d>' % self.encodePriority(self.facility, self.mapPriority(record.levelname))
-            priority = priority.encode('utf-8')
-
-            # Cn
-            cn = cn.encode('utf-8')
-
-            # noinspection PyAugmentAssignment
-            msg = priority + cn + b": " + msg
+            # Format & frame
+            msg = self._framer.frame(record.levelname, self.format(record), record.created)
 
             # Notify
             self.notify_log(msg)
 
             # Send to socket
-            if self.unixsocket:
-                try:
-                    self.socket.send(msg)
-                except socket.error:
-                    # noinspection PyUnresolvedReferences
-                    self._connect_unixsocket(self.address)
-                    self.socket.send(msg)
-            elif self.socktype == socket.SOCK_DGRAM:
-                self.socket.sendto(msg, self.address)
+            if self._stream:
+                self._stream_push(msg)
+            elif self._batch_max_records > 0:
+                self._batch_push(msg, record.levelno)
+            elif self._spool is not None:
+                self._dgram_write(msg)
             else:
-                self.socket.sendall(msg)
+                self._dgram_send(msg)
+                self._count_sent += 1
         except GreenletExit:
             pass
         except (KeyboardInterrupt, SystemExit):
             raise
         except:
             self.handleError(record)
+
+    def _dgram_send(self, msg):
+        """
+        Datagram : send
+        :param msg: bytes
+        :type msg: bytes
+        """
+
+        if self.unixsocket:
+            if self.socket is None:
+                # noinspection PyUnresolvedReferences
+                self._connect_unixsocket(self.address)
+            try:
+                self.socket.send(msg)
+            except socket.error:
+                # noinspection PyUnresolvedReferences
+                self._connect_unixsocket(self.address)
+                self.socket.send(msg)
+        else:
+            self.socket.sendto(msg, self.address)
+
+    def _backoff_failed(self, ms):
+        """
+        Sink failure : schedule next connect attempt / probe (capped exponential backoff)
+        :param ms: Current millis
+        :type ms: float
+        """
+
+        if self._backoff_ms == 0:
+            self._backoff_ms = self._reconnect_min_ms
+        else:
+            self._backoff_ms = min(self._backoff_ms * 2, self._reconnect_max_ms)
+        self._next_connect_ms = ms + self._backoff_ms
+
+    # ===============================
+    # SPILL
+    # ===============================
+
+    def _dgram_write(self, msg):
+        """
+        Datagram, spill mode : send, or spool if sink is down
+        :param msg: bytes
+        :type msg: bytes
+        """
+
+        # Sink down : spool (the replay greenlet probes the sink)
+        if self._sink_down:
+            self._spool.append(msg)
+            self._replay_schedule()
+            return
+
+        try:
+            self._dgram_send(msg)
+            self._count_sent += 1
+        except Exception:
+            self._sink_down = True
+            self._backoff_failed(SolBase.ns_to_ms(SolBase.nscurrent()))
+            self._spool.append(msg)
+            self._replay_schedule()
+
+    def _dgram_replay(self):
+        """
+        Datagram, spill mode : probe the sink with the oldest spooled record, then replay the spool in bounded chunks
+        :return bool (True : sink is back, spool is empty)
+        :rtype bool
+        """
+
+        # Records spooled while replaying are replayed too
+        ar = self._spool.peek(max_records=1)
+        while ar:
+            for i, msg in enumerate(ar):
+                try:
+                    self._dgram_send(msg)
+                    self._count_sent += 1
+                    self._count_replayed += 1
+                except Exception:
+                    # Still down : keep the remaining ones in spool
+                    self._spool.consume(ar[0:i])
+                    self._count_connect_failed += 1
+                    self._backoff_failed(SolBase.ns_to_ms(SolBase.nscurrent()))
+                    return False
+            self._spool.consume(ar)
+
+            # Next chunk (let other greenlets run)
+            SolBase.sleep(0)
+            ar = self._spool.peek()
+
+        self._sink_down = False
+        self._backoff_ms = 0
+        self._count_connect += 1
+        return True
+
+    def _replay_pending(self):
+        """
+        Spill : return True if records are waiting for a replay
+        :return bool
+        :rtype bool
+        """
+
+        if self._stream:
+            return self._spool.get_size() > 0
+        return self._sink_down
+
+    def _replay_schedule(self):
+        """
+        Spill : ensure the replay greenlet is running
+        """
+
+        if self._replay_greenlet is None:
+            self._replay_greenlet = gevent.spawn(self._replay_loop)
+
+    def _replay_loop(self):
+        """
+        Spill : replay greenlet, probes the sink on the backoff schedule and replays the spool (emitting path only appends)
+        """
+
+        try:
+            while self._replay_pending():
+                SolBase.sleep(max(0.0, self._next_connect_ms - SolBase.ns_to_ms(SolBase.nscurrent())))
+                if self._stream:
+                    if not self._stream_sending:
+                        self._stream_flush(replay=True)
+                else:
+                    self._dgram_replay()
+
+                # No progress and no backoff scheduled (ie a send is in progress) : do not spin
+                if self._replay_pending() and self._next_connect_ms <= SolBase.ns_to_ms(SolBase.nscurrent()):
+                    SolBase.sleep(self._reconnect_min_ms)
+        except GreenletExit:
+            pass
+        except Exception as e:
+            sys.stderr.write("SysLogger : replay failure, e=%s\n" % e)
+        finally:
+            self._replay_greenlet = None
+
+    # ===============================
+    # BATCH
+    # ===============================
+
+    def _batch_push(self, msg, levelno):
+        """
+        Batch : append, then send inline (ERROR+), or ensure a flush is scheduled (asap if full, after batch_max_ms otherwise)
+        :param msg: bytes
+        :type msg: bytes
+        :param levelno: Record level
+        :type levelno: int
+        """
+
+        self._batch.append(msg)
+        if levelno >= logging.ERROR:
+            # Inline (with previous ones), scheduled flusher is no more needed
+            if self._batch_greenlet is not None:
+                self._batch_greenlet.kill(block=False)
+                self._batch_greenlet = None
+                self._batch_urgent = False
+            self._batch_flush()
+        elif len(self._batch) >= self._batch_max_records:
+            if not self._batch_urgent:
+                # Replace the delayed flusher (not started yet) by an immediate one
+                if self._batch_greenlet is not None:
+                    self._batch_greenlet.kill(block=False)
+                self._batch_urgent = True
+                self._batch_greenlet = gevent.spawn(self._batch_flush_scheduled)
+        elif self._batch_greenlet is None:
+            self._batch_greenlet = gevent.spawn_later(self._batch_max_ms * 0.001, self._batch_flush_scheduled)
+
+    def _batch_flush_scheduled(self):
+        """
+        Batch : scheduled flush (flusher greenlet)
+        """
+
+        self._batch_greenlet = None
+        self._batch_urgent = False
+        self._batch_flush()
+
+    def _batch_flush(self):
+        """
+        Batch : send all collected datagrams
+        """
+
+        if not self._batch:
+            return
+
+        ar = self._batch
+        self._batch = list()
+
+        # Spill mode
+        if self._spool is not None:
+            for msg in ar:
+                self._dgram_write(msg)
+            return
+
+        send = self._dgram_send
+        for msg in ar:
+            # noinspection PyBroadException
+            try:
+                send(msg)
+                self._count_sent += 1
+            except Exception:
+                self._count_dropped += 1
+
+    # ===============================
+    # STREAM
+    # ===============================
+
+    def _stream_push(self, msg):
+        """
+        Stream : frame (octet-counting), append to pending and wake up the sender
+        :param msg: bytes
+        :type msg: bytes
+        """
+
+        buf = b"%d %s" % (len(msg), msg)
+
+        # Backpressure : sink is slow or down, spool (once spool is used, records go to spool to keep order, the replay greenlet sends them) or drop newer records
+        if self._spool is not None and (self._spool.get_size() > 0 or self._stream_pending_bytes + len(buf) > self._stream_max_pending_bytes):
+            self._spool.append(buf)
+            self._replay_schedule()
+        elif self._stream_pending_bytes + len(buf) > self._stream_max_pending_bytes:
+            self._count_dropped += 1
+            return
+        else:
+            self._stream_pending.append(buf)
+            self._stream_pending_bytes += len(buf)
+
+        self._stream_schedule()
+
+    def _stream_schedule(self):
+        """
+        Stream : wake up the sender greenlet (spawned on demand)
+        """
+
+        self._stream_event.set()
+        if self._stream_greenlet is None:
+            self._stream_greenlet = gevent.spawn(self._stream_loop)
+
+    def _stream_loop(self):
+        """
+        Stream : sender greenlet
+        """
+
+        try:
+            while True:
+                self._stream_event.wait()
+                self._stream_event.clear()
+                if not self._stream_sending:
+                    self._stream_flush()
+
+                # Not delivered (sink down) : retry on the backoff schedule
+                if self._stream_pending:
+                    SolBase.sleep(max(self._next_connect_ms - SolBase.ns_to_ms(SolBase.nscurrent()), self._reconnect_min_ms))
+                    self._stream_event.set()
+        except GreenletExit:
+            pass
+        except Exception as e:
+            sys.stderr.write("SysLogger : sender failure, e=%s\n" % e)
+        finally:
+            self._stream_greenlet = None
+
+    def _stream_connect(self):
+        """
+        Stream : connect (honoring backoff)
+        :return bool
+        :rtype bool
+        """
+
+        if self.socket is not None:
+            if self._stream_pid == os.getpid():
+                return True
+            # Forked (no at-fork support) : socket is shared with parent
+            self._stream_on_fork()
+
+        # Backoff
+        ms = SolBase.ns_to_ms(SolBase.nscurrent())
+        if ms < self._next_connect_ms:
+            return False
+
+        sock = None
+        try:
+            if self.unixsocket:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self._stream_timeout_sec)
+                sock.connect(self.address)
+            else:
+                sock = socket.create_connection(self.address, self._stream_timeout_sec)
+            self.socket = sock
+            self._stream_pid = os.getpid()
+            self._backoff_ms = 0
+            self._count_connect += 1
+            return True
+        except Exception:
+            if sock is not None:
+                sock.close()
+            self._count_connect_failed += 1
+            self._backoff_failed(ms)
+            return False
+
+    def _stream_flush(self, replay=False):
+        """
+        Stream : send all pending records (coalesced), then spooled records (if replay is set)
+        :param replay: If True, replay spooled records
+        :type replay: bool
+        """
+
+        self._stream_sending = True
+        try:
+            while self._stream_pending or (replay and self._spool is not None and self._spool.get_size() > 0):
+                if not self._stream_connect():
+                    return
+
+                # Replay spool (pending records are older, they go first), a chunk at a time, consumed once sent
+                if not self._stream_pending:
+                    ar = self._spool.peek(max_bytes=self._stream_max_pending_bytes)
+                    try:
+                        self.socket.sendall(b"".join(ar))
+                    except Exception:
+                        self._stream_send_failed()
+                        return
+                    self._spool.consume(ar)
+                    self._count_sent += len(ar)
+                    self._count_replayed += len(ar)
+                    continue
+
+                # Coalesce
+                ar = self._stream_pending
+                buf = b"".join(ar)
+                self._stream_pending = list()
+                self._stream_pending_bytes = 0
+
+                try:
+                    self.socket.sendall(buf)
+                    self._count_sent += len(ar)
+                except Exception:
+                    # Re-queue (ahead of records pushed meanwhile)
+                    ar.extend(self._stream_pending)
+                    self._stream_pending = ar
+                    self._stream_pending_bytes += len(buf)
+                    self._stream_send_failed()
+                    return
+        finally:
+            self._stream_sending = False
+
+    def _stream_send_failed(self):
+        """
+        Stream : send failure, close the connection (reconnect on next send, or backoff if connect fails)
+        """
+
+        self._count_send_failed += 1
+        SolBase.safe_close_socket(self.socket)
+        self.socket = None
+        self._next_connect_ms = 0.0
+
+    def _stream_on_fork(self):
+        """
+        Stream : after fork (child), close the inherited connection (without shutdown, the parent still uses it) and
+        discard records pending in the parent (the parent sends them)
+        """
+
+        if self.socket is not None:
+            # noinspection PyBroadException
+            try:
+                self.socket.close()
+            except Exception:
+                pass
+            self.socket = None
+        self._stream_pid = None
+        self._stream_pending = list()
+        self._stream_pending_bytes = 0
+        self._stream_sending = False
+
+    @classmethod
+    def _on_fork(cls):
+        """
+        After fork (child)
+        """
+
+        for h in list(cls._stream_instances):
+            h._stream_on_fork()
+
+    def flush(self):
+        """
+        Flush (batch mode : send collected records, stream mode : send pending records if possible)
+        """
+
+        if self._batch:
+            if self._batch_greenlet is not None:
+                self._batch_greenlet.kill(block=False)
+                self._batch_greenlet = None
+                self._batch_urgent = False
+            self._batch_flush()
+
+        if self._stream and not self._stream_sending and (self._stream_pending or (self._spool is not None and self._spool.get_size() > 0)):
+            # noinspection PyBroadException
+            try:
+                self._stream_flush(replay=True)
+            except Exception:
+                pass
+
+    def close(self):
+        """
+        Close
+        """
+
+        if self._replay_greenlet is not None:
+            self._replay_greenlet.kill(block=False)
+            self._replay_greenlet = None
+        if self._stream_greenlet is not None:
+            self._stream_greenlet.kill(block=False)
+            self._stream_greenlet = None
+        self.flush()
+        if self._spool is not None:
+            self._spool.close()
+        SysLogHandler.close(self)
+
+
+# Stream connections must not be shared across processes
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=SysLogger._on_fork)
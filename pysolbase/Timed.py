@@ -0,0 +1,243 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import functools
+import logging
+import time
+
+from gevent import getcurrent
+
+from pysolbase.ContextFilter import ContextFilter
+from pysolbase.LatencyHistogram import LatencyHistogram
+
+timedlogger = logging.getLogger("timed")
+
+_monotonic_ns = time.monotonic_ns
+
+# No slow threshold
+_NS_INFINITE = 1 << 63
+
+
+class Timed(object):
+    """
+    Timing decorator and context manager (refer to SolBase.timed).
+    - each call is recorded into a per name pysolbase.LatencyHistogram.LatencyHistogram
+    - a call above slow_ms logs a single "slow call" line (logger "timed"), carrying current context keys (refer to pysolbase.ContextFilter.ContextFilter)
+    - an aggregated summary line per name (count, mean, percentiles, max, slow count) is logged every summary interval (logger "timed"), histograms are then reset
+    - context manager start times are kept per greenlet (an instance can be shared by concurrent greenlets, and nested)
+    Summaries of all names are logged by a single class-wide task on the shared timer wheel (unref'd, refer to SolBase.get_timer_wheel),
+    scheduled when the first Timed is created and re-scheduled by set_summary_interval_ms : the recording path does not check the clock.
+    """
+
+    __slots__ = ("_name", "_slow_ns", "_agg", "_starts")
+
+    # Name => [LatencyHistogram, slow count]
+    _d_agg = dict()
+    _summary_interval_ns = 60 * 1000000000
+    _summary_task = None
+
+    def __init__(self, name, slow_ms=None):
+        """
+        Init
+        :param name: Aggregate name
+        :type name: str
+        :param slow_ms: Slow call threshold in millis (None : no slow call logs)
+        :type slow_ms: int,float,None
+        """
+
+        self._name = name
+        self._slow_ns = int(slow_ms * 1000000) if slow_ms is not None else _NS_INFINITE
+
+        # Greenlet => start nanos stack
+        self._starts = dict()
+
+        # Aggregate (shared by name)
+        agg = Timed._d_agg.get(name)
+        if agg is None:
+            agg = [LatencyHistogram(), 0]
+            Timed._d_agg[name] = agg
+        self._agg = agg
+
+        # Summary timer (lazy)
+        if Timed._summary_task is None:
+            Timed._summary_start()
+
+    def _slow(self, ns):
+        """
+        Record a slow call
+        :param ns: Call nanos
+        :type ns: int
+        """
+
+        self._agg[1] += 1
+        timedlogger.warning("Slow call, name=%s, ms=%.3f, slow_ms=%.3f", self._name, ns / 1000000.0, self._slow_ns / 1000000.0,
+                            extra={"kfilter": ContextFilter.get_kfilter(), "kdict": ContextFilter.get_kdict()})
+
+    # ===============================
+    # CONTEXT MANAGER & DECORATOR
+    # ===============================
+
+    def __enter__(self):
+        """
+        Enter
+        :return self
+        :rtype Timed
+        """
+
+        g = getcurrent()
+        ar = self._starts.get(g)
+        if ar is None:
+            self._starts[g] = [_monotonic_ns()]
+        else:
+            # Nested
+            ar.append(_monotonic_ns())
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Exit
+        """
+
+        ns_end = _monotonic_ns()
+        g = getcurrent()
+        ar = self._starts[g]
+        ns = ns_end - ar.pop()
+        if not ar:
+            del self._starts[g]
+        self._agg[0].record_ns(ns)
+        if ns > self._slow_ns:
+            self._slow(ns)
+
+    def __call__(self, func):
+        """
+        Decorate
+        :param func: Function to time
+        :type func: callable
+        :return callable
+        :rtype callable
+        """
+
+        # Hot path : locals only
+        record_ns = self._agg[0].record_ns
+        slow_ns = self._slow_ns
+        slow = self._slow
+
+        @functools.wraps(func)
+        def _timed(*args, **kwargs):
+            ns = _monotonic_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                ns = _monotonic_ns() - ns
+                record_ns(ns)
+                if ns > slow_ns:
+                    slow(ns)
+
+        return _timed
+
+    # ===============================
+    # AGGREGATES
+    # ===============================
+
+    @classmethod
+    def _summary_start(cls):
+        """
+        Start the summary timer (if enabled)
+        """
+
+        if cls._summary_interval_ns <= 0:
+            return
+
+        # Lazy (SolBase imports us)
+        from pysolbase.SolBase import SolBase
+        cls._summary_task = SolBase.get_timer_wheel().schedule_periodic(cls._summary_interval_ns / 1000000.0, cls.log_summary, ref=False)
+
+    @classmethod
+    def set_summary_interval_ms(cls, summary_interval_ms):
+        """
+        Set summary interval
+        :param summary_interval_ms: Summary interval in millis (0 : disabled)
+        :type summary_interval_ms: int
+        """
+
+        if cls._summary_task is not None:
+            cls._summary_task.cancel()
+            cls._summary_task = None
+        cls._summary_interval_ns = max(0, int(summary_interval_ms * 1000000))
+        cls._summary_start()
+
+    @classmethod
+    def get_histogram(cls, name):
+        """
+        Get current histogram for a name (since previous summary)
+        :param name: Aggregate name
+        :type name: str
+        :return LatencyHistogram,None
+        :rtype LatencyHistogram,None
+        """
+
+        agg = cls._d_agg.get(name)
+        if agg is None:
+            return None
+        return agg[0]
+
+    @classmethod
+    def get_stats(cls):
+        """
+        Get current stats per name (since previous summary)
+        :return dict name => dict
+        :rtype dict
+        """
+
+        d = dict()
+        for name, agg in list(cls._d_agg.items()):
+            d_h = agg[0].get_stats()
+            d_h["slow"] = agg[1]
+            d[name] = d_h
+        return d
+
+    @classmethod
+    def log_summary(cls):
+        """
+        Log a summary line per name having calls (since previous summary), and reset them
+        """
+
+        for name, agg in list(cls._d_agg.items()):
+            h = agg[0]
+            if h.get_count() == 0:
+                continue
+            d = h.get_stats()
+            timedlogger.info("Summary, name=%s, count=%s, mean_ms=%.3f, p50_ms=%.3f, p99_ms=%.3f, p999_ms=%.3f, max_ms=%.3f, slow=%s",
+                             name, d["count"], d["mean_ms"], d["p50_ms"], d["p99_ms"], d["p999_ms"], d["max_ms"], agg[1])
+            h.reset()
+            agg[1] = 0
+
+    @classmethod
+    def reset(cls):
+        """
+        Reset all aggregates (for unittest)
+        """
+
+        for agg in cls._d_agg.values():
+            agg[0].reset()
+            agg[1] = 0
@@ -0,0 +1,479 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+import logging
+import time
+
+import gevent
+from gevent import GreenletExit, Timeout
+from gevent.event import Event
+
+from pysolbase.SolBase import SolBase
+
+logger = logging.getLogger(__name__)
+
+_monotonic_ns = time.monotonic_ns
+
+
+class TimerTask(object):
+    """
+    Timer wheel task (refer to TimerWheel.schedule, TimerWheel.schedule_periodic)
+    """
+
+    __slots__ = ("fn", "args", "interval_ticks", "fixed_rate", "ref", "expire", "run_count", "missed_count", "_wheel", "_slot")
+
+    def __init__(self, wheel, fn, args, interval_ticks, fixed_rate, ref):
+        """
+        Init
+        :param wheel: TimerWheel
+        :type wheel: TimerWheel
+        :param fn: Callable
+        :type fn: callable
+        :param args: tuple
+        :type args: tuple
+        :param interval_ticks: Interval in ticks (0 : one shot)
+        :type interval_ticks: int
+        :param fixed_rate: If True, fixed rate, fixed delay otherwise
+        :type fixed_rate: bool
+        :param ref: If True, the task keeps the gevent loop alive
+        :type ref: bool
+        """
+
+        self.fn = fn
+        self.args = args
+        self.interval_ticks = interval_ticks
+        self.fixed_rate = fixed_rate
+        self.ref = ref
+        self.expire = 0
+        self.run_count = 0
+        self.missed_count = 0
+        self._wheel = wheel
+        self._slot = None
+
+    def cancel(self):
+        """
+        Cancel (O(1))
+        :return bool (True if it was scheduled)
+        :rtype bool
+        """
+
+        slot = self._slot
+        if slot is None:
+            # Not scheduled (one shot done, or already cancelled), or running : do not re-schedule
+            self.interval_ticks = -1
+            return False
+        del slot[self]
+        self._slot = None
+        self.interval_ticks = -1
+        self._wheel._on_remove(self, True)
+        return True
+
+    def is_scheduled(self):
+        """
+        Return True if scheduled
+        :return bool
+        :rtype bool
+        """
+
+        return self._slot is not None
+
+
+# noinspection PyPep8
+class TimerWheel(object):
+    """
+    Hierarchical timing wheel, driven by a single greenlet (refer to SolBase.get_timer_wheel).
+    - levels wheels of 2^wheel_bits slots, level N slot covers tick_ms * 2^(wheel_bits * N)
+    - schedule and cancel are O(1), tasks are cascaded toward lower levels as time goes
+    - ticks are derived from the monotonic clock origin (no drift), late ticks are caught up
+    - the driver sleeps until the next non-empty slot (or cascade), not every tick
+    - periodic tasks : fixed rate (next run = previous expiration + interval) or fixed delay (next run = end of run + interval)
+    - fixed rate missed runs (callback slower than interval, or hub lagging) are coalesced into a single run (counted as missed)
+    - callbacks run inline in the driver greenlet (no spawn per tick) : they must not block, spawn a greenlet otherwise
+    - tasks scheduled with ref=False (housekeeping) do not keep the gevent loop alive
+    """
+
+    def __init__(self, tick_ms=10, wheel_bits=8, levels=4):
+        """
+        Init
+        :param tick_ms: Tick in millis (timer resolution)
+        :type tick_ms: int
+        :param wheel_bits: Slots per wheel (power of two)
+        :type wheel_bits: int
+        :param levels: Wheel levels (range : tick_ms * 2^(wheel_bits * levels), above, tasks are re-inserted on expiration)
+        :type levels: int
+        """
+
+        if tick_ms <= 0 or wheel_bits <= 0 or levels <= 0:
+            raise Exception("Invalid tick_ms=%s, wheel_bits=%s, levels=%s" % (tick_ms, wheel_bits, levels))
+
+        self._tick_ns = int(tick_ms * 1000000)
+        self._bits = wheel_bits
+        self._mask = (1 << wheel_bits) - 1
+        self._levels = levels
+        self._wheels = [[dict() for _ in range(0, 1 << wheel_bits)] for _ in range(0, levels)]
+
+        self._tick = 0
+        self._ns_origin = _monotonic_ns()
+        self._count = 0
+        self._count_ref = 0
+        self._event = Event()
+        self._wake_tick = None
+        self._greenlet = None
+        self._is_running = False
+
+        # Counters
+        self._count_scheduled = 0
+        self._count_fired = 0
+        self._count_cancelled = 0
+        self._count_missed = 0
+        self._count_error = 0
+        self._count_cascaded = 0
+        self._count_wakeup = 0
+
+    # ===============================
+    # SCHEDULE
+    # ===============================
+
+    def _ms_to_ticks(self, ms):
+        """
+        Convert millis to ticks (rounded up, at least 1)
+        :param ms: Millis
+        :type ms: int,float
+        :return int
+        :rtype int
+        """
+
+        ticks = -(-int(ms * 1000000) // self._tick_ns)
+        return ticks if ticks > 0 else 1
+
+    def _get_clock_tick(self):
+        """
+        Get current tick from the clock (the wheel tick lags while the driver sleeps)
+        :return int
+        :rtype int
+        """
+
+        return max(self._tick, (_monotonic_ns() - self._ns_origin) // self._tick_ns)
+
+    def schedule(self, delay_ms, fn, *args, ref=True):
+        """
+        Schedule a one shot task
+        :param delay_ms: Delay in millis
+        :type delay_ms: int,float
+        :param fn: Callable
+        :type fn: callable
+        :param args: Args
+        :param ref: If True, the task keeps the gevent loop alive
+        :type ref: bool
+        :return TimerTask
+        :rtype TimerTask
+        """
+
+        self.start()
+        task = TimerTask(self, fn, args, 0, False, ref)
+        task.expire = self._get_clock_tick() + self._ms_to_ticks(delay_ms)
+        self._add(task)
+        return task
+
+    def schedule_periodic(self, interval_ms, fn, *args, fixed_rate=True, initial_delay_ms=None, ref=True):
+        """
+        Schedule a periodic task
+        :param interval_ms: Interval in millis
+        :type interval_ms: int,float
+        :param fn: Callable
+        :type fn: callable
+        :param args: Args
+        :param fixed_rate: If True, fixed rate (missed runs coalesced), fixed delay otherwise
+        :type fixed_rate: bool
+        :param initial_delay_ms: First run delay in millis (None : interval_ms)
+        :type initial_delay_ms: int,float,None
+        :param ref: If True, the task keeps the gevent loop alive
+        :type ref: bool
+        :return TimerTask
+        :rtype TimerTask
+        """
+
+        self.start()
+        task = TimerTask(self, fn, args, self._ms_to_ticks(interval_ms), fixed_rate, ref)
+        task.expire = self._get_clock_tick() + self._ms_to_ticks(interval_ms if initial_delay_ms is None else initial_delay_ms)
+        self._add(task)
+        return task
+
+    def _add(self, task):
+        """
+        Add a task
+        :param task: TimerTask
+        :type task: TimerTask
+        """
+
+        self._insert(task)
+        self._count += 1
+        if task.ref:
+            self._count_ref += 1
+        self._count_scheduled += 1
+
+        # Wake up the driver if it sleeps beyond this task
+        if self._wake_tick is None or task.expire < self._wake_tick:
+            self._event.set()
+
+    def _insert(self, task):
+        """
+        Insert a task in its slot (O(1))
+        :param task: TimerTask
+        :type task: TimerTask
+        """
+
+        delta = task.expire - self._tick
+        level = 0
+        while level < self._levels - 1 and delta >= (1 << (self._bits * (level + 1))):
+            level += 1
+        slot = self._wheels[level][(task.expire >> (self._bits * level)) & self._mask]
+        slot[task] = None
+        task._slot = slot
+
+    def _on_remove(self, task, cancelled):
+        """
+        Task removed (cancelled, or one shot done)
+        :param task: TimerTask
+        :type task: TimerTask
+        :param cancelled: bool
+        :type cancelled: bool
+        """
+
+        self._count -= 1
+        if task.ref:
+            self._count_ref -= 1
+        if cancelled:
+            self._count_cancelled += 1
+
+    # ===============================
+    # DRIVER
+    # ===============================
+
+    def _get_next_tick(self):
+        """
+        Get the next tick having work (non-empty level 0 slot, or non-empty upper slot to cascade)
+        :return int,None
+        :rtype int,None
+        """
+
+        if self._count == 0:
+            return None
+
+        tick = self._tick
+        bits = self._bits
+        mask = self._mask
+        size = 1 << bits
+        best = None
+
+        # Level 0 : current window
+        wheel = self._wheels[0]
+        for d in range(1, size):
+            if wheel[(tick + d) & mask]:
+                best = tick + d
+                break
+
+        # Upper levels : next boundaries
+        for level in range(1, self._levels):
+            span = 1 << (bits * level)
+            wheel = self._wheels[level]
+            b = (tick // span + 1) * span
+            for _ in range(0, size):
+                if best is not None and b >= best:
+                    break
+                if wheel[(b >> (bits * level)) & mask]:
+                    best = b
+                    break
+                b += span
+        return best
+
+    def _advance(self):
+        """
+        Advance one tick : cascade upper levels, then fire level 0 slot
+        """
+
+        self._tick += 1
+        tick = self._tick
+
+        # Cascade (highest first), on lower level wrap
+        for level in range(self._levels - 1, 0, -1):
+            if tick & ((1 << (self._bits * level)) - 1) == 0:
+                wheel = self._wheels[level]
+                idx = (tick >> (self._bits * level)) & self._mask
+                slot = wheel[idx]
+                if slot:
+                    wheel[idx] = dict()
+                    for task in slot:
+                        self._count_cascaded += 1
+                        self._insert(task)
+
+        # Fire
+        wheel = self._wheels[0]
+        idx = tick & self._mask
+        slot = wheel[idx]
+        if not slot:
+            return
+        wheel[idx] = dict()
+        for task in list(slot):
+            if task._slot is not slot:
+                # Cancelled by a previous callback
+                continue
+            if task.expire > tick:
+                # Beyond wheels range : re-insert
+                self._insert(task)
+                continue
+            task._slot = None
+            self._fire(task)
+
+    def _fire(self, task):
+        """
+        Run a task, re-schedule it if periodic
+        :param task: TimerTask
+        :type task: TimerTask
+        """
+
+        task.run_count += 1
+        self._count_fired += 1
+        try:
+            task.fn(*task.args)
+        except (GreenletExit, KeyboardInterrupt, SystemExit):
+            raise
+        except (Exception, Timeout) as e:
+            # gevent.Timeout is a BaseException
+            self._count_error += 1
+            logger.warning("Task failure, fn=%s, ex=%s", task.fn, SolBase.extostr(e))
+        finally:
+            self._reschedule(task)
+
+    def _reschedule(self, task):
+        """
+        Re-schedule a task after a run (periodic), or remove it
+        :param task: TimerTask
+        :type task: TimerTask
+        """
+
+        # Cancelled during run, or one shot
+        if task.interval_ticks <= 0:
+            self._on_remove(task, False)
+            return
+
+        cur = (_monotonic_ns() - self._ns_origin) // self._tick_ns
+        if task.fixed_rate:
+            # Coalesce missed runs
+            expire = task.expire + task.interval_ticks
+            if expire <= cur:
+                missed = (cur - expire) // task.interval_ticks + 1
+                task.missed_count += missed
+                self._count_missed += missed
+                expire += missed * task.interval_ticks
+            task.expire = max(expire, self._tick + 1)
+        else:
+            # Fixed delay, from run end (current tick is partially elapsed : at least interval)
+            task.expire = max(cur, self._tick) + task.interval_ticks + 1
+        self._insert(task)
+
+    def _run(self):
+        """
+        Driver greenlet
+        """
+
+        try:
+            while self._is_running:
+                try:
+                    self._event.clear()
+
+                    # Catch up (jumping over ticks without work)
+                    target = (_monotonic_ns() - self._ns_origin) // self._tick_ns
+                    while True:
+                        nxt = self._get_next_tick()
+                        if nxt is None or nxt > target:
+                            break
+                        self._tick = nxt - 1
+                        self._advance()
+
+                    # Sleep until next work (woken up by _add for sooner tasks)
+                    self._wake_tick = nxt
+                    self._count_wakeup += 1
+                    if nxt is None:
+                        self._event.wait()
+                    else:
+                        delay = (self._ns_origin + nxt * self._tick_ns - _monotonic_ns()) / 1000000000.0
+                        if delay > 0.0:
+                            with Timeout(delay, False, ref=self._count_ref > 0):
+                                self._event.wait()
+                    self._wake_tick = None
+                except GreenletExit:
+                    raise
+                except Exception as e:
+                    logger.warning("Driver failure, ex=%s", SolBase.extostr(e))
+                    gevent.sleep(self._tick_ns / 1000000000.0)
+        except GreenletExit:
+            pass
+        finally:
+            # Restarted by next schedule
+            self._is_running = False
+            self._greenlet = None
+            self._wake_tick = None
+
+    def start(self):
+        """
+        Start the driver greenlet (called on schedule)
+        """
+
+        if self._is_running:
+            return
+        self._is_running = True
+        self._ns_origin = _monotonic_ns() - self._tick * self._tick_ns
+        self._greenlet = gevent.spawn(self._run)
+
+    def stop(self):
+        """
+        Stop the driver greenlet (scheduled tasks are kept, they resume on start)
+        """
+
+        if not self._is_running:
+            return
+        self._is_running = False
+        if self._greenlet is not None:
+            self._greenlet.kill()
+        self._greenlet = None
+
+    def get_stats(self):
+        """
+        Get counters
+        :return dict
+        :rtype dict
+        """
+
+        return {
+            "pending": self._count,
+            "pending_ref": self._count_ref,
+            "scheduled": self._count_scheduled,
+            "fired": self._count_fired,
+            "cancelled": self._count_cancelled,
+            "missed": self._count_missed,
+            "error": self._count_error,
+            "cascaded": self._count_cascaded,
+            "wakeup": self._count_wakeup,
+            "tick": self._tick,
+        }
@@ -0,0 +1,200 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+#
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+from datetime import datetime, timezone, timedelta
+
+import pytz
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    # Python < 3.9 : pytz only
+    ZoneInfo = None
+
+
+# noinspection PyPep8
+class TzCache(object):
+    """
+    Time zone conversion cache (refer to SolBase.dt_to_tz, SolBase.dts_to_tz, SolBase.dt_tz_to_utc_naive).
+    - zones are resolved once per name (stdlib zoneinfo if available, pytz otherwise)
+    - utc offsets are cached per zone and per utc hour (an hour is cached only if no transition occurs inside it)
+    - converted datetimes carry a fixed offset tzinfo (datetime.timezone, named after the zone abbreviation, so %z and %Z render as usual)
+    """
+
+    _DT_EPOCH = datetime(1970, 1, 1)
+    _TD_HOUR = timedelta(hours=1)
+
+    # Max cached hours per zone (cache is cleared if reached)
+    MAX_HOURS = 100000
+
+    # Name => tzinfo
+    _d_zone = dict()
+    # Name => {utc hour => (fixed tzinfo, offset)}
+    _d_hour = dict()
+    # (offset, abbreviation) => fixed tzinfo
+    _d_fixed = dict()
+
+    @classmethod
+    def get_zone(cls, tz_name):
+        """
+        Get zone tzinfo (cached)
+        :param tz_name: Zone name (ie "Europe/Paris")
+        :type tz_name: str
+        :return tzinfo
+        :rtype datetime.tzinfo
+        """
+
+        z = cls._d_zone.get(tz_name)
+        if z is None:
+            if tz_name in ("UTC", "Etc/UTC"):
+                z = timezone.utc
+            else:
+                if ZoneInfo is not None:
+                    # noinspection PyBroadException
+                    try:
+                        z = ZoneInfo(tz_name)
+                    except Exception:
+                        # No system tz database : fallback pytz
+                        pass
+                if z is None:
+                    z = pytz.timezone(tz_name)
+            cls._d_zone[tz_name] = z
+        return z
+
+    @classmethod
+    def _get_fixed(cls, zone, epoch):
+        """
+        Get fixed offset tzinfo in effect at an instant (not cached per hour)
+        :param zone: Zone tzinfo
+        :type zone: datetime.tzinfo
+        :param epoch: Epoch seconds
+        :type epoch: int,float
+        :return tuple (fixed tzinfo, offset)
+        :rtype tuple
+        """
+
+        dt = datetime.fromtimestamp(epoch, zone)
+        offset = dt.utcoffset()
+        key = (offset, dt.tzname())
+        fixed = cls._d_fixed.get(key)
+        if fixed is None:
+            fixed = (timezone(offset, key[1]), offset)
+            cls._d_fixed[key] = fixed
+        return fixed
+
+    @classmethod
+    def get_fixed(cls, tz_name, dt_utc):
+        """
+        Get fixed offset tzinfo in effect at an utc instant (cached per utc hour)
+        :param tz_name: Zone name
+        :type tz_name: str
+        :param dt_utc: Utc datetime (naive)
+        :type dt_utc: datetime
+        :return tuple (fixed tzinfo, offset)
+        :rtype tuple
+        """
+
+        d = cls._d_hour.get(tz_name)
+        if d is None:
+            d = dict()
+            cls._d_hour[tz_name] = d
+
+        hour = (dt_utc - cls._DT_EPOCH) // cls._TD_HOUR
+        fixed = d.get(hour)
+        if fixed is not None:
+            return fixed
+
+        # Miss : cache the hour only if offset is constant inside it
+        zone = cls.get_zone(tz_name)
+        fixed = cls._get_fixed(zone, hour * 3600)
+        if fixed is cls._get_fixed(zone, hour * 3600 + 3599):
+            if len(d) >= cls.MAX_HOURS:
+                d.clear()
+            d[hour] = fixed
+            return fixed
+        return cls._get_fixed(zone, (dt_utc - cls._DT_EPOCH).total_seconds())
+
+    @classmethod
+    def to_tz(cls, dt, tz_name):
+        """
+        Convert a datetime (naive : utc assumed, or aware) to a zone
+        :param dt: datetime
+        :type dt: datetime
+        :param tz_name: Zone name
+        :type tz_name: str
+        :return datetime (aware, fixed offset tzinfo)
+        :rtype datetime
+        """
+
+        if dt.tzinfo is not None:
+            dt = dt.replace(tzinfo=None) - dt.utcoffset()
+        fixed, offset = cls.get_fixed(tz_name, dt)
+        return (dt + offset).replace(tzinfo=fixed)
+
+    @classmethod
+    def to_tz_bulk(cls, dts, tz_name):
+        """
+        Convert datetimes (naive : utc assumed, or aware) to a zone.
+        Consecutive datetimes in the same utc hour share a single lookup.
+        :param dts: iterable of datetime
+        :type dts: list,tuple
+        :param tz_name: Zone name
+        :type tz_name: str
+        :return list of datetime (aware, fixed offset tzinfo)
+        :rtype list
+        """
+
+        ar = list()
+        ep = cls._DT_EPOCH
+        td_hour = cls._TD_HOUR
+        last_hour = None
+        fixed = offset = None
+        for dt in dts:
+            if dt.tzinfo is not None:
+                dt = dt.replace(tzinfo=None) - dt.utcoffset()
+            hour = (dt - ep) // td_hour
+            if hour != last_hour:
+                fixed, offset = cls.get_fixed(tz_name, dt)
+                # Hour with a transition : do not share
+                last_hour = hour if cls._d_hour[tz_name].get(hour) is not None else None
+            ar.append((dt + offset).replace(tzinfo=fixed))
+        return ar
+
+    @classmethod
+    def from_tz(cls, dt, tz_name):
+        """
+        Convert a zone local naive datetime to utc (naive). Ambiguous local times (dst end) resolve to the first occurrence.
+        :param dt: Local datetime (naive)
+        :type dt: datetime
+        :param tz_name: Zone name
+        :type tz_name: str
+        :return datetime (naive, utc)
+        :rtype datetime
+        """
+
+        zone = cls.get_zone(tz_name)
+        if isinstance(zone, pytz.BaseTzInfo):
+            dt_local = zone.localize(dt, is_dst=True)
+        else:
+            dt_local = dt.replace(tzinfo=zone)
+        return dt - dt_local.utcoffset()
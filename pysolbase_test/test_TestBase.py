@@ -21,15 +21,27 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 # ===============================================================================
 """
+import array
 import inspect
 import logging
+import os
 import sys
+import threading
 import unittest
+from datetime import datetime, timedelta, timezone
 
+import gevent
+import pytz
+from gevent.monkey import get_original
+
+from pysolbase.BlockingRunner import BlockingRunner
+from pysolbase.ContextFilter import ContextFilter
 from pysolbase.SolBase import SolBase
+from pysolbase.Timed import Timed
 from pysolbase_test.CrashMe import CrashMe
 
 logger = logging.getLogger(__name__)
+native_sleep = get_original("time", "sleep")
 
 
 class TestBase(unittest.TestCase):
@@ -99,6 +111,363 @@ class TestBase(unittest.TestCase):
         self.assertGreaterEqual(SolBase.msdiff(sec*1000), 1000)
         self.assertLessEqual(SolBase.msdiff(sec*1000), 1200)
 
+    def test_ns(self):
+        """
+        Test
+        """
+
+        ns = SolBase.nscurrent()
+        self.assertIsInstance(ns, int)
+        SolBase.sleep(100)
+        self.assertGreaterEqual(SolBase.nsdiff(ns), 100 * 1000000)
+        self.assertLessEqual(SolBase.nsdiff(ns), 200 * 1000000)
+        self.assertEqual(SolBase.nsdiff(ns, ns + 5), 5)
+        self.assertEqual(SolBase.ns_to_ms(1500000), 1.5)
+
+    def test_stopwatch(self):
+        """
+        Test
+        """
+
+        sw = SolBase.stopwatch()
+        self.assertTrue(sw.is_running())
+        SolBase.sleep(50)
+        lap1 = sw.lap()
+        SolBase.sleep(50)
+        lap2 = sw.lap()
+        self.assertGreaterEqual(lap1, 50 * 1000000)
+        self.assertGreaterEqual(lap2, 50 * 1000000)
+        self.assertGreaterEqual(sw.split(), lap1 + lap2)
+        self.assertGreaterEqual(sw.elapsed_ms(), 100.0)
+        self.assertLessEqual(sw.elapsed_ms(), 200.0)
+
+        # Stop : frozen
+        ns = sw.stop()
+        self.assertFalse(sw.is_running())
+        SolBase.sleep(20)
+        self.assertEqual(sw.elapsed_ns(), ns)
+        self.assertEqual(sw.stop(), ns)
+        logger.info("sw=%s", sw)
+
+        # Restart
+        sw.start()
+        self.assertTrue(sw.is_running())
+        self.assertLess(sw.elapsed_ms(), 50.0)
+
+        # Not started
+        sw = SolBase.stopwatch(start=False)
+        self.assertFalse(sw.is_running())
+        self.assertEqual(sw.elapsed_ns(), 0)
+        self.assertEqual(sw.elapsed_ms(), 0.0)
+        self.assertEqual(sw.split(), 0)
+        self.assertEqual(sw.lap(), 0)
+        self.assertEqual(sw.stop(), 0)
+        self.assertFalse(sw.is_running())
+        sw.start()
+        SolBase.sleep(10)
+        self.assertGreaterEqual(sw.elapsed_ms(), 10.0)
+        self.assertLess(sw.elapsed_ms(), 1000.0)
+
+        # Context manager
+        with SolBase.stopwatch(start=False) as sw:
+            SolBase.sleep(20)
+        self.assertFalse(sw.is_running())
+        self.assertGreaterEqual(sw.elapsed_ms(), 20.0)
+
+        # Slotted
+        self.assertFalse(hasattr(sw, "__dict__"))
+
+    def test_coarse_clock(self):
+        """
+        Test
+        """
+
+        # Not started : exact values
+        SolBase.coarse_clock_stop()
+        self.assertAlmostEqual(SolBase.coarse_mscurrent(), SolBase.mscurrent(), delta=5.0)
+        self.assertAlmostEqual(SolBase.coarse_securrent(), SolBase.securrent(), delta=0.005)
+        self.assertLess(abs(SolBase.datediff(SolBase.coarse_datecurrent())), 5.0)
+
+        for refresh_mode in ["greenlet", "thread"]:
+            c = SolBase.coarse_clock_start(resolution_ms=10, refresh_mode=refresh_mode)
+            try:
+                self.assertTrue(c.is_running())
+
+                # Cached : same value until next refresh (greenlet mode : no refresh without yielding)
+                ms = SolBase.coarse_mscurrent()
+                if refresh_mode == "greenlet":
+                    self.assertEqual(ms, SolBase.coarse_mscurrent())
+
+                # Refreshed
+                SolBase.sleep(50)
+                self.assertGreater(SolBase.coarse_mscurrent(), ms)
+                self.assertAlmostEqual(SolBase.coarse_mscurrent(), SolBase.mscurrent(), delta=50.0)
+                self.assertAlmostEqual(SolBase.coarse_securrent() * 1000.0, SolBase.coarse_mscurrent(), delta=0.001)
+                self.assertGreaterEqual(c.get_stats()["refresh"], 3)
+
+                # Erase modes
+                dt0 = SolBase.coarse_datecurrent(0)
+                dt1 = SolBase.coarse_datecurrent(1)
+                dt2 = SolBase.coarse_datecurrent(2)
+                self.assertIsNone(dt0.tzinfo)
+                self.assertEqual(dt1.microsecond % 1000, 0)
+                self.assertEqual(dt2.microsecond, 0)
+                self.assertEqual(dt1.replace(microsecond=0), dt2)
+                self.assertLess(abs(SolBase.datediff(dt0)), 50.0)
+                self.assertRaises(Exception, SolBase.coarse_datecurrent, 3)
+
+                if refresh_mode == "greenlet":
+                    # Does not keep the loop alive
+                    self.assertFalse(c._timer.ref)
+                else:
+                    # Fork : refresh thread restarted in child
+                    file_name = "/tmp/pythonsol_unittest.coarse_fork"
+                    if os.path.exists(file_name):
+                        os.remove(file_name)
+                    pid = os.fork()
+                    if pid == 0:
+                        n = c.get_stats()["refresh"]
+                        native_sleep(0.1)
+                        with open(file_name + ".tmp", "w") as f:
+                            f.write(str(c.get_stats()["refresh"] - n >= 3))
+                        os.rename(file_name + ".tmp", file_name)
+                        os._exit(0)
+                    os.waitpid(pid, 0)
+                    with open(file_name) as f:
+                        self.assertEqual(f.read(), "True")
+                    os.remove(file_name)
+            finally:
+                SolBase.coarse_clock_stop()
+            self.assertFalse(c.is_running())
+
+    def test_timed(self):
+        """
+        Test
+        """
+
+        # Capture "timed" records
+        ar_record = list()
+        h = logging.Handler()
+        h.emit = ar_record.append
+        logging.getLogger("timed").addHandler(h)
+        try:
+            Timed.reset()
+            SolBase.timed_set_summary_interval_ms(0)
+
+            @SolBase.timed("ut.deco", slow_ms=30)
+            def _go(sleep_ms):
+                SolBase.sleep(sleep_ms)
+                return sleep_ms
+
+            # Decorator
+            self.assertEqual(_go(0), 0)
+            self.assertEqual(_go.__name__, "_go")
+
+            def _run():
+                SolBase.context_set("k_timed", "vv")
+                return _go(50)
+
+            g = gevent.spawn(_run)
+            g.join()
+            self.assertEqual(g.get(), 50)
+            d = Timed.get_stats()["ut.deco"]
+            self.assertEqual(d["count"], 2)
+            self.assertEqual(d["slow"], 1)
+            self.assertGreaterEqual(d["max_ms"], 50.0)
+
+            # Slow call line : single, with context
+            self.assertEqual(len(ar_record), 1)
+            self.assertIn("name=ut.deco", ar_record[0].getMessage())
+            self.assertIn("k_timed:vv", ar_record[0].kfilter)
+
+            # Context manager (exceptions are recorded)
+            with SolBase.timed("ut.with"):
+                pass
+            try:
+                with SolBase.timed("ut.with", slow_ms=0):
+                    raise Exception("TimedCrash")
+            except Exception:
+                pass
+            self.assertEqual(Timed.get_histogram("ut.with").get_count(), 2)
+            self.assertEqual(len(ar_record), 2)
+
+            # Cost (logged only)
+            f = SolBase.timed("ut.cost", slow_ms=1000)(lambda: None)
+            sw = SolBase.stopwatch()
+            for _ in range(0, 10000):
+                f()
+            logger.info("Timed cost (including call), ns=%s", sw.elapsed_ns() // 10000)
+
+            # Summary : one line per name, histograms reset
+            del ar_record[:]
+            Timed.log_summary()
+            self.assertEqual(len(ar_record), 3)
+            self.assertEqual(Timed.get_stats()["ut.deco"]["count"], 0)
+            self.assertEqual(Timed.get_stats()["ut.deco"]["slow"], 0)
+
+            # Context manager : per greenlet (shared instance, concurrent and nested)
+            t = SolBase.timed("ut.shared")
+
+            def _shared(sleep_ms):
+                with t:
+                    with t:
+                        SolBase.sleep(sleep_ms)
+                    SolBase.sleep(sleep_ms)
+
+            gevent.joinall([gevent.spawn(_shared, 40), gevent.spawn(_shared, 5)])
+            d = Timed.get_stats()["ut.shared"]
+            self.assertEqual(d["count"], 4)
+            self.assertLess(d["min_ms"], 30.0)
+            self.assertGreaterEqual(d["max_ms"], 80.0)
+            self.assertEqual(len(t._starts), 0)
+
+            # Summary : timer driven (no call needed), unref
+            del ar_record[:]
+            Timed.reset()
+            SolBase.timed_set_summary_interval_ms(10)
+            self.assertFalse(Timed._summary_task.ref)
+            _go(0)
+            _go(0)
+            SolBase.sleep(50)
+            self.assertEqual(len(ar_record), 1)
+            self.assertIn("Summary, name=ut.deco, count=2", ar_record[0].getMessage())
+        finally:
+            logging.getLogger("timed").removeHandler(h)
+            SolBase.timed_set_summary_interval_ms()
+            Timed.reset()
+
+    def test_run_blocking(self):
+        """
+        Test
+        """
+
+        old_size = BlockingRunner.get_pool_size()
+        SolBase.run_blocking_set_pool_size(2)
+        try:
+            d0 = SolBase.run_blocking_get_stats()
+            self.assertEqual(d0["pool_size"], 2)
+
+            def _block(sleep_ms, k=None):
+                # Native sleep (blocks the thread, not the hub)
+                native_sleep(sleep_ms * 0.001)
+                return threading.get_ident(), ContextFilter.get_kdict().get(k)
+
+            # Hub not blocked
+            count = [0]
+
+            def _tick():
+                while True:
+                    count[0] += 1
+                    SolBase.sleep(10)
+
+            g_tick = gevent.spawn(_tick)
+
+            def _run(i):
+                SolBase.context_set("k_blk", "v%s" % i)
+                return SolBase.run_blocking(_block, 100, k="k_blk")
+
+            ar = [gevent.spawn(_run, i) for i in range(0, 4)]
+            gevent.joinall(ar)
+            g_tick.kill()
+            self.assertGreaterEqual(count[0], 10)
+
+            # Context propagated, pool threads
+            self.assertEqual([g.get()[1] for g in ar], ["v0", "v1", "v2", "v3"])
+            self.assertNotIn(threading.get_ident(), [g.get()[0] for g in ar])
+
+            # No context leak toward next call (pool threads are re-used)
+            self.assertIsNone(SolBase.run_blocking(_block, 0, k="k_blk")[1])
+
+            # Exception, timeout
+            self.assertRaises(ZeroDivisionError, SolBase.run_blocking, lambda: 1 / 0)
+            self.assertRaises(Exception, SolBase.run_blocking, _block, 200, timeout=0.05)
+
+            # Stats (pool of 2 : 2 calls waited)
+            d = SolBase.run_blocking_get_stats()
+            logger.info("d=%s", d)
+            self.assertEqual(d["submitted"] - d0["submitted"], 7)
+            self.assertEqual(d["failed"] - d0["failed"], 1)
+            self.assertEqual(d["timeout"] - d0["timeout"], 1)
+            self.assertGreaterEqual(d["run_max_ms"], 100.0)
+            self.assertGreaterEqual(d["wait_max_ms"], 90.0)
+            SolBase.sleep(200)
+        finally:
+            SolBase.run_blocking_set_pool_size(old_size)
+
+    def test_hub_monitor(self):
+        """
+        Test
+        """
+
+        # Capture "hubmonitor" records (yielding handler, ie a gevent socket)
+        ar_record = list()
+
+        def _emit(r):
+            gevent.sleep(0)
+            ar_record.append(r)
+
+        h = logging.Handler()
+        h.emit = _emit
+        logging.getLogger("hubmonitor").addHandler(h)
+        try:
+            m = SolBase.hub_monitor_start(block_ms=50, tick_ms=10)
+            self.assertIs(SolBase.get_hub_monitor(), m)
+            # Unref : does not keep the hub alive
+            self.assertFalse(m._timer.ref)
+            self.assertTrue(m.is_running())
+
+            # Cooperative : no blocking
+            SolBase.sleep(200)
+            d = m.get_stats()
+            self.assertGreaterEqual(d["lag_count"], 10)
+            self.assertEqual(d["blocked"], 0)
+            self.assertEqual(len(ar_record), 0)
+
+            # Block the hub (unpatched sleep)
+            def _hog():
+                native_sleep(0.3)
+
+            _hog()
+            SolBase.sleep(50)
+            d = m.get_stats()
+            logger.info("d=%s", d)
+            self.assertEqual(d["blocked"], 1)
+            self.assertGreaterEqual(d["blocked_ms_max"], 250.0)
+            self.assertGreaterEqual(d["lag_max_ms"], 250.0)
+            self.assertEqual(len(ar_record), 1)
+            buf = ar_record[0].getMessage()
+            self.assertIn("Hub blocked", buf)
+            self.assertIn("in:_hog#", buf)
+            self.assertIn("in:test_hub_monitor#", buf)
+
+            # Fork : child keeps monitoring (thread restarted), stop does not wait for the parent thread
+            file_name = "/tmp/pythonsol_unittest.hub_fork"
+            if os.path.exists(file_name):
+                os.remove(file_name)
+            pid = os.fork()
+            if pid == 0:
+                blocked = m.get_stats()["blocked"]
+                _hog()
+                SolBase.sleep(50)
+                buf = "%s %s" % (m.is_running(), m.get_stats()["blocked"] - blocked)
+                ms = SolBase.mscurrent()
+                SolBase.hub_monitor_stop()
+                buf += " %s" % (SolBase.msdiff(ms) < 1000.0)
+                with open(file_name + ".tmp", "w") as f:
+                    f.write(buf)
+                os.rename(file_name + ".tmp", file_name)
+                os._exit(0)
+            os.waitpid(pid, 0)
+            with open(file_name) as f:
+                self.assertEqual(f.read(), "True 1 True")
+            os.remove(file_name)
+            self.assertEqual(m.get_stats()["blocked"], 1)
+        finally:
+            logging.getLogger("hubmonitor").removeHandler(h)
+            SolBase.hub_monitor_stop()
+        self.assertIsNone(SolBase.get_hub_monitor())
+        self.assertFalse(m.is_running())
+
     def test_machine_name(self):
         """
         Test
@@ -117,6 +486,113 @@ class TestBase(unittest.TestCase):
         self.assertGreaterEqual(SolBase.datediff(dt), 100)
         self.assertLessEqual(SolBase.datediff(dt), 200)
 
+    def test_date_batch(self):
+        """
+        Test
+        """
+
+        dt_naive = datetime(2024, 2, 29, 12, 34, 56, 789000)
+        dt_aware = pytz.timezone("Europe/Paris").localize(datetime(2024, 2, 29, 13, 34, 56, 789000))
+        ep = SolBase.dt_to_epoch(dt_naive)
+
+        # Single, millis
+        self.assertEqual(SolBase.dt_to_epoch_ms(dt_naive), ep * 1000 + 789)
+        self.assertEqual(SolBase.dt_to_epoch_ms(dt_aware), ep * 1000 + 789)
+        self.assertEqual(SolBase.epoch_ms_to_dt(ep * 1000 + 789), dt_naive)
+
+        # Batch
+        self.assertEqual(SolBase.dts_to_epoch([dt_naive, dt_aware]), [ep, ep])
+        self.assertEqual(SolBase.dts_to_epoch_ms((dt_naive, dt_aware)), [ep * 1000 + 789, ep * 1000 + 789])
+        self.assertEqual(SolBase.epochs_to_dt([ep, ep + 0.789]), [SolBase.epoch_to_dt(ep), dt_naive])
+        self.assertEqual(SolBase.epochs_ms_to_dt(array.array("q", [ep * 1000 + 789])), [dt_naive])
+        self.assertEqual(SolBase.epochs_to_dt(array.array("d", [ep + 0.789])), [dt_naive])
+        self.assertEqual(SolBase.dts_ensure_utc_naive([dt_naive, dt_aware]), [dt_naive, dt_naive])
+        ar = SolBase.dts_ensure_utc_aware([dt_naive, dt_aware])
+        self.assertEqual(ar, [SolBase.dt_ensure_utc_aware(dt_naive), SolBase.dt_ensure_utc_aware(dt_aware)])
+        self.assertEqual(ar[1].tzinfo, pytz.utc)
+        self.assertEqual(SolBase.dts_to_epoch([]), [])
+
+        # Before 1970 : floored (dt_to_epoch truncates, unchanged)
+        dt_neg = datetime(1969, 12, 31, 23, 59, 58, 500000)
+        self.assertEqual(SolBase.dt_to_epoch(dt_neg), -1)
+        self.assertEqual(SolBase.dt_to_epoch(datetime(1969, 12, 31, 23, 59, 59, 500000)), 0)
+        self.assertEqual(SolBase.dt_to_epoch_ms(dt_neg), -1500)
+        self.assertEqual(SolBase.dts_to_epoch([dt_neg, dt_neg.replace(tzinfo=timezone.utc)]), [-2, -2])
+        self.assertEqual(SolBase.dts_to_epoch_ms([dt_neg]), [-1500])
+        self.assertEqual(SolBase.epochs_to_dt([-1.5]), [dt_neg])
+        self.assertEqual(SolBase.epochs_ms_to_dt([-1500]), [dt_neg])
+
+        # Numpy (optional)
+        try:
+            import numpy as np
+        except ImportError:
+            logger.info("Numpy not available, bypass")
+            return
+
+        ar_ms = np.array([ep * 1000 + 789, 0, ep * 1000], dtype=np.int64)
+        ar_dt = SolBase.epochs_ms_to_dt(ar_ms)
+        self.assertEqual(ar_dt.dtype, np.dtype("datetime64[us]"))
+        self.assertEqual(ar_dt[0].astype(datetime), dt_naive)
+        self.assertTrue(np.array_equal(SolBase.dts_to_epoch_ms(ar_dt), ar_ms))
+        self.assertTrue(np.array_equal(SolBase.dts_to_epoch(ar_dt), ar_ms // 1000))
+        self.assertIs(SolBase.dts_ensure_utc_naive(ar_dt), ar_dt)
+
+        ar_dt = SolBase.epochs_to_dt(np.array([ep + 0.789, 0.0]))
+        self.assertEqual(ar_dt[0].astype(datetime), dt_naive)
+        self.assertEqual(SolBase.epochs_to_dt(np.array([ep]))[0].astype(datetime), SolBase.epoch_to_dt(ep))
+        self.assertEqual(SolBase.epochs_ms_to_dt(np.array([ep * 1000 + 789.0]))[0].astype(datetime), dt_naive)
+
+        # Before 1970 : same as non numpy
+        ar_dt = np.array([dt_neg, datetime(1969, 12, 31, 23, 59, 59, 999500)], dtype="datetime64[us]")
+        self.assertEqual(list(SolBase.dts_to_epoch(ar_dt)), SolBase.dts_to_epoch(ar_dt.tolist()))
+        self.assertEqual(list(SolBase.dts_to_epoch_ms(ar_dt)), SolBase.dts_to_epoch_ms(ar_dt.tolist()))
+        self.assertEqual(list(SolBase.dts_to_epoch(ar_dt)), [-2, -1])
+        self.assertEqual(list(SolBase.dts_to_epoch_ms(ar_dt)), [-1500, -1])
+        self.assertEqual(SolBase.epochs_to_dt(np.array([-1.5]))[0].astype(datetime), dt_neg)
+        self.assertEqual(SolBase.epochs_ms_to_dt(np.array([-1500]))[0].astype(datetime), dt_neg)
+
+    def test_tz(self):
+        """
+        Test
+        """
+
+        # Utc helpers
+        dt = datetime(2024, 3, 31, 0, 30, 0, 123456)
+        dt_paris = pytz.timezone("Europe/Paris").localize(datetime(2024, 3, 31, 1, 30, 0, 123456))
+        self.assertEqual(SolBase.dt_ensure_utc_naive(dt), dt)
+        self.assertEqual(SolBase.dt_ensure_utc_naive(dt_paris), dt)
+        self.assertIsNone(SolBase.dt_ensure_utc_naive(dt_paris).tzinfo)
+        for v in [dt, dt_paris, dt.replace(tzinfo=timezone.utc), dt.replace(tzinfo=pytz.utc)]:
+            r = SolBase.dt_ensure_utc_aware(v)
+            self.assertIs(r.tzinfo, pytz.utc)
+            self.assertEqual(r.replace(tzinfo=None), dt)
+
+        # Against pytz, around transitions (including 30 min dst and 45 min offsets)
+        for tz_name in ["Europe/Paris", "America/New_York", "Australia/Lord_Howe", "Asia/Kathmandu", "UTC"]:
+            tz = pytz.timezone(tz_name)
+            ar = list()
+            dt = datetime(2024, 1, 1)
+            while dt < datetime(2025, 1, 1):
+                ar.append(dt)
+                dt += timedelta(minutes=37, seconds=13)
+            ar_tz = SolBase.dts_to_tz(ar, tz_name)
+            for dt, dt_tz in zip(ar, ar_tz):
+                expected = pytz.utc.localize(dt).astimezone(tz)
+                self.assertEqual(dt_tz, expected)
+                self.assertEqual(dt_tz.replace(tzinfo=None), expected.replace(tzinfo=None))
+                self.assertEqual(dt_tz.utcoffset(), expected.utcoffset())
+                self.assertEqual(dt_tz.strftime("%Z"), expected.strftime("%Z"))
+            for dt in ar[0:len(ar):97]:
+                self.assertEqual(SolBase.dt_to_tz(dt, tz_name), pytz.utc.localize(dt).astimezone(tz))
+                self.assertEqual(SolBase.dt_to_tz(pytz.utc.localize(dt), tz_name), pytz.utc.localize(dt).astimezone(tz))
+
+        # Local to utc (ambiguous : first occurrence)
+        self.assertEqual(SolBase.dt_tz_to_utc_naive(datetime(2024, 7, 1, 12, 0), "Europe/Paris"), datetime(2024, 7, 1, 10, 0))
+        self.assertEqual(SolBase.dt_tz_to_utc_naive(datetime(2024, 10, 27, 2, 30), "Europe/Paris"), datetime(2024, 10, 27, 0, 30))
+
+        # Unknown
+        self.assertRaises(Exception, SolBase.dt_to_tz, dt, "Invalid/Zone")
+
     def test_conversion(self):
         """
         Test
@@ -192,3 +668,39 @@ class TestBase(unittest.TestCase):
             self.assertGreaterEqual(buf.find(seek_buf), 0, seek_buf)
             seek_buf = "/pysolbase_test/test_TestBase.py@" + str(local_line_exception) + " "
             self.assertGreaterEqual(buf.find(seek_buf), 0, seek_buf)
+
+    def test_extostr_fast(self):
+        """
+        Test
+        """
+
+        def _recurse(n):
+            if n == 0:
+                CrashMe.crash()
+            _recurse(n - 1)
+
+        try:
+            for max_level, max_path_level, depth in [(30, 5, 0), (30, 2, 0), (5, 5, 0), (30, 5, 40), (100, 5, 40)]:
+                try:
+                    _recurse(depth)
+                except Exception as e:
+                    # Same output as standard mode (twice : cached)
+                    buf = SolBase.extostr(e, max_level, max_path_level)
+                    self.assertEqual(SolBase.extostr(e, max_level, max_path_level, fast=True), buf)
+                    self.assertEqual(SolBase.extostr(e, max_level, max_path_level, fast=True), buf)
+                    if max_level == 5:
+                        self.assertTrue(buf.endswith("...]"))
+
+            # Default mode
+            SolBase.set_extostr_fast(True)
+            try:
+                CrashMe.crash()
+            except Exception as e:
+                buf = SolBase.extostr(e)
+                self.assertGreaterEqual(buf.find("e.bytes:[CrashException]"), 0)
+                seek_buf = "/pysolbase_test/CrashMe.py@" + str(CrashMe._lineException) + " "
+                self.assertGreaterEqual(buf.find(seek_buf), 0, seek_buf)
+                self.assertEqual(SolBase.extostr(e, fast=False), buf)
+            self.assertGreater(len(SolBase._extostr_cache), 0)
+        finally:
+            SolBase.set_extostr_fast(False)
@@ -0,0 +1,154 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+
+import logging
+import unittest
+
+from pysolbase.ExceptionAggregator import ExceptionAggregator
+from pysolbase.SolBase import SolBase
+from pysolbase_test.CrashMe import CrashMe
+
+logger = logging.getLogger(__name__)
+SolBase.voodoo_init()
+
+
+class TestExceptionAggregator(unittest.TestCase):
+    """
+    Test description
+    """
+
+    def setUp(self):
+        """
+        Test
+        """
+
+        # Capture "exagg" records
+        self.ar_record = list()
+        self.h = logging.Handler()
+        self.h.emit = self.ar_record.append
+        logging.getLogger("exagg").addHandler(self.h)
+
+    def tearDown(self):
+        """
+        Test
+        """
+
+        logging.getLogger("exagg").removeHandler(self.h)
+
+    def _crash_a(self, agg):
+        """
+        Crash, site a
+        """
+
+        try:
+            CrashMe.crash()
+        except Exception as e:
+            return agg.report(e, "Crash a")
+
+    def _crash_b(self, agg):
+        """
+        Crash, site b
+        """
+
+        try:
+            raise ValueError("Crash b")
+        except Exception as e:
+            return agg.report(e)
+
+    def test_aggregate(self):
+        """
+        Test
+        """
+
+        agg = ExceptionAggregator(window_ms=60000, summary_interval_ms=0)
+
+        # Storm
+        ar_fp_a = set(self._crash_a(agg) for _ in range(0, 1000))
+        ar_fp_b = set(self._crash_b(agg) for _ in range(0, 10))
+        self.assertEqual(len(ar_fp_a), 1)
+        self.assertEqual(len(ar_fp_b), 1)
+        fp_a = ar_fp_a.pop()
+        fp_b = ar_fp_b.pop()
+        self.assertNotEqual(fp_a, fp_b)
+
+        # Full log : once per fingerprint
+        self.assertEqual(len(self.ar_record), 2)
+        buf = self.ar_record[0].getMessage()
+        self.assertIn("Crash a, fp=%s" % fp_a, buf)
+        self.assertIn("e.bytes:[CrashException]", buf)
+        self.assertIn("/pysolbase_test/CrashMe.py@%s " % CrashMe._lineException, buf)
+        self.assertIn("e.cls:[ValueError]", self.ar_record[1].getMessage())
+
+        # Counts
+        d = agg.get_counts()
+        self.assertEqual(d[fp_a], {"cls": "Exception", "count": 1000, "suppressed": 999})
+        self.assertEqual(d[fp_b], {"cls": "ValueError", "count": 10, "suppressed": 9})
+        self.assertEqual(agg.get_stats(), {"reported": 1010, "logged": 2, "suppressed": 1008, "fingerprints": 2})
+
+        # Summary
+        del self.ar_record[:]
+        agg.log_summary()
+        self.assertEqual(len(self.ar_record), 2)
+        self.assertIn("999 occurrences of fingerprint %s" % fp_a, self.ar_record[0].getMessage())
+        self.assertEqual(agg.get_counts()[fp_a]["suppressed"], 0)
+        del self.ar_record[:]
+        agg.log_summary()
+        self.assertEqual(len(self.ar_record), 0)
+
+        # Stable fingerprint
+        self.assertEqual(self._crash_a(ExceptionAggregator()), fp_a)
+
+    def test_window_summary(self):
+        """
+        Test
+        """
+
+        agg = ExceptionAggregator(window_ms=50, summary_interval_ms=100)
+        self._crash_a(agg)
+        self._crash_a(agg)
+        self.assertEqual(len(self.ar_record), 1)
+
+        # New window : full log again
+        SolBase.sleep(60)
+        self._crash_a(agg)
+        self.assertEqual(len(self.ar_record), 2)
+
+        # Timer summary (no report needed)
+        self._crash_a(agg)
+        SolBase.sleep(60)
+        self.assertEqual(len(self.ar_record), 3)
+        self.assertIn("2 occurrences of fingerprint", self.ar_record[2].getMessage())
+
+        # Closed : no more summary
+        agg.close()
+        self._crash_a(agg)
+        fp = self._crash_a(agg)
+        SolBase.sleep(120)
+        self.assertEqual(len(self.ar_record), 4)
+        self.assertEqual(agg.get_counts()[fp]["suppressed"], 1)
+
+        # Max fingerprints
+        agg = ExceptionAggregator(max_fingerprints=1, summary_interval_ms=0)
+        self._crash_a(agg)
+        self._crash_a(agg)
+        self._crash_b(agg)
+        self.assertEqual(agg.get_stats()["fingerprints"], 1)
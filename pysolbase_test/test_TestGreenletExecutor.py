@@ -0,0 +1,196 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+
+import logging
+import unittest
+
+import gevent
+
+from pysolbase.SolBase import SolBase
+
+logger = logging.getLogger(__name__)
+SolBase.voodoo_init()
+
+
+class TestGreenletExecutor(unittest.TestCase):
+    """
+    Test description
+    """
+
+    def setUp(self):
+        """
+        Test
+        """
+        pass
+
+    def tearDown(self):
+        """
+        Test
+        """
+        pass
+
+    def test_submit(self):
+        """
+        Test
+        """
+
+        ex = SolBase.greenlet_executor(max_concurrency=4, max_queue=100)
+
+        def _go(sleep_ms, v):
+            SolBase.sleep(sleep_ms)
+            if v is None:
+                raise Exception("ExecCrash")
+            return v
+
+        ar = [ex.submit(_go, 20, i) for i in range(0, 20)]
+        ar.append(ex.submit(_go, 0, None))
+        ar.append(ex.submit(_go, v=42, sleep_ms=1))
+        self.assertEqual([a.get() for a in ar[0:20]], list(range(0, 20)))
+        self.assertRaises(Exception, ar[20].get)
+        self.assertEqual(ar[21].get(), 42)
+
+        d = ex.get_stats()
+        logger.info("d=%s", d)
+        self.assertEqual(d["submitted"], 22)
+        self.assertEqual(d["completed"], 21)
+        self.assertEqual(d["failed"], 1)
+        self.assertEqual(d["active"], 0)
+        self.assertEqual(d["active_max"], 4)
+        self.assertEqual(d["workers"], 4)
+        self.assertEqual(d["queued"], 0)
+        self.assertGreaterEqual(d["exec_max_ms"], 20.0)
+        self.assertGreaterEqual(d["wait_max_ms"], 80.0)
+
+        # Shutdown
+        ex.shutdown()
+        self.assertRaises(Exception, ex.submit, _go, 0, 1)
+
+    def test_overflow(self):
+        """
+        Test
+        """
+
+        # Reject
+        ex = SolBase.greenlet_executor(max_concurrency=1, max_queue=2, overflow="reject")
+        ar = [ex.submit(SolBase.sleep, 50) for _ in range(0, 2)]
+        self.assertRaises(Exception, ex.submit, SolBase.sleep, 50)
+        self.assertEqual(ex.get_stats()["rejected"], 1)
+        gevent.joinall([gevent.spawn(a.get) for a in ar])
+        ex.submit(SolBase.sleep, 0).get()
+
+        # Block
+        ex = SolBase.greenlet_executor(max_concurrency=1, max_queue=1, overflow="block")
+        sw = SolBase.stopwatch()
+        ar = [ex.submit(SolBase.sleep, 50) for _ in range(0, 3)]
+        self.assertGreaterEqual(sw.elapsed_ms(), 45.0)
+        for a in ar:
+            a.get()
+        self.assertEqual(ex.get_stats()["rejected"], 0)
+
+        # Bad
+        self.assertRaises(Exception, SolBase.greenlet_executor, 1, 1, "invalid")
+
+    def test_map(self):
+        """
+        Test
+        """
+
+        ex = SolBase.greenlet_executor(max_concurrency=8, max_queue=4)
+
+        def _go(v):
+            # Later arguments complete first
+            SolBase.sleep(100 - v * 5)
+            return v * 2
+
+        # Ordered
+        self.assertEqual(ex.map(_go, range(0, 20)), [v * 2 for v in range(0, 20)])
+
+        # Unordered : completion order
+        ar = list(ex.imap_unordered(_go, range(0, 8)))
+        self.assertEqual(sorted(ar), [v * 2 for v in range(0, 8)])
+        self.assertEqual(ar, [v * 2 for v in reversed(range(0, 8))])
+        self.assertEqual(ex.map(_go, range(0, 8), ordered=False), ar)
+
+        # Generator, lazily submitted
+        self.assertEqual(list(ex.imap(_go, (v for v in range(0, 10)))), [v * 2 for v in range(0, 10)])
+        self.assertEqual(ex.map(_go, []), [])
+
+        # Exception
+        def _crash(v):
+            if v == 3:
+                raise Exception("MapCrash")
+            return v
+
+        self.assertRaises(Exception, ex.map, _crash, range(0, 10))
+
+        # Iterable exception, after all submitted results are received : raised (no silent truncation)
+        def _gen():
+            yield 1
+            yield 2
+            SolBase.sleep(100)
+            raise Exception("GenCrash")
+
+        def _slow(v):
+            SolBase.sleep(20)
+            return v * 10
+
+        for ordered in (True, False):
+            ar = list()
+            with self.assertRaises(Exception) as ctx:
+                for v in ex.imap(_slow, _gen(), ordered=ordered):
+                    ar.append(v)
+                    SolBase.sleep(50)
+            self.assertIn("GenCrash", str(ctx.exception))
+            self.assertEqual(sorted(ar), [10, 20])
+        self.assertRaises(Exception, ex.map, _slow, _gen())
+        self.assertLessEqual(ex.get_stats()["active_max"], 8)
+        ex.shutdown()
+
+    def test_worker_failure(self):
+        """
+        Test
+        """
+
+        ex = SolBase.greenlet_executor(max_concurrency=1, max_queue=10)
+
+        # BaseException (gevent.Timeout) : set on the result, worker survives
+        def _timeout():
+            with gevent.Timeout(0.01):
+                SolBase.sleep(1000)
+
+        ar = ex.submit(_timeout)
+        self.assertRaises(gevent.Timeout, ar.get)
+        self.assertEqual(ex.submit(lambda: 1).get(timeout=1.0), 1)
+        self.assertEqual(ex.get_stats()["workers"], 1)
+
+        # Worker killed while pending tasks are queued : pruned and respawned
+        ar = [ex.submit(SolBase.sleep, 50), ex.submit(lambda: 2)]
+        SolBase.sleep(10)
+        ex._workers[0].kill()
+        self.assertRaises(gevent.GreenletExit, ar[0].get, timeout=1.0)
+        self.assertEqual(ar[1].get(timeout=1.0), 2)
+        d = ex.get_stats()
+        self.assertEqual(d["workers"], 1)
+        self.assertEqual(d["failed"], 2)
+        self.assertEqual(d["active"], 0)
+        ex.shutdown(timeout=1.0)
+        self.assertEqual(ex.get_stats()["workers"], 0)
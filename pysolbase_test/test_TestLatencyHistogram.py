@@ -0,0 +1,193 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+
+import logging
+import os
+import random
+import unittest
+
+from pysolbase.LatencyHistogram import LatencyHistogram
+from pysolbase.SolBase import SolBase
+
+logger = logging.getLogger(__name__)
+SolBase.voodoo_init()
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """
+    Test description
+    """
+
+    def setUp(self):
+        """
+        Test
+        """
+        pass
+
+    def tearDown(self):
+        """
+        Test
+        """
+        pass
+
+    def test_record(self):
+        """
+        Test
+        """
+
+        h = LatencyHistogram(max_ms=60000, precision_bits=7)
+        self.assertEqual(h.get_count(), 0)
+        self.assertEqual(h.get_percentile_ms(99.0), 0.0)
+
+        # 1..1000 ms
+        for i in range(1, 1001):
+            h.record_ms(i)
+        d = h.get_stats()
+        logger.info("d=%s", d)
+        self.assertEqual(d["count"], 1000)
+        self.assertEqual(d["min_ms"], 1.0)
+        self.assertEqual(d["max_ms"], 1000.0)
+        self.assertAlmostEqual(d["mean_ms"], 500.5)
+
+        # Relative error : 1 / 64
+        for k, expected in [("p50_ms", 500.0), ("p90_ms", 900.0), ("p99_ms", 990.0), ("p999_ms", 999.0)]:
+            self.assertAlmostEqual(d[k], expected, delta=expected / 64.0)
+        self.assertEqual(h.get_percentile_ms(100.0), 1000.0)
+        self.assertEqual(h.get_percentile_ms(0.0), 1.0)
+
+        # Small values are exact
+        h = LatencyHistogram()
+        for ns in range(0, 128):
+            h.record_ns(ns)
+        self.assertEqual(h.get_percentile_ms(50.0), 63 / 1000000.0)
+
+        # Clamp, negative
+        h = LatencyHistogram(max_ms=1000)
+        h.record_ms(5000)
+        h.record_ns(-1)
+        self.assertEqual(h.get_stats()["clamped"], 1)
+        self.assertEqual(h.get_max_ms(), 1000.0)
+        self.assertEqual(h.get_min_ms(), 0.0)
+
+        # Since
+        ns = SolBase.nscurrent()
+        SolBase.sleep(10)
+        self.assertGreaterEqual(h.record_since(ns), 10 * 1000000)
+        self.assertEqual(h.get_count(), 3)
+
+        # Reset
+        h.reset()
+        self.assertEqual(h.get_count(), 0)
+        self.assertEqual(h.get_max_ms(), 0.0)
+
+        # Bad settings
+        self.assertRaises(Exception, LatencyHistogram, 1000, 1)
+        self.assertRaises(Exception, LatencyHistogram, 0, 7)
+
+    def test_bucket_index(self):
+        """
+        Test
+        """
+
+        h = LatencyHistogram(max_ms=1000, precision_bits=5)
+        prev = -1
+        for v in range(0, 5000):
+            idx = h._get_index(v)
+            self.assertGreaterEqual(idx, prev)
+            prev = idx
+
+        for v in list(range(0, 5000)) + [random.randint(0, 1000000000) for _ in range(0, 5000)]:
+            idx = h._get_index(v)
+            lo, width = h._get_bucket_range(idx)
+            self.assertTrue(lo <= v < lo + width, "v=%s, idx=%s, lo=%s, width=%s" % (v, idx, lo, width))
+
+    def test_merge_serialize(self):
+        """
+        Test
+        """
+
+        h1 = LatencyHistogram()
+        h2 = LatencyHistogram()
+        h_all = LatencyHistogram()
+        for i in range(0, 2000):
+            ms = random.uniform(0.01, 500.0)
+            (h1 if i % 2 else h2).record_ms(ms)
+            h_all.record_ms(ms)
+
+        # Merge
+        h = LatencyHistogram().merge(h1).merge(h2)
+        self.assertEqual(h.get_stats(), h_all.get_stats())
+        self.assertEqual(h.to_bytes(), h_all.to_bytes())
+
+        # Binary
+        buf = h1.to_bytes()
+        self.assertLess(len(buf), 16 * 1024)
+        self.assertEqual(LatencyHistogram.from_bytes(buf).get_stats(), h1.get_stats())
+        self.assertEqual(LatencyHistogram.from_bytes(buf).merge_bytes(h2.to_bytes()).get_stats(), h_all.get_stats())
+
+        # Text
+        buf = h_all.to_text()
+        self.assertIsInstance(buf, str)
+        self.assertEqual(LatencyHistogram.from_text(buf).get_stats(), h_all.get_stats())
+
+        # Empty
+        self.assertEqual(LatencyHistogram.from_bytes(LatencyHistogram().to_bytes()).get_count(), 0)
+
+        # Incompatible
+        self.assertRaises(Exception, h1.merge, LatencyHistogram(precision_bits=8))
+        self.assertRaises(Exception, h1.merge_bytes, LatencyHistogram(max_ms=10).to_bytes())
+        self.assertRaises(Exception, LatencyHistogram.from_bytes, b"XXXX" + buf.encode("ascii"))
+
+    def test_merge_fork(self):
+        """
+        Test
+        """
+
+        # Child serializes toward a file
+        file_name = "/tmp/pythonsol_unittest.hist"
+        if os.path.exists(file_name):
+            os.remove(file_name)
+        pid = os.fork()
+        if pid == 0:
+            # Child
+            h = LatencyHistogram()
+            for i in range(1, 101):
+                h.record_ms(i)
+            with open(file_name + ".tmp", "wb") as f:
+                f.write(h.to_bytes())
+            os.rename(file_name + ".tmp", file_name)
+            os._exit(0)
+
+        # Parent
+        os.waitpid(pid, 0)
+        with open(file_name, "rb") as f:
+            buf = f.read()
+        os.remove(file_name)
+
+        h = LatencyHistogram()
+        for i in range(101, 201):
+            h.record_ms(i)
+        h.merge_bytes(buf)
+        self.assertEqual(h.get_count(), 200)
+        self.assertEqual(h.get_min_ms(), 1.0)
+        self.assertEqual(h.get_max_ms(), 200.0)
+        self.assertAlmostEqual(h.get_percentile_ms(50.0), 100.0, delta=100.0 / 64.0)
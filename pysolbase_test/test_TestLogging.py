@@ -22,15 +22,27 @@
 # ===============================================================================
 """
 import glob
+import gzip
+import json
 import logging
+import lzma
 import os
+import socket
+import time
 import unittest
+from datetime import datetime
+from logging.handlers import SysLogHandler
 from os.path import dirname, abspath
 
 import gevent
 
+from pysolbase.CachedTimeFormatter import CachedTimeFormatter
+from pysolbase.ContextFilter import ContextFilter
 from pysolbase.FileUtility import FileUtility
+from pysolbase.QueuedHandler import QueuedHandler
+from pysolbase.RateLimitFilter import RateLimitFilter
 from pysolbase.SolBase import SolBase
+from pysolbase.SysLogFramer import SysLogFramer
 from pysolbase.SysLogger import SysLogger
 
 logger = logging.getLogger(__name__)
@@ -162,6 +174,352 @@ class TestLogging(unittest.TestCase):
         self.assertGreaterEqual(self.lastMessage.find(SolBase.get_machine_name() + " |"), 0)
         logger.info("Received ==> %s", repr(self.lastMessage))
 
+    def test_syslog_framer(self):
+        """
+        Test
+        """
+
+        SolBase.set_compo_name("COMPO_XXX")
+        mn = SolBase.get_machine_name()
+
+        # Legacy
+        f = SysLogFramer(facility=SysLogHandler.LOG_LOCAL0)
+        buf = f.frame("INFO", u"TEST \u0BD9 LOG")
+        self.assertEqual(buf, u"<134>COMPO_XXX: {0} | COMPO_XXX | TEST \u0BD9 LOG\000".format(mn).encode("utf-8"))
+        self.assertEqual(f.frame("ERROR", "z")[0:5], b"<131>")
+
+        # Compo name change : header invalidated
+        SolBase.set_compo_name("COMPO_YYY")
+        buf = f.frame("WARNING", "TEST")
+        self.assertEqual(buf, u"<132>COMPO_YYY: {0} | COMPO_YYY | TEST\000".format(mn).encode("utf-8"))
+
+        # Rfc5424
+        f = SysLogFramer(facility=SysLogHandler.LOG_LOCAL0, frame_format="rfc5424")
+        buf = f.frame("INFO", "TEST", 0.123)
+        self.assertEqual(buf, u"<134>1 1970-01-01T00:00:00.123Z {0} COMPO_YYY {1} - - TEST".format(mn.replace(" ", "_"), os.getpid()).encode("utf-8"))
+
+        # Syslogger
+        SolBase.logging_init("INFO", True, log_to_console=False, log_callback=self._on_log, log_to_syslog_format="rfc5424")
+        self.onLogCallCount = 0
+        logger.info("TEST LOG 5424")
+        self.assertEqual(self.onLogCallCount, 1)
+        self.assertIn(" COMPO_YYY %s - - " % os.getpid(), self.lastMessage)
+        self.assertIn("TEST LOG 5424", self.lastMessage)
+
+        # Reset
+        SolBase.logging_init("INFO", True)
+
+    @classmethod
+    def _parse_octet_counting(cls, buf):
+        """
+        Parse rfc6587 octet-counting frames
+        :param buf: bytes
+        :type buf: bytes
+        :return list
+        :rtype list
+        """
+
+        ar = list()
+        while buf:
+            idx = buf.index(b" ")
+            size = int(buf[0:idx])
+            ar.append(buf[idx + 1:idx + 1 + size])
+            buf = buf[idx + 1 + size:]
+        return ar
+
+    def test_syslog_stream(self):
+        """
+        Test
+        """
+
+        from gevent.server import StreamServer
+
+        ar_recv = list()
+
+        def _on_client(soc, _):
+            while True:
+                b = soc.recv(65536)
+                if not b:
+                    break
+                ar_recv.append(b)
+
+        # Get a free port, server not started
+        server = StreamServer(("127.0.0.1", 0), _on_client)
+        server.init_socket()
+        port = server.address[1]
+        server.close()
+
+        SolBase.set_compo_name("COMPO_XXX")
+        h = SysLogger(address=("127.0.0.1", port), socktype=socket.SOCK_STREAM, reconnect_min_ms=50)
+        h.setFormatter(logging.Formatter("%(message)s"))
+
+        # Server down : pending (emit only appends, the sender greenlet connects)
+        h.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (0,), None))
+        h.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (1,), None))
+        self.assertEqual(h.get_stats()["connect_failed"], 0)
+        SolBase.sleep(10)
+        d = h.get_stats()
+        self.assertEqual(d["connect_failed"], 1)
+        self.assertEqual(d["sent"], 0)
+        self.assertGreater(d["pending_bytes"], 0)
+
+        # Server up, after backoff : everything is delivered in order
+        server = StreamServer(("127.0.0.1", port), _on_client)
+        server.start()
+        try:
+            SolBase.sleep(100)
+            for i in range(2, 100):
+                h.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (i,), None))
+            SolBase.sleep(100)
+
+            ar = self._parse_octet_counting(b"".join(ar_recv))
+            self.assertEqual(len(ar), 100)
+            for i, b in enumerate(ar):
+                self.assertEqual(b, u"<142>COMPO_XXX: {0} | COMPO_XXX | msg {1}".format(SolBase.get_machine_name(), i).encode("utf-8"))
+            d = h.get_stats()
+            self.assertEqual(d["connect"], 1)
+            self.assertEqual(d["sent"], 100)
+            self.assertEqual(d["pending_bytes"], 0)
+            self.assertEqual(d["send_failed"], 0)
+
+            # Fork : child closes the inherited connection, parent keeps it
+            file_name = "/tmp/pythonsol_unittest.syslog_fork"
+            if os.path.exists(file_name):
+                os.remove(file_name)
+            pid = os.fork()
+            if pid == 0:
+                with open(file_name + ".tmp", "w") as f:
+                    f.write("%s %s" % (h.socket is None, h._stream_pending_bytes))
+                os.rename(file_name + ".tmp", file_name)
+                os._exit(0)
+            os.waitpid(pid, 0)
+            with open(file_name) as f:
+                self.assertEqual(f.read(), "True 0")
+            os.remove(file_name)
+
+            h.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (100,), None))
+            SolBase.sleep(50)
+            self.assertEqual(len(self._parse_octet_counting(b"".join(ar_recv))), 101)
+            self.assertEqual(h.get_stats()["connect"], 1)
+        finally:
+            h.close()
+            server.stop()
+
+    def test_syslog_stream_spill(self):
+        """
+        Test
+        """
+
+        from gevent.server import StreamServer
+
+        spool_file = "/tmp/pythonsol_unittest.spool"
+        if FileUtility.is_path_exist(spool_file):
+            os.remove(spool_file)
+
+        ar_recv = list()
+
+        def _on_client(soc, _):
+            while True:
+                b = soc.recv(65536)
+                if not b:
+                    break
+                ar_recv.append(b)
+
+        # Get a free port, server not started
+        server = StreamServer(("127.0.0.1", 0), _on_client)
+        server.init_socket()
+        port = server.address[1]
+        server.close()
+
+        # Tiny pending buffer : records go to spool
+        h = SysLogger(address=("127.0.0.1", port), socktype=socket.SOCK_STREAM, reconnect_min_ms=50, stream_max_pending_bytes=1, spool_file=spool_file)
+        h.setFormatter(logging.Formatter("%(message)s"))
+        server = StreamServer(("127.0.0.1", port), _on_client)
+        try:
+            for i in range(0, 50):
+                h.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (i,), None))
+            d = h.get_stats()
+            self.assertEqual(d["spooled"], 50)
+            self.assertEqual(d["sent"], 0)
+
+            # Server up : replay greenlet delivers everything, in order
+            server.start()
+            SolBase.sleep(250)
+            ar = self._parse_octet_counting(b"".join(ar_recv))
+            self.assertEqual(len(ar), 50)
+            for i, b in enumerate(ar):
+                self.assertTrue(b.endswith(u"| msg {0}".format(i).encode("utf-8")), b)
+            d = h.get_stats()
+            self.assertEqual(d["replayed"], 50)
+            self.assertEqual(d["spool_bytes"], 0)
+        finally:
+            h.close()
+            server.stop()
+            if FileUtility.is_path_exist(spool_file):
+                os.remove(spool_file)
+
+    def test_spool_file(self):
+        """
+        Test
+        """
+
+        from pysolbase.SpoolFile import SpoolFile
+
+        spool_file = "/tmp/pythonsol_unittest.spool"
+        if FileUtility.is_path_exist(spool_file):
+            os.remove(spool_file)
+
+        # 10 records of 4+96 bytes, compaction above 500 consumed bytes
+        sp = SpoolFile(spool_file, max_bytes=1000)
+        try:
+            for i in range(0, 10):
+                self.assertTrue(sp.append(b"%02d" % i + b"x" * 94))
+            self.assertFalse(sp.append(b"z"))
+            self.assertEqual(sp.get_size(), 1000)
+
+            # Bounded peek, nothing consumed
+            self.assertEqual(sp.peek(max_records=1), [b"00" + b"x" * 94])
+            ar = sp.peek(max_bytes=250)
+            self.assertEqual([b[0:2] for b in ar], [b"00", b"01", b"02"])
+            self.assertEqual(sp.get_size(), 1000)
+
+            # Partial consume
+            sp.consume(ar[0:2])
+            self.assertEqual(sp.get_size(), 800)
+            self.assertEqual(sp.peek(max_records=1)[0][0:2], b"02")
+
+            # Compaction (file size drops), order kept
+            sp.consume(sp.peek(max_bytes=300))
+            d = sp.get_stats()
+            self.assertEqual(d["compact"], 1)
+            self.assertEqual(d["size"], 500)
+            self.assertEqual(FileUtility.get_file_size(spool_file), 500)
+            self.assertTrue(sp.append(b"10"))
+
+            # Consumed records are dropped on close, remaining ones are kept
+            sp.consume(sp.peek(max_records=1))
+            sp.close()
+            sp = SpoolFile(spool_file, max_bytes=1000)
+            ar = sp.pop_all()
+            self.assertEqual([b[0:2] for b in ar], [b"06", b"07", b"08", b"09", b"10"])
+            self.assertEqual(sp.get_size(), 0)
+            self.assertEqual(FileUtility.get_file_size(spool_file), 0)
+        finally:
+            sp.remove()
+
+    def test_syslog_batch(self):
+        """
+        Test
+        """
+
+        # Udp target
+        soc = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        soc.bind(("127.0.0.1", 0))
+        soc.settimeout(1.0)
+
+        h = SysLogger(address=soc.getsockname(), batch_max_records=10, batch_max_ms=50)
+        h.setFormatter(logging.Formatter("%(message)s"))
+        try:
+            # Batched, not yet sent
+            for i in range(0, 5):
+                h.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (i,), None))
+            self.assertEqual(h.get_stats()["sent"], 0)
+
+            # Sent after batch_max_ms
+            SolBase.sleep(100)
+            self.assertEqual(h.get_stats()["sent"], 5)
+
+            # Full batch : not sent by the caller, flusher sends it on next context switch
+            for i in range(5, 15):
+                h.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (i,), None))
+            self.assertEqual(h.get_stats()["sent"], 5)
+            SolBase.sleep(0)
+            self.assertEqual(h.get_stats()["sent"], 15)
+
+            # Error : sent inline (with previous ones)
+            h.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (15,), None))
+            self.assertIsNotNone(h._batch_greenlet)
+            h.handle(logging.LogRecord("zzz", logging.ERROR, __file__, 1, "msg %s", (16,), None))
+            self.assertEqual(h.get_stats()["sent"], 17)
+            self.assertIsNone(h._batch_greenlet)
+
+            # Check datagrams (one per record, in order)
+            for i in range(0, 17):
+                b = soc.recv(65536)
+                self.assertTrue(b.endswith(u"| msg {0}\000".format(i).encode("utf-8")), b)
+        finally:
+            h.close()
+            soc.close()
+
+    def test_syslog_spill(self):
+        """
+        Test
+        """
+
+        soc_file = "/tmp/pythonsol_unittest.sock"
+        spool_file = "/tmp/pythonsol_unittest.spool"
+        for f in [soc_file, spool_file]:
+            if FileUtility.is_path_exist(f):
+                os.remove(f)
+
+        def _bind():
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            s.bind(soc_file)
+            s.settimeout(1.0)
+            return s
+
+        def _emit(i):
+            h.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (i,), None))
+
+        soc = _bind()
+        h = SysLogger(address=soc_file, reconnect_min_ms=100, spool_file=spool_file, spool_max_bytes=1024 * 1024)
+        h.setFormatter(logging.Formatter("%(message)s"))
+        try:
+            # Sink up
+            _emit(0)
+            self.assertTrue(soc.recv(65536).endswith(b"| msg 0\000"))
+
+            # Sink down : spooled, no reconnect per record
+            soc.close()
+            os.remove(soc_file)
+            for i in range(1, 10):
+                _emit(i)
+            d = h.get_stats()
+            self.assertEqual(d["sent"], 1)
+            self.assertEqual(d["spooled"], 9)
+            self.assertGreater(d["spool_bytes"], 0)
+            self.assertGreater(FileUtility.get_file_size(spool_file), 0)
+
+            # Failed probe : single record, nothing re-spooled
+            SolBase.sleep(150)
+            d = h.get_stats()
+            self.assertEqual(d["connect_failed"], 1)
+            self.assertEqual(d["sent"], 1)
+            self.assertEqual(d["spooled"], 9)
+
+            # Sink up, before probe : still spooled
+            soc = _bind()
+            _emit(10)
+            self.assertEqual(h.get_stats()["spooled"], 10)
+
+            # After probe delay : replayed by the replay greenlet, then send
+            SolBase.sleep(250)
+            self.assertEqual(h.get_stats()["replayed"], 10)
+            _emit(11)
+            d = h.get_stats()
+            self.assertEqual(d["replayed"], 10)
+            self.assertEqual(d["sent"], 12)
+            self.assertEqual(d["spool_bytes"], 0)
+            for i in range(1, 12):
+                b = soc.recv(65536)
+                self.assertTrue(b.endswith(u"| msg {0}\000".format(i).encode("utf-8")), b)
+        finally:
+            h.close()
+            soc.close()
+            for f in [soc_file, spool_file]:
+                if FileUtility.is_path_exist(f):
+                    os.remove(f)
+
     def test_log_to_file(self):
         """
         Test
@@ -211,6 +569,576 @@ class TestLogging(unittest.TestCase):
         self.assertGreaterEqual(buf.find("TOTO"), 0)
         self.assertGreaterEqual(buf.find("TEST LOG 999"), 0)
 
+    def test_log_queued(self):
+        """
+        Test
+        """
+
+        log_file = "/tmp/pythonsol_unittest.log"
+
+        for drain_mode in ["greenlet", "thread"]:
+            # Clean
+            if FileUtility.is_file_exist(log_file):
+                os.remove(log_file)
+
+            # Init
+            SolBase.logging_init(log_level="INFO",
+                                 log_to_file=log_file,
+                                 log_to_console=False,
+                                 log_to_syslog=False,
+                                 force_reset=True,
+                                 log_queued=True,
+                                 log_queued_drain=drain_mode)
+
+            # Single queued handler on root
+            self.assertEqual(len(logging.getLogger().handlers), 1)
+            q = logging.getLogger().handlers[0]
+            self.assertIsInstance(q, QueuedHandler)
+
+            # Emit (context is captured on caller side)
+            SolBase.context_set("k_ip", "QQ01")
+            logger.info("TEST LOG QUEUED %s", drain_mode)
+            q.flush()
+
+            # Check
+            buf = FileUtility.file_to_textbuffer(log_file, "utf-8")
+            self.assertIsNotNone(buf)
+            self.assertIn("TEST LOG QUEUED " + drain_mode, buf)
+            self.assertIn("k_ip:QQ01 ", buf)
+
+            d = q.get_stats()
+            self.assertGreaterEqual(d["enqueued"], 1)
+            self.assertGreaterEqual(d["emitted"], 1)
+            self.assertEqual(d["dropped"], 0)
+            self.assertEqual(d["depth"], 0)
+
+        # Reset
+        SolBase.logging_init("INFO", True)
+
+    def test_log_queued_overflow(self):
+        """
+        Test
+        """
+
+        ar_recv = list()
+
+        class ListHandler(logging.Handler):
+            def emit(self, record):
+                ar_recv.append(record.getMessage())
+
+        # Drop new : no context switch, drainer never runs, overflowing records are dropped
+        q = QueuedHandler([ListHandler()], queue_size=5, overflow="drop_new")
+        for i in range(0, 10):
+            q.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (i,), None))
+        d = q.get_stats()
+        self.assertEqual(d["enqueued"], 5)
+        self.assertEqual(d["dropped"], 5)
+        self.assertEqual(d["depth_max"], 5)
+        q.close()
+        self.assertEqual(ar_recv, ["msg %s" % i for i in range(0, 5)])
+
+        # Drop oldest
+        del ar_recv[:]
+        q = QueuedHandler([ListHandler()], queue_size=5, overflow="drop_oldest")
+        for i in range(0, 10):
+            q.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (i,), None))
+        d = q.get_stats()
+        self.assertEqual(d["enqueued"], 10)
+        self.assertEqual(d["dropped"], 5)
+        q.close()
+        self.assertEqual(ar_recv, ["msg %s" % i for i in range(5, 10)])
+
+        # Block : caller waits for drainer
+        del ar_recv[:]
+        q = QueuedHandler([ListHandler()], queue_size=5, overflow="block")
+        for i in range(0, 10):
+            q.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg %s", (i,), None))
+        q.close()
+        self.assertEqual(q.get_stats()["dropped"], 0)
+        self.assertEqual(ar_recv, ["msg %s" % i for i in range(0, 10)])
+
+    def test_log_queued_thread_fork(self):
+        """
+        Test
+        """
+
+        file_name = "/tmp/pythonsol_unittest.queued_fork"
+        if os.path.exists(file_name):
+            os.remove(file_name)
+
+        ar_recv = list()
+
+        class ListHandler(logging.Handler):
+            def emit(self, record):
+                ar_recv.append(record.getMessage())
+
+        # Hub dependent targets are rejected
+        self.assertRaises(Exception, QueuedHandler, [SysLogger(batch_max_records=10)], drain_mode="thread")
+
+        q = QueuedHandler([ListHandler()], overflow="block", drain_mode="thread")
+        q.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "parent", None, None))
+        q.flush()
+        pid = os.fork()
+        if pid == 0:
+            # Child : drainer thread is restarted
+            del ar_recv[:]
+            for i in range(0, 3):
+                q.handle(logging.LogRecord("zzz", logging.INFO, __file__, 1, "child %s", (i,), None))
+            q.flush()
+            with open(file_name + ".tmp", "w") as f:
+                f.write(",".join(ar_recv))
+            os.rename(file_name + ".tmp", file_name)
+            os._exit(0)
+
+        # Parent
+        os.waitpid(pid, 0)
+        with open(file_name) as f:
+            buf = f.read()
+        os.remove(file_name)
+        q.close()
+        self.assertEqual(buf, "child 0,child 1,child 2")
+        self.assertEqual(ar_recv, ["parent"])
+
+    def test_context_filter_cache(self):
+        """
+        Test
+        """
+
+        def _run(ip_addr):
+            # Empty context (new greenlet)
+            self.assertEqual(ContextFilter.get_kfilter(), " ")
+
+            SolBase.context_set("k_ip", ip_addr)
+            SolBase.context_set("a_value", 1)
+            s = ContextFilter.get_kfilter()
+            self.assertEqual(s, " a_value:1 k_ip:%s " % ip_addr)
+
+            # Cached
+            self.assertIs(ContextFilter.get_kfilter(), s)
+
+            # Same value : no invalidation
+            SolBase.context_set("a_value", 1)
+            self.assertIs(ContextFilter.get_kfilter(), s)
+
+            # New value : invalidation
+            SolBase.context_set("a_value", 2)
+            self.assertEqual(ContextFilter.get_kfilter(), " a_value:2 k_ip:%s " % ip_addr)
+
+            # Rendered once per record, reused across filter calls
+            f = ContextFilter()
+            r = logging.LogRecord("zzz", logging.INFO, __file__, 1, "msg", None, None)
+            self.assertTrue(f.filter(r))
+            SolBase.context_set("a_value", 3)
+            self.assertTrue(f.filter(r))
+            self.assertEqual(r.kfilter, " a_value:2 k_ip:%s " % ip_addr)
+
+        g1 = gevent.spawn(_run, "ip001")
+        g2 = gevent.spawn(_run, "ip002")
+        gevent.joinall([g1, g2], raise_error=True)
+
+    def test_log_json(self):
+        """
+        Test
+        """
+
+        log_file = "/tmp/pythonsol_unittest.log"
+
+        # Clean
+        if FileUtility.is_file_exist(log_file):
+            os.remove(log_file)
+
+        # Init
+        SolBase.logging_init(log_level="INFO",
+                             log_to_file=log_file,
+                             log_to_console=False,
+                             log_to_syslog=False,
+                             force_reset=True,
+                             log_format="json")
+
+        def _run():
+            SolBase.context_set("k_ip", "JJ01")
+            SolBase.context_set("z_obj", object)
+            ms = int(SolBase.mscurrent())
+            logger.info("TEST LOG JSON \u0BD9 %s", 1)
+            try:
+                raise Exception("JsonCrash")
+            except Exception:
+                logger.warning("TEST LOG JSON EX", exc_info=True)
+            return ms
+
+        g = gevent.spawn(_run)
+        g.join()
+        ms = g.get()
+
+        # Check
+        ar = [line for line in FileUtility.file_to_textbuffer(log_file, "utf-8").strip().split("\n") if line.find("TEST LOG JSON") >= 0]
+        self.assertEqual(len(ar), 2)
+        d = json.loads(ar[0])
+        self.assertEqual(d["msg"], u"TEST LOG JSON \u0BD9 1")
+        self.assertEqual(d["level"], "INFO")
+        self.assertEqual(d["func"], "_run")
+        self.assertEqual(d["k_ip"], "JJ01")
+        self.assertEqual(d["z_obj"], str(object))
+        self.assertIsInstance(d["ts"], int)
+        self.assertLessEqual(abs(d["ts"] - ms), 1000)
+        self.assertNotIn("kfilter", d)
+        self.assertNotIn("exc", d)
+
+        d = json.loads(ar[1])
+        self.assertEqual(d["msg"], "TEST LOG JSON EX")
+        self.assertIn("JsonCrash", d["exc"])
+
+        # Reset
+        SolBase.logging_init("INFO", True)
+
+    def test_log_time_mode(self):
+        """
+        Test
+        """
+
+        r = logging.LogRecord("n", logging.INFO, "p", 1, "m", None, None)
+        r.created = 1709210096.789
+        r.msecs = 789.0
+
+        # Default : same as logging
+        self.assertEqual(CachedTimeFormatter("%(asctime)s").format(r), logging.Formatter("%(asctime)s").format(r))
+        self.assertEqual(CachedTimeFormatter("%(asctime)s", datefmt="%H:%M").format(r), logging.Formatter("%(asctime)s", datefmt="%H:%M").format(r))
+
+        # Converter honored (instance and class level), in a non utc timezone
+        tz = os.environ.get("TZ")
+        os.environ["TZ"] = "Europe/Paris"
+        time.tzset()
+        try:
+            f = CachedTimeFormatter("%(asctime)s")
+            f.converter = time.gmtime
+            self.assertEqual(f.format(r), "2024-02-29 12:34:56,789")
+            f = CachedTimeFormatter("%(asctime)s", datefmt="%H:%M")
+            f.converter = time.gmtime
+            self.assertEqual(f.format(r), "12:34")
+            self.assertEqual(CachedTimeFormatter("%(asctime)s").format(r), "2024-02-29 13:34:56,789")
+            try:
+                logging.Formatter.converter = time.gmtime
+                self.assertEqual(CachedTimeFormatter("%(asctime)s").format(r), logging.Formatter("%(asctime)s").format(r))
+                self.assertEqual(CachedTimeFormatter("%(asctime)s").format(r), "2024-02-29 12:34:56,789")
+            finally:
+                logging.Formatter.converter = time.localtime
+        finally:
+            if tz is None:
+                del os.environ["TZ"]
+            else:
+                os.environ["TZ"] = tz
+            time.tzset()
+
+        # Iso
+        self.assertEqual(CachedTimeFormatter("%(asctime)s", time_mode="utc_iso").format(r), "2024-02-29T12:34:56.789Z")
+        s = CachedTimeFormatter("%(asctime)s", time_mode="local_iso").format(r)
+        self.assertEqual(datetime.strptime(s, "%Y-%m-%dT%H:%M:%S.%f%z").timestamp(), r.created)
+        self.assertEqual(CachedTimeFormatter("%(asctime)s", time_mode="epoch_ms").format(r), "1709210096789")
+        self.assertRaises(Exception, CachedTimeFormatter, "%(asctime)s", None, "invalid")
+
+        # Cache : same second, other millis
+        f = CachedTimeFormatter("%(asctime)s", time_mode="utc_iso")
+        f.format(r)
+        r.created = 1709210096.012
+        r.msecs = 12.0
+        self.assertEqual(f.format(r), "2024-02-29T12:34:56.012Z")
+        r.created = 1709210097.5
+        r.msecs = 500.0
+        self.assertEqual(f.format(r), "2024-02-29T12:34:57.500Z")
+
+        # Logging init
+        SolBase.logging_init("INFO", True, log_to_console=False, log_callback=self._on_log, log_time_mode="utc_iso")
+        self.onLogCallCount = 0
+        logger.info("TEST LOG TIME")
+        self.assertEqual(self.onLogCallCount, 1)
+        self.assertRegex(self.lastMessage, r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z \| INFO \| ")
+
+        # Reset
+        SolBase.logging_init("INFO", True)
+
+    def test_log_rate_limit(self):
+        """
+        Test
+        """
+
+        # Bucket : 5 records, almost no refill
+        f = RateLimitFilter(rate_per_sec=0.001, burst=5, summary_interval_ms=0)
+        SolBase.logging_init("INFO", True, log_to_console=False, log_callback=self._on_log, log_rate_limit_filter=f, log_to_file="/tmp/pythonsol_unittest.log")
+        self.assertEqual(len(logging.getLogger().handlers), 2)
+
+        self.onLogCallCount = 0
+        d0 = f.get_stats()
+        for i in range(0, 20):
+            logger.info("TEST LOG RL %s", i)
+        self.assertEqual(self.onLogCallCount, 5)
+        self.assertEqual(self.lastMessage.find("TEST LOG RL 4"), self.lastMessage.find("TEST LOG RL"))
+
+        # Decision taken once per record (2 handlers)
+        d = f.get_stats()
+        self.assertEqual(d["passed"] - d0["passed"], 5)
+        self.assertEqual(d["suppressed"] - d0["suppressed"], 15)
+        self.assertEqual(d["sites"] - d0["sites"], 1)
+
+        # Another call site has its own bucket
+        logger.info("TEST LOG RL OTHER")
+        self.assertEqual(self.onLogCallCount, 6)
+
+        # Summary
+        f.log_summary()
+        self.assertEqual(self.onLogCallCount, 7)
+        self.assertIn("Suppressed 15 records", self.lastMessage)
+        self.assertIn("test_TestLogging.py@", self.lastMessage)
+        f.log_summary()
+        self.assertEqual(self.onLogCallCount, 7)
+
+        # Summary : timer driven (no record needed)
+        f = RateLimitFilter(rate_per_sec=0.001, burst=1, summary_interval_ms=50)
+        SolBase.logging_init("INFO", True, log_to_console=False, log_callback=self._on_log, log_rate_limit_filter=f)
+        self.onLogCallCount = 0
+        for i in range(0, 3):
+            logger.info("TEST LOG RL %s", i)
+        self.assertEqual(self.onLogCallCount, 1)
+        SolBase.sleep(100)
+        self.assertEqual(self.onLogCallCount, 2)
+        self.assertIn("Suppressed 2 records", self.lastMessage)
+
+        # Logging reset : summary task cancelled, restarted if registered again
+        task = f._summary_task
+        SolBase.logging_init("INFO", True, log_to_console=False, log_callback=self._on_log)
+        self.assertIsNone(f._summary_task)
+        self.assertFalse(task.is_scheduled())
+        SolBase.logging_init("INFO", True, log_to_console=False, log_callback=self._on_log, log_rate_limit_filter=f)
+        self.assertTrue(f._summary_task.is_scheduled())
+        f.close()
+        self.assertIsNone(f._summary_task)
+
+        # Sampling : info dropped, warning kept
+        f = RateLimitFilter(sample_rate=0.0, summary_interval_ms=0)
+        SolBase.logging_init("INFO", True, log_to_console=False, log_callback=self._on_log, log_rate_limit_filter=f)
+        self.onLogCallCount = 0
+        for i in range(0, 10):
+            logger.info("TEST LOG RL %s", i)
+            logger.warning("TEST LOG RL %s", i)
+        self.assertEqual(self.onLogCallCount, 10)
+
+        # Reset
+        SolBase.logging_init("INFO", True)
+
+    def test_log_profile_lean(self):
+        """
+        Test
+        """
+
+        SolBase.logging_init("INFO", True, log_to_console=False, log_callback=self._on_log, log_profile="lean")
+        SolBase.set_compo_name("COMPO_XXX")
+        self.assertIsNone(logging._srcfile)
+
+        SolBase.context_set("k_ip", "LL01")
+        self.onLogCallCount = 0
+        logger.info("TEST LOG LEAN")
+        self.assertEqual(self.onLogCallCount, 1)
+        self.assertIn(" | INFO | %s | TEST LOG LEAN |" % __name__, self.lastMessage)
+        self.assertIn("k_ip:LL01 ", self.lastMessage)
+        self.assertNotIn("test_log_profile_lean", self.lastMessage)
+
+        # Exception still rendered
+        try:
+            raise Exception("LeanCrash")
+        except Exception:
+            logger.warning("TEST LOG LEAN EX", exc_info=True)
+        self.assertIn("LeanCrash", self.lastMessage)
+
+        # Bench (profile is restored)
+        d = SolBase.logging_profile_bench(count=5000)
+        logger.info("Bench=%s", d)
+        self.assertGreater(d["default_ns"], 0)
+        self.assertGreater(d["lean_ns"], 0)
+        self.assertIsNone(logging._srcfile)
+
+        # Default
+        SolBase.logging_init("INFO", True)
+        self.assertIsNotNone(logging._srcfile)
+        self.assertIs(logging.getLogRecordFactory(), logging.LogRecord)
+
+        # Default does not clobber application settings
+        def _factory(*args, **kwargs):
+            return logging.LogRecord(*args, **kwargs)
+
+        logging.setLogRecordFactory(_factory)
+        logging.logProcesses = False
+        try:
+            SolBase.logging_init("INFO", True)
+            self.assertIs(logging.getLogRecordFactory(), _factory)
+            self.assertFalse(logging.logProcesses)
+
+            # Lean then default : restored
+            SolBase.logging_init("INFO", True, log_profile="lean")
+            self.assertIsNot(logging.getLogRecordFactory(), _factory)
+            SolBase.logging_init("INFO", True)
+            self.assertIs(logging.getLogRecordFactory(), _factory)
+            self.assertFalse(logging.logProcesses)
+        finally:
+            logging.setLogRecordFactory(logging.LogRecord)
+            logging.logProcesses = True
+
+    def test_log_to_file_buffered(self):
+        """
+        Test
+        """
+
+        log_file = "/tmp/pythonsol_unittest.log"
+
+        # Clean
+        if FileUtility.is_file_exist(log_file):
+            os.remove(log_file)
+
+        # Init
+        SolBase.logging_init(log_level="INFO",
+                             log_to_file=log_file,
+                             log_to_console=False,
+                             log_to_syslog=False,
+                             force_reset=True,
+                             log_to_file_mode="buffered_file",
+                             log_to_file_flush_ms=100,
+                             log_to_file_check_ms=0)
+        h = logging.getLogger().handlers[0]
+
+        # Buffered
+        logger.info("TEST LOG 888")
+        buf = FileUtility.file_to_textbuffer(log_file, "utf-8")
+        self.assertLess(buf.find("TEST LOG 888"), 0)
+
+        # Flushed on time
+        SolBase.sleep(200)
+        buf = FileUtility.file_to_textbuffer(log_file, "utf-8")
+        self.assertGreaterEqual(buf.find("TEST LOG 888"), 0)
+
+        # Flushed on error
+        logger.error("TEST LOG ERR")
+        buf = FileUtility.file_to_textbuffer(log_file, "utf-8")
+        self.assertGreaterEqual(buf.find("TEST LOG ERR"), 0)
+
+        # Simulate a log rotate : kick the file and touch it
+        os.remove(log_file)
+        FileUtility.append_text_to_file(log_file, "TOTO\n", "utf-8", overwrite=False)
+
+        # Re-emit
+        logger.info("TEST LOG 999")
+        h.flush()
+        buf = FileUtility.file_to_textbuffer(log_file, "utf-8")
+        self.assertGreaterEqual(buf.find("TOTO"), 0)
+        self.assertGreaterEqual(buf.find("TEST LOG 999"), 0)
+
+        d = h.get_stats()
+        self.assertGreaterEqual(d["flush"], 3)
+        self.assertGreater(d["flush_bytes"], 0)
+        self.assertGreater(d["flush_ms_max"], 0.0)
+        self.assertEqual(d["buffered"], 0)
+
+        # Reset
+        SolBase.logging_init("INFO", True)
+
+    def test_log_to_file_size_file(self):
+        """
+        Test
+        """
+
+        log_file = "/tmp/pythonsol_unittest.log"
+
+        for compress in ["gz", "xz", None]:
+            # Clean
+            if FileUtility.is_file_exist(log_file):
+                os.remove(log_file)
+            for f in glob.glob("/tmp/pythonsol_unittest.log.*"):
+                os.remove(f)
+
+            # Init
+            SolBase.logging_init(log_level="INFO",
+                                 log_to_file=log_file,
+                                 log_to_console=False,
+                                 log_to_syslog=False,
+                                 force_reset=True,
+                                 log_to_file_mode="size_file",
+                                 log_to_file_max_bytes=2048,
+                                 log_to_file_backup_count=3,
+                                 log_to_file_compress=compress)
+            h = logging.getLogger().handlers[0]
+
+            # Emit, enough for several rollovers
+            for i in range(0, 100):
+                logger.info("TEST LOG %s %s", i, "X" * 100)
+            self.assertTrue(h.wait_worker())
+
+            d = h.get_stats()
+            logger.info("Stats=%s", d)
+            self.assertGreaterEqual(d["rollover"], 5)
+            self.assertEqual(d["worker_error"], 0)
+            if compress:
+                # Pending files may be pruned before being compressed
+                self.assertGreaterEqual(d["compressed"], 3)
+            self.assertEqual(d["pruned"], d["rollover"] - 3)
+            self.assertLessEqual(FileUtility.get_file_size(log_file), 2048)
+
+            # Retention
+            ar = sorted(glob.glob("/tmp/pythonsol_unittest.log.*"))
+            self.assertEqual(len(ar), 3)
+
+            # Last record in current file, rotated files are readable
+            buf = FileUtility.file_to_textbuffer(log_file, "utf-8")
+            self.assertGreaterEqual(buf.find("TEST LOG 99 "), 0)
+            for f in ar:
+                if compress == "gz":
+                    self.assertTrue(f.endswith(".gz"))
+                    with gzip.open(f, "rt") as fd:
+                        self.assertGreaterEqual(fd.read().find("TEST LOG "), 0)
+                elif compress == "xz":
+                    self.assertTrue(f.endswith(".xz"))
+                    with lzma.open(f, "rt") as fd:
+                        self.assertGreaterEqual(fd.read().find("TEST LOG "), 0)
+
+        # Non ascii : size is tracked in bytes
+        SolBase.logging_init(log_level="INFO",
+                             log_to_file=log_file,
+                             log_to_console=False,
+                             log_to_syslog=False,
+                             force_reset=True,
+                             log_to_file_mode="size_file",
+                             log_to_file_max_bytes=2048,
+                             log_to_file_backup_count=3,
+                             log_to_file_compress=None)
+        h = logging.getLogger().handlers[0]
+        for i in range(0, 20):
+            logger.info("TEST LOG %s %s", i, u"\u00e9" * 100)
+            self.assertEqual(h.get_stats()["size"], FileUtility.get_file_size(log_file))
+            self.assertLessEqual(FileUtility.get_file_size(log_file), 2048)
+        self.assertGreaterEqual(h.get_stats()["rollover"], 2)
+
+        # Fork : worker started in the parent is reset, child rollovers are processed by its own worker
+        self.assertTrue(h._worker_running)
+        file_name = "/tmp/pythonsol_unittest.rotate_fork"
+        if os.path.exists(file_name):
+            os.remove(file_name)
+        pid = os.fork()
+        if pid == 0:
+            buf = str(h._worker_running)
+            pruned = h.get_stats()["pruned"]
+            for i in range(0, 20):
+                logger.info("TEST LOG CHILD %s %s", i, "X" * 100)
+            buf += " %s %s" % (h.wait_worker(), h.get_stats()["pruned"] > pruned)
+            with open(file_name + ".tmp", "w") as f:
+                f.write(buf)
+            os.rename(file_name + ".tmp", file_name)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        with open(file_name) as f:
+            self.assertEqual(f.read(), "False True True")
+        os.remove(file_name)
+
+        # Reset
+        SolBase.logging_init("INFO", True)
+        for f in glob.glob("/tmp/pythonsol_unittest.log.*"):
+            os.remove(f)
+
     def test_log_to_file_with_filter_greenlet(self):
         """
         Test
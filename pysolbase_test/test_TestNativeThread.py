@@ -0,0 +1,112 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+
+import logging
+import os
+import time
+import unittest
+
+from gevent.monkey import get_original
+
+from pysolbase.NativeThread import NativeThread
+from pysolbase.SolBase import SolBase
+
+logger = logging.getLogger(__name__)
+SolBase.voodoo_init()
+
+native_sleep = get_original("time", "sleep")
+
+
+class TestNativeThread(unittest.TestCase):
+    """
+    Test description
+    """
+
+    def setUp(self):
+        """
+        Test
+        """
+        pass
+
+    def tearDown(self):
+        """
+        Test
+        """
+        pass
+
+    def test_loop(self):
+        """
+        Test
+        """
+
+        ar = list()
+        t = NativeThread(lambda: ar.append(NativeThread.get_ident()), 0.01, "ut")
+        self.assertFalse(t.is_started())
+        t.start()
+        self.assertTrue(t.is_started())
+
+        # Runs even if the hub is blocked, in another native thread
+        native_sleep(0.1)
+        self.assertGreaterEqual(len(ar), 5)
+        self.assertNotEqual(ar[0], NativeThread.get_ident())
+
+        # Stop interrupts the sleep
+        t2 = NativeThread(lambda: None, 60.0, "ut2")
+        t2.start()
+        ms = time.monotonic()
+        self.assertTrue(t2.stop())
+        self.assertLess(time.monotonic() - ms, 1.0)
+        self.assertFalse(t2.is_started())
+
+        # Fork : child resets and restarts (stop does not wait for the parent thread)
+        file_name = "/tmp/pythonsol_unittest.native_fork"
+        if os.path.exists(file_name):
+            os.remove(file_name)
+        pid = os.fork()
+        if pid == 0:
+            t.reset_after_fork()
+            n = len(ar)
+            t.start()
+            native_sleep(0.1)
+            ms = time.monotonic()
+            b = t.stop()
+            with open(file_name + ".tmp", "w") as f:
+                f.write("%s %s %s" % (len(ar) > n, b, time.monotonic() - ms < 1.0))
+            os.rename(file_name + ".tmp", file_name)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        with open(file_name) as f:
+            self.assertEqual(f.read(), "True True True")
+        os.remove(file_name)
+
+        # Stop
+        self.assertTrue(t.stop())
+        n = len(ar)
+        native_sleep(0.05)
+        self.assertEqual(len(ar), n)
+        self.assertTrue(t.stop())
+
+        # Locked lock
+        lock = NativeThread.allocate_locked()
+        self.assertFalse(lock.acquire(False))
+        lock.release()
+        self.assertTrue(lock.acquire(False))
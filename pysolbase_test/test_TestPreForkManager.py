@@ -0,0 +1,276 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+
+
+import glob
+import logging
+import os
+import signal
+import unittest
+
+import gevent
+
+from pysolbase.PlatformTools import PlatformTools
+from pysolbase.SolBase import SolBase
+
+logger = logging.getLogger(__name__)
+SolBase.voodoo_init()
+
+
+class TestPreForkManager(unittest.TestCase):
+    """
+    Test description
+    """
+
+    def setUp(self):
+        """
+        Test
+        """
+
+        self.prefix = "/tmp/pythonsol_unittest.prefork"
+        self._clean()
+        self.m = None
+
+    def tearDown(self):
+        """
+        Test
+        """
+
+        if self.m:
+            self.m.stop()
+        self._clean()
+        SolBase.set_master_process(True)
+
+    def _clean(self):
+        """
+        Clean
+        """
+
+        for f in glob.glob(self.prefix + ".*"):
+            os.remove(f)
+
+    def _write(self, name, buf):
+        """
+        Write a file (atomic)
+        """
+
+        file_name = "%s.%s" % (self.prefix, name)
+        with open(file_name + ".tmp", "w") as f:
+            f.write(buf)
+        os.rename(file_name + ".tmp", file_name)
+
+    def _wait_files(self, pattern, count, timeout_ms=5000):
+        """
+        Wait for files
+        """
+
+        ms = SolBase.mscurrent()
+        while SolBase.msdiff(ms) < timeout_ms:
+            ar = [f for f in glob.glob(self.prefix + "." + pattern) if not f.endswith(".tmp")]
+            if len(ar) >= count:
+                return ar
+            SolBase.sleep(10)
+        return [f for f in glob.glob(self.prefix + "." + pattern) if not f.endswith(".tmp")]
+
+    def _target_loop(self, idx):
+        """
+        Worker, runs until SIGTERM
+        """
+
+        def _on_usr1():
+            self._write("usr1.%s" % os.getpid(), "1")
+
+        gevent.signal_handler(signal.SIGUSR1, _on_usr1)
+        self._write("run.%s.%s" % (idx, os.getpid()), "%s %s" % (SolBase.get_master_process(), self.hook))
+        while True:
+            SolBase.sleep(50)
+
+    def test_cpu_count(self):
+        """
+        Test
+        """
+
+        n = PlatformTools.get_cpu_count()
+        self.assertGreaterEqual(n, 1)
+        self.assertLessEqual(n, os.cpu_count())
+
+    def test_workers(self):
+        """
+        Test
+        """
+
+        self.hook = None
+
+        def _hook(idx):
+            self.hook = "hook%s" % idx
+
+        self.m = SolBase.prefork_manager(self._target_loop, worker_count=2, cpu_affinity=True, respawn_backoff_ms=10)
+        self.m.add_post_fork_hook(_hook)
+        self.m.start()
+        self.assertTrue(SolBase.get_master_process())
+        self.assertEqual(len(self._wait_files("run.*", 2)), 2)
+        pids = self.m.get_worker_pids()
+        self.assertNotIn(None, pids)
+        self.assertNotIn(os.getpid(), pids)
+
+        # Worker side
+        for idx, pid in enumerate(pids):
+            with open("%s.run.%s.%s" % (self.prefix, idx, pid)) as f:
+                self.assertEqual(f.read(), "False hook%s" % idx)
+
+        # Forward
+        os.kill(os.getpid(), signal.SIGUSR1)
+        self.assertEqual(len(self._wait_files("usr1.*", 2)), 2)
+        self.assertEqual(self.m.get_stats()["signal_forwarded"], 2)
+
+        # Respawn
+        os.kill(pids[0], signal.SIGKILL)
+        self.assertEqual(len(self._wait_files("run.0.*", 2)), 2)
+        ms = SolBase.mscurrent()
+        while None in self.m.get_worker_pids() and SolBase.msdiff(ms) < 5000:
+            SolBase.sleep(10)
+        new_pids = self.m.get_worker_pids()
+        self.assertNotEqual(new_pids[0], pids[0])
+        self.assertEqual(new_pids[1], pids[1])
+        d = self.m.get_stats()
+        self.assertEqual(d["spawned"], 3)
+        self.assertEqual(d["exited"], 1)
+        self.assertEqual(d["alive"], 2)
+
+        # Stop
+        self.m.stop()
+        self.assertTrue(self.m.join(0))
+        self.assertFalse(self.m.is_running())
+        self.assertEqual(self.m.get_worker_pids(), [None, None])
+        d = self.m.get_stats()
+        self.assertEqual(d["exited"], 3)
+        self.assertEqual(d["killed"], 0)
+        for pid in new_pids:
+            self.assertRaises(ProcessLookupError, os.kill, pid, 0)
+
+    def test_backoff(self):
+        """
+        Test
+        """
+
+        def _target(idx):
+            raise Exception("Boom%s" % idx)
+
+        self.m = SolBase.prefork_manager(_target, worker_count=1, respawn_backoff_ms=20, respawn_backoff_max_ms=160)
+        self.m.start()
+        SolBase.sleep(600)
+        self.m.stop()
+
+        # Delays : 20, 40, 80, 160, 160 ... (plus supervision tick)
+        d = self.m.get_stats()
+        self.assertGreaterEqual(d["spawned"], 3)
+        self.assertLessEqual(d["spawned"], 6)
+        self.assertEqual(d["spawned"], d["exited"])
+
+    def test_backoff_wall_clock(self):
+        """
+        Test
+        """
+
+        def _target(idx):
+            raise Exception("Boom%s" % idx)
+
+        # Frozen wall clock : backoff must rely on monotonic time
+        mscurrent = SolBase.__dict__["mscurrent"]
+        SolBase.mscurrent = classmethod(lambda cls: 0.0)
+        try:
+            self.m = SolBase.prefork_manager(_target, worker_count=1, respawn_backoff_ms=20, respawn_backoff_max_ms=160)
+            self.m.start()
+            SolBase.sleep(300)
+        finally:
+            SolBase.mscurrent = mscurrent
+        self.m.stop()
+
+        # Respawned
+        d = self.m.get_stats()
+        self.assertGreaterEqual(d["spawned"], 2)
+        self.assertEqual(d["spawned"], d["exited"])
+
+    def test_exit(self):
+        """
+        Test
+        """
+
+        prefix = self.prefix
+
+        class _FlushHandler(logging.Handler):
+            def emit(self, record):
+                pass
+
+            def close(self):
+                with open("%s.closed.%s" % (prefix, os.getpid()), "w") as f:
+                    f.write("1")
+                logging.Handler.close(self)
+
+        def _target(idx):
+            logging.getLogger().addHandler(_FlushHandler())
+            raise SystemExit((None, 3, "Bye")[idx])
+
+        # Capture death statuses
+        ar_record = list()
+        h = logging.Handler()
+        h.emit = ar_record.append
+        logging.getLogger("pysolbase.PreForkManager").addHandler(h)
+        try:
+            self.m = SolBase.prefork_manager(_target, worker_count=3, respawn_backoff_ms=5000, respawn_backoff_max_ms=10000)
+            self.m.start()
+            ms = SolBase.mscurrent()
+            while SolBase.msdiff(ms) < 5000 and self.m.get_stats()["exited"] < 3:
+                SolBase.sleep(10)
+            self.m.stop()
+        finally:
+            logging.getLogger("pysolbase.PreForkManager").removeHandler(h)
+
+        # SystemExit code honored
+        d_status = dict()
+        for r in ar_record:
+            if r.getMessage().startswith("Worker died"):
+                st = r.args[2]
+                d_status.setdefault(r.args[0], os.WEXITSTATUS(st) if os.WIFEXITED(st) else -1)
+        self.assertEqual(d_status, {0: 0, 1: 3, 2: 1})
+
+        # Logging handlers closed before exit
+        self.assertEqual(len(self._wait_files("closed.*", 3)), 3)
+
+    def test_stop_kill(self):
+        """
+        Test
+        """
+
+        def _target(idx):
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            self._write("run.%s" % idx, "1")
+            while True:
+                SolBase.sleep(50)
+
+        self.m = SolBase.prefork_manager(_target, worker_count=1, stop_timeout_ms=200)
+        self.m.start()
+        self.assertEqual(len(self._wait_files("run.*", 1)), 1)
+        ms = SolBase.mscurrent()
+        self.m.stop()
+        self.assertGreaterEqual(SolBase.msdiff(ms), 190)
+        self.assertEqual(self.m.get_stats()["killed"], 1)
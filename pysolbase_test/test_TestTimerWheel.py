@@ -0,0 +1,259 @@
+"""
+# -*- coding: utf-8 -*-
+# ===============================================================================
+#
+# Copyright (C) 2013/2025 Laurent Labatut / Laurent Champagnac
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+# ===============================================================================
+"""
+
+
+import logging
+import unittest
+
+import gevent
+from gevent.monkey import get_original
+
+from pysolbase.SolBase import SolBase
+from pysolbase.TimerWheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+SolBase.voodoo_init()
+
+native_sleep = get_original("time", "sleep")
+
+
+class TestTimerWheel(unittest.TestCase):
+    """
+    Test description
+    """
+
+    def setUp(self):
+        """
+        Test
+        """
+
+        self.wheel = TimerWheel(tick_ms=5, wheel_bits=4, levels=3)
+
+    def tearDown(self):
+        """
+        Test
+        """
+
+        self.wheel.stop()
+
+    def test_schedule(self):
+        """
+        Test
+        """
+
+        ar = list()
+        ms = SolBase.mscurrent()
+        self.wheel.schedule(100, lambda v: ar.append((v, SolBase.msdiff(ms))), "b")
+        self.wheel.schedule(20, lambda v: ar.append((v, SolBase.msdiff(ms))), "a")
+        # Above level 0 range (16 ticks), cascaded
+        self.wheel.schedule(400, lambda v: ar.append((v, SolBase.msdiff(ms))), "c")
+        # Above wheels range (4096 ticks), re-inserted
+        t = self.wheel.schedule(30000, ar.append, "d")
+        self.assertEqual(self.wheel.get_stats()["pending"], 4)
+
+        gevent.sleep(0.6)
+        self.assertEqual([v for v, _ in ar], ["a", "b", "c"])
+        for (v, elapsed), expected in zip(ar, (20, 100, 400)):
+            self.assertGreaterEqual(elapsed, expected - 1)
+            self.assertLess(elapsed, expected + 100)
+
+        d = self.wheel.get_stats()
+        self.assertEqual(d["fired"], 3)
+        self.assertEqual(d["pending"], 1)
+        self.assertGreater(d["cascaded"], 0)
+        self.assertTrue(t.is_scheduled())
+
+        # Cancel
+        self.assertTrue(t.cancel())
+        self.assertFalse(t.cancel())
+        self.assertFalse(t.is_scheduled())
+        d = self.wheel.get_stats()
+        self.assertEqual(d["pending"], 0)
+        self.assertEqual(d["cancelled"], 1)
+
+    def test_cancel_bench(self):
+        """
+        Test
+        """
+
+        ar = list()
+        ms = SolBase.mscurrent()
+        tasks = [self.wheel.schedule(50 + i % 5000, ar.append, i) for i in range(0, 20000)]
+        for t in tasks:
+            t.cancel()
+        logger.info("20000 schedule + cancel, ms=%.1f", SolBase.msdiff(ms))
+        self.assertEqual(self.wheel.get_stats()["pending"], 0)
+        gevent.sleep(0.1)
+        self.assertEqual(len(ar), 0)
+
+    def test_periodic_fixed_rate(self):
+        """
+        Test
+        """
+
+        ar = list()
+        t = self.wheel.schedule_periodic(20, lambda: ar.append(SolBase.mscurrent()))
+        gevent.sleep(0.21)
+        t.cancel()
+        self.assertGreaterEqual(len(ar), 8)
+        self.assertLessEqual(len(ar), 11)
+        self.assertEqual(t.missed_count, 0)
+
+        # Missed runs are coalesced
+        ar = list()
+
+        def _slow():
+            ar.append(SolBase.mscurrent())
+            if len(ar) == 2:
+                # Block the hub for 5 intervals
+                native_sleep(0.1)
+
+        t = self.wheel.schedule_periodic(20, _slow)
+        gevent.sleep(0.3)
+        t.cancel()
+        self.assertGreaterEqual(t.missed_count, 3)
+        # No burst after the block
+        self.assertGreaterEqual(ar[2] - ar[1], 100)
+        self.assertGreaterEqual(ar[3] - ar[2], 10)
+        self.assertEqual(self.wheel.get_stats()["missed"], t.missed_count)
+
+    def test_periodic_fixed_delay(self):
+        """
+        Test
+        """
+
+        ar = list()
+
+        def _run():
+            ar.append(SolBase.mscurrent())
+            if len(ar) == 1:
+                native_sleep(0.05)
+
+        t = self.wheel.schedule_periodic(20, _run, fixed_rate=False, initial_delay_ms=5)
+        gevent.sleep(0.15)
+        t.cancel()
+        self.assertEqual(t.missed_count, 0)
+        self.assertGreaterEqual(len(ar), 3)
+        # Delay counted from run end
+        self.assertGreaterEqual(ar[1] - ar[0], 70)
+
+    def test_cancel_in_callback(self):
+        """
+        Test
+        """
+
+        ar = list()
+        d = dict()
+
+        def _cancel_other():
+            ar.append("a")
+            d["b"].cancel()
+
+        def _cancel_self():
+            ar.append("c")
+            d["c"].cancel()
+
+        # Same tick
+        self.wheel.schedule(20, _cancel_other)
+        d["b"] = self.wheel.schedule(20, ar.append, "b")
+        d["c"] = self.wheel.schedule_periodic(10, _cancel_self)
+
+        def _raise():
+            raise Exception("Boom")
+
+        self.wheel.schedule(10, _raise)
+        gevent.sleep(0.1)
+        self.assertEqual(sorted(ar), ["a", "c"])
+        d = self.wheel.get_stats()
+        self.assertEqual(d["pending"], 0)
+        self.assertEqual(d["error"], 1)
+
+    def test_shared(self):
+        """
+        Test
+        """
+
+        w = SolBase.get_timer_wheel()
+        self.assertIs(w, SolBase.get_timer_wheel())
+        ar = list()
+        w.schedule(10, ar.append, 1)
+        gevent.sleep(0.05)
+        self.assertEqual(ar, [1])
+
+    def test_driver(self):
+        """
+        Test
+        """
+
+        ar = list()
+
+        def _timeout():
+            raise gevent.Timeout()
+
+        # Callback raising a BaseException : driver survives
+        self.wheel.schedule(10, _timeout)
+        gevent.sleep(0.05)
+        self.assertEqual(self.wheel.get_stats()["error"], 1)
+        self.wheel.schedule(10, ar.append, 1)
+        gevent.sleep(0.05)
+        self.assertEqual(ar, [1])
+
+        # SystemExit : propagated to the main greenlet (not swallowed)
+        def _exit():
+            raise SystemExit(3)
+
+        self.wheel.schedule(10, _exit)
+        g = self.wheel._greenlet
+        with self.assertRaises(SystemExit):
+            gevent.sleep(0.05)
+        self.assertIsInstance(g.exception, SystemExit)
+        self.assertEqual(self.wheel.get_stats()["error"], 1)
+        self.assertFalse(self.wheel._is_running)
+
+        # Driver killed : restarted by next schedule
+        self.wheel.start()
+        gevent.sleep(0)
+        self.wheel._greenlet.kill()
+        self.assertFalse(self.wheel._is_running)
+        self.assertIsNone(self.wheel._greenlet)
+        self.wheel.schedule(10, ar.append, 2)
+        gevent.sleep(0.05)
+        self.assertEqual(ar, [1, 2])
+
+        # Far task : driver sleeps until its slot (not every tick), sooner task wakes it up
+        wakeup = self.wheel.get_stats()["wakeup"]
+        self.wheel.schedule(300, ar.append, 4)
+        gevent.sleep(0.01)
+        self.wheel.schedule(100, ar.append, 3)
+        gevent.sleep(0.4)
+        self.assertEqual(ar, [1, 2, 3, 4])
+        self.assertLess(self.wheel.get_stats()["wakeup"] - wakeup, 10)
+
+        # Unref tasks
+        t = self.wheel.schedule_periodic(10, ar.append, 5, ref=False)
+        d = self.wheel.get_stats()
+        self.assertEqual(d["pending"], 1)
+        self.assertEqual(d["pending_ref"], 0)
+        gevent.sleep(0.05)
+        self.assertGreater(ar.count(5), 2)
+        t.cancel()
+        self.assertEqual(self.wheel.get_stats()["pending"], 0)